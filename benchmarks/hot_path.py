@@ -0,0 +1,253 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Benchmarks of the client side request path: url building, body encoding,
+response decoding, route expansion and full calls against the local stub
+server (foreman.stub_server).
+
+    benchmarks/hot_path.py                      # run, write results.json, compare to baseline.json
+    benchmarks/hot_path.py --update-baseline    # run and store the results as the new baseline
+
+The committed baseline.json was recorded with the default options on the
+machine named in it. The results are machine specific: on another machine,
+record a baseline with --update-baseline before making the change to measure.
+
+The exit status is 1 when a benchmark got slower than the baseline by more
+than the tolerance.
+"""
+
+import gzip
+import os
+import platform
+import sys
+import tempfile
+import time
+from optparse import OptionParser
+from StringIO import StringIO
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+from foreman.apipie import ApipieApi, ConnectionPool, Response, ServerConnection
+from foreman.bindings import Bindings
+from foreman.stub_server import StubServer, SyntheticInventory
+
+
+class FakeResponse(object):
+
+    def __init__(self, body, encoding=None):
+        self.__body = body
+        self.__encoding = encoding
+        self.stream = None
+
+    def rewind(self):
+        self.stream = StringIO(self.__body)
+        return self
+
+    def getheader(self, name, default=None):
+        if name.lower() == 'content-encoding':
+            return self.__encoding
+        return default
+
+    def read(self, amt=None):
+        return self.stream.read() if amt is None else self.stream.read(amt)
+
+
+def _drain(body):
+    # streaming encoders return file like bodies, reading them is part of the cost
+    if hasattr(body, 'read'):
+        while body.read(64 * 1024):
+            pass
+
+
+def measure(function, min_time=0.5, repeat=3):
+    """
+    @rtype: float
+    @return: best seconds per call out of `repeat` runs of at least `min_time` seconds
+    """
+    best = None
+    for i in range(repeat):
+        calls = 0
+        start = time.time()
+        while True:
+            function()
+            calls += 1
+            elapsed = time.time() - start
+            if elapsed >= min_time:
+                break
+        per_call = elapsed / calls
+        if best is None or per_call < best:
+            best = per_call
+    return best
+
+
+def micro_benchmarks(connection):
+    records = [{'id': i, 'name': 'host%06d.example.com' % i, 'ip': '10.0.%d.%d' % (i // 256, i % 256),
+                'hostgroup_id': i % 5, 'enabled': True} for i in range(5000)]
+    payload = json.dumps({'total': len(records), 'page': 1, 'per_page': len(records), 'results': records})
+    buf = StringIO()
+    stream = gzip.GzipFile(fileobj=buf, mode='wb')
+    stream.write(payload)
+    stream.close()
+    plain_response = FakeResponse(payload)
+    gzip_response = FakeResponse(buf.getvalue(), 'gzip')
+
+    upload = tempfile.NamedTemporaryFile(suffix='.txt')
+    upload.write('#!ipxe\n' * 40000)
+    upload.flush()
+
+    def multipart():
+        with open(upload.name) as template:
+            content_type, body = connection._encode_multipart_formdata(
+                {'config_template': {'name': 'bench', 'template': template, 'snippet': 'false'}})
+            _drain(body)
+
+    host = {'host': dict(records[0], host_parameters_attributes=[{'name': 'a', 'value': 'b'}])}
+    yield '_build_url', lambda: connection._build_url('/api/hosts', {'search': u'name ~ h\xe9st', 'page': 3, 'per_page': 100})
+    yield '_prepare_body', lambda: connection._prepare_body(host, False)
+    yield '_encode_json', lambda: connection._encode_json(host)
+    yield '_encode_multipart_formdata', multipart
+    yield 'Response._get_body', lambda: Response._get_body(plain_response.rewind())
+    yield 'Response._get_body_gzip', lambda: Response._get_body(gzip_response.rewind())
+    yield 'expand_route', lambda: ApipieApi.expand_route('/api/hosts/:host_id/puppetclass_ids/:id',
+                                                          {'host_id': 5, 'id': 7})
+    yield 'fill_params_in_url', lambda: ApipieApi.fill_params_in_url('/api/host/:host_id/parameters/:id',
+                                                                      {'host_id': 5, 'id': 7, 'parameter': {}})
+
+    def load_resources():
+        bindings = Bindings(connection)
+        for name in Bindings.RESOURCES:
+            getattr(bindings, name)
+    yield 'Bindings_all_resources', load_resources
+
+
+def end_to_end_benchmarks(server, hosts):
+    # through the generated resource classes, as the cli calls them
+    connection = ServerConnection('127.0.0.1', server.port, 'http', 'foreman', pool=ConnectionPool(8))
+    host = Bindings(connection).host
+
+    def index_all():
+        count = sum(1 for record in host.paginate(host.index, per_page=1000))
+        assert count == hosts
+
+    def index_all_concurrently():
+        count = sum(1 for record in host.paginate_concurrently(host.index, per_page=1000, concurrency=8))
+        assert count == hosts
+
+    def index_streamed():
+        for record in host.index({'per_page': 1000}, stream=True).body:
+            pass
+
+    yield 'e2e_host_show', lambda: host.show({'id': 42})
+    yield 'e2e_index_page_streamed', index_streamed
+    yield 'e2e_index_all', index_all
+    yield 'e2e_index_all_concurrently', index_all_concurrently
+    # last, the created hosts would change the totals of the index benchmarks
+    yield 'e2e_host_create', lambda: host.create({'host': {'name': 'bench.example.com'}})
+
+
+def run(options):
+    results = {}
+
+    def record(name, function):
+        seconds = measure(function, options.min_time, options.repeat)
+        results[name] = {'usec_per_op': seconds * 1e6, 'ops_per_sec': 1.0 / seconds}
+        print '%-32s %14.1f us/op %12.1f ops/s' % (name, seconds * 1e6, 1.0 / seconds)
+
+    for name, function in micro_benchmarks(ServerConnection('localhost', 80, 'http')):
+        record(name, function)
+
+    if not options.skip_e2e:
+        server = StubServer(SyntheticInventory(hosts=options.hosts), max_per_page=1000).start()
+        try:
+            for name, function in end_to_end_benchmarks(server, options.hosts):
+                record(name, function)
+        finally:
+            server.stop()
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'results': results,
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    @rtype: list of str
+    @return: names of the benchmarks slower than the baseline by more than tolerance
+    """
+    regressions = []
+    for name, current in sorted(results['results'].items()):
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        change = current['usec_per_op'] / previous['usec_per_op'] - 1
+        flag = ''
+        if change > tolerance:
+            regressions.append(name)
+            flag = 'REGRESSION'
+        print '%-32s %+7.1f%% %s' % (name, change * 100, flag)
+    return regressions
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--output', dest='output', default=os.path.join(HERE, 'results.json'),
+                      help='where to write the results')
+    parser.add_option('--baseline', dest='baseline', default=os.path.join(HERE, 'baseline.json'),
+                      help='results to compare against')
+    parser.add_option('--update-baseline', dest='update_baseline', action='store_true', default=False,
+                      help='store the results as the new baseline')
+    parser.add_option('--tolerance', dest='tolerance', type='float', default=0.2,
+                      help='allowed slow down before failing, 0.2 means 20%')
+    parser.add_option('--min-time', dest='min_time', type='float', default=0.5,
+                      help='seconds every run of a benchmark takes at least')
+    parser.add_option('--repeat', dest='repeat', type='int', default=3)
+    parser.add_option('--hosts', dest='hosts', type='int', default=10000,
+                      help='hosts served by the stub for the end to end benchmarks')
+    parser.add_option('--skip-e2e', dest='skip_e2e', action='store_true', default=False)
+    options, args = parser.parse_args()
+
+    results = run(options)
+    with open(options.output, 'w') as output:
+        json.dump(results, output, indent=2, sort_keys=True)
+
+    if options.update_baseline:
+        with open(options.baseline, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+        return 0
+
+    if not os.path.exists(options.baseline):
+        print 'no baseline at %s, run with --update-baseline to create one' % options.baseline
+        return 0
+
+    with open(options.baseline) as stream:
+        baseline = json.load(stream)
+    print
+    print 'compared to baseline from %s (python %s)' % (baseline.get('created_at'), baseline.get('python'))
+    if compare(results, baseline, options.tolerance):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Compare certificate authenticated handshakes per second with a fresh ssl
+context for every connection against SSLAuthentication, which reuses its
+context and resumes tls sessions.
+
+    benchmarks/ssl_handshake.py --host foreman.example.com --cert cert.pem --key key.pem
+"""
+
+import os
+import sys
+import time
+from optparse import OptionParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from M2Crypto import SSL, httpslib
+
+from foreman.apipie import SSLAuthentication
+
+
+def fresh_context_connect(host, port, certfile, keyfile):
+    # what SSLAuthentication.connect used to do for every request
+    ssl_context = SSL.Context('sslv23')
+    ssl_context.load_cert(certfile, keyfile)
+    connection = httpslib.HTTPSConnection(host, port, ssl_context=ssl_context)
+    connection.connect()
+    return connection
+
+
+def measure(connect, count):
+    resumed = 0
+    start = time.time()
+    for i in range(count):
+        connection = connect()
+        if connection.sock.session_reused():
+            resumed += 1
+        connection.close()
+    elapsed = time.time() - start
+    return count / elapsed, resumed
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--host', dest='host', default='localhost')
+    parser.add_option('--port', dest='port', type='int', default=443)
+    parser.add_option('--cert', dest='certfile')
+    parser.add_option('--key', dest='keyfile')
+    parser.add_option('-n', '--count', dest='count', type='int', default=200)
+    options, args = parser.parse_args()
+
+    if not (options.certfile and options.keyfile):
+        parser.error('--cert and --key are required')
+
+    auth = SSLAuthentication(options.certfile, options.keyfile)
+
+    results = [
+        ('fresh context', lambda: fresh_context_connect(options.host, options.port,
+                                                        options.certfile, options.keyfile)),
+        ('cached context', lambda: auth.connect(options.host, options.port, 'https')),
+    ]
+    for name, connect in results:
+        rate, resumed = measure(connect, options.count)
+        print '%-16s %8.1f handshakes/s  %d/%d sessions resumed' % (name, rate, resumed, options.count)
+
+
+if __name__ == '__main__':
+    main()
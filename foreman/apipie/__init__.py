@@ -14,21 +14,55 @@
 import re
 
 import base64
-import kerberos
-from kerberos import GSSError
+import collections
 import httplib
 import logging
 import os
+import Queue
+import select
+import socket
+import ssl
+import stat
+import threading
+import time
 import urllib
 import mimetypes
 import sys
+import zlib
 
 try:
     import json
 except ImportError:
     import simplejson as json
 
-from M2Crypto import SSL, httpslib
+# kerberos and M2Crypto are imported by the authentication strategies
+# that need them, so that the other strategies do not pay for loading them
+
+
+class _TimedHTTPSConnection(httplib.HTTPSConnection):
+    """
+    HTTPSConnection telling apart the time of the tcp connect and of the tls
+    handshake, see RequestTimings
+
+    @ivar tcp_time: seconds the tcp connect took
+    @ivar tls_time: seconds the tls handshake took
+    """
+
+    tcp_time = None
+    tls_time = None
+
+    def connect(self):
+        start = time.time()
+        httplib.HTTPConnection.connect(self)
+        self.tcp_time = time.time() - start
+
+        start = time.time()
+        context = getattr(self, '_context', None)
+        if context is not None:
+            self.sock = context.wrap_socket(self.sock, server_hostname=self._tunnel_host or self.host)
+        else:
+            self.sock = ssl.wrap_socket(self.sock, self.key_file, self.cert_file)
+        self.tls_time = time.time() - start
 
 
 class AuthenticationStrategy(object):
@@ -36,7 +70,7 @@ class AuthenticationStrategy(object):
     @classmethod
     def _get_connection(cls, host, port, protocol):
         if protocol == "https":
-            return httplib.HTTPSConnection(host, port)
+            return _TimedHTTPSConnection(host, port)
         else:
             return httplib.HTTPConnection(host, port)
 
@@ -44,9 +78,27 @@ class AuthenticationStrategy(object):
     def set_headers(cls, headers):
         return headers
 
+    def process_response(self, response):
+        """
+        Inspect a response received with the headers set by this strategy
+        @type response: Response
+        @param response: response to the authenticated request
+        @rtype: boolean
+        @return: True if the credentials were renewed and the request should be sent again
+        """
+        return False
+
     def connect(self, host, port, protocol):
         return self._get_connection(host, port, protocol)
 
+    def identity(self):
+        """
+        @rtype: str or None
+        @return: who the requests are sent as, for keeping what the server
+                 showed one user apart from the others
+        """
+        return None
+
 class NoAuthentication(AuthenticationStrategy):
 
     def connect(self, host, port, protocol):
@@ -65,17 +117,28 @@ class BasicAuthentication(AuthenticationStrategy):
         headers['Authorization'] = 'Basic ' + encoded
         return headers
 
+    def identity(self):
+        return 'basic:' + self.__username
+
     def connect(self, host, port, protocol):
         return self._get_connection(host, port, protocol)
 
 
 class SSLAuthentication(AuthenticationStrategy):
+    """
+    Client certificate authentication. The ssl context is built once per
+    strategy and the last tls session of every server is kept, so that new
+    connections resume it instead of doing a full handshake.
+    """
 
     def __init__(self, certfile, keyfile):
         super(SSLAuthentication, self).__init__()
         self.__certfile = certfile
         self.__keyfile = keyfile
         self.__check_cert_and_key()
+        self.__ssl_context = None
+        self.__sessions = {}
+        self.__lock = threading.Lock()
 
     def __check_cert_and_key(self):
         if not os.access(self.__certfile, os.R_OK):
@@ -88,33 +151,279 @@ class SSLAuthentication(AuthenticationStrategy):
     def connect(self, host, port, protocol):
         if protocol != "https":
             raise AuthenticationError(_("can't authenticate via certificate when not using https connection"))
-        ssl_context = SSL.Context('sslv3')
-        ssl_context.load_cert(self.__certfile, self.__keyfile)
-        return httpslib.HTTPSConnection(host, port, ssl_context=ssl_context)
+        from M2Crypto import httpslib
+
+        connection = httpslib.HTTPSConnection(host, port, ssl_context=self._get_ssl_context())
+        session = self.__sessions.get((host, port))
+        if session is not None:
+            connection.set_session(session)
+
+        # connect right away to pick up the (possibly resumed) session for the next connection
+        connection.connect()
+        self.__sessions[(host, port)] = connection.get_session()
+        return connection
+
+    def identity(self):
+        return 'certificate:' + os.path.abspath(self.__certfile)
+
+    def _get_ssl_context(self):
+        from M2Crypto import SSL
+
+        self.__lock.acquire()
+        try:
+            if self.__ssl_context is None:
+                ssl_context = SSL.Context('sslv23')
+                ssl_context.load_cert(self.__certfile, self.__keyfile)
+                self.__ssl_context = ssl_context
+            return self.__ssl_context
+        finally:
+            self.__lock.release()
 
 
 class KerberosAuthentication(AuthenticationStrategy):
+    """
+    Negotiate authentication. Every request gets a fresh token until the server
+    sets a session cookie, servers with a replay cache reject a token that is
+    sent twice. Once the cookie is known it is sent instead of a token.
+    """
 
     def __init__(self, host):
         super(KerberosAuthentication, self).__init__()
         self.__host = host
+        self.__ctx = None
+        self.__token = None
+        self.__cookie = None
+        self.__lock = threading.Lock()
 
     def set_headers(self, headers):
+        self.__lock.acquire()
+        try:
+            if self.__cookie:
+                headers.pop('Authorization', None)
+                headers['Cookie'] = self.__cookie
+                return headers
+
+            self.__clean_context()
+            self.__init_context()
+            headers.pop('Cookie', None)
+            headers['Authorization'] = 'Negotiate %s' % self.__token
+            return headers
+        finally:
+            self.__lock.release()
+
+    def process_response(self, response):
+        self.__lock.acquire()
+        try:
+            if response.status == 401:
+                # the session or the token expired, negotiate again on the next request
+                renew = self.__cookie is not None or self.__token is not None
+                self.__cookie = None
+                self.__clean_context()
+                return renew
+
+            if self.__cookie is None:
+                cookie = response.get_header('set-cookie')
+                if cookie:
+                    self.__cookie = cookie.split(';', 1)[0].strip()
+            return False
+        finally:
+            self.__lock.release()
+
+    def identity(self):
+        # the principal is the one of the credentials cache
+        return 'kerberos:' + (os.environ.get('KRB5CCNAME') or 'uid %d' % os.getuid())
+
+    def __init_context(self):
+        import kerberos
+
         ctx = kerberos.authGSSClientInit("HTTP@" + self.__host, \
             gssflags=kerberos.GSS_C_DELEG_FLAG|kerberos.GSS_C_MUTUAL_FLAG|kerberos.GSS_C_SEQUENCE_FLAG)[1]
         kerberos.authGSSClientStep(ctx, '')
         tgt = kerberos.authGSSClientResponse(ctx)
 
-        if tgt:
-            headers['Authorization'] = 'Negotiate %s' % tgt
-            return headers
-        else:
+        if not tgt:
+            kerberos.authGSSClientClean(ctx)
             raise AuthenticationError(_("Couldn't authenticate via kerberos"))
+        self.__ctx = ctx
+        self.__token = tgt
+
+    def __clean_context(self):
+        if self.__ctx is not None:
+            import kerberos
+
+            kerberos.authGSSClientClean(self.__ctx)
+        self.__ctx = None
+        self.__token = None
 
 
     def connect(self, host, port, protocol):
-        self._get_connection(host, port, protocol)
+        return self._get_connection(host, port, protocol)
+
+
+
+class ConnectionPool(object):
+    """
+    Bounded pool of idle keep-alive connections.
+
+    Connections are grouped by a key, which the server connection builds from
+    the host, port, protocol and authentication strategy, so that a connection
+    is only ever reused for the same endpoint and credentials.
+
+    @ivar max_idle: maximum number of idle connections kept per key, callers
+                    running more requests at once raise it with reserve
+    @ivar idle_timeout: seconds after which an idle connection is dropped
+    """
+
+    def __init__(self, max_idle=8, idle_timeout=60):
+        self.max_idle = max_idle
+        self.idle_timeout = idle_timeout
+        self.__idle = {}
+        self.__lock = threading.Lock()
+        self.__in_use = 0
+        self.__peak_in_use = 0
+        self.__opened = 0
+        self.__reused = 0
+
+    def acquire(self, key, factory, reuse=True):
+        """
+        Get an idle connection for the key or create a new one. Every acquired
+        connection has to be handed back with release or discard.
+        @type key: hashable
+        @param key: connection pool key
+        @type factory: callable
+        @param factory: called without arguments to open a new connection
+        @type reuse: boolean
+        @param reuse: set False to skip the idle connections and open a new one
+        @rtype: (HTTPConnection, boolean)
+        @return: tuple of the connection and a flag telling whether it was reused
+        """
+        now = time.time()
+        self.__lock.acquire()
+        try:
+            idle = self.__idle.get(key, []) if reuse else []
+            while idle:
+                connection, last_used = idle.pop()
+                if now - last_used > self.idle_timeout or self._is_stale(connection):
+                    self._close(connection)
+                    continue
+                self.__reused += 1
+                self.__count_in_use(1)
+                return connection, True
+        finally:
+            self.__lock.release()
+
+        connection = factory()
+        self.__lock.acquire()
+        try:
+            self.__opened += 1
+            self.__count_in_use(1)
+        finally:
+            self.__lock.release()
+        return connection, False
+
+    def release(self, key, connection):
+        """
+        Return a connection to the pool once its response was fully read
+        @type key: hashable
+        @param key: connection pool key
+        @type connection: HTTPConnection
+        @param connection: connection to keep for reuse
+        """
+        self.__lock.acquire()
+        try:
+            self.__count_in_use(-1)
+            idle = self.__idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append((connection, time.time()))
+                return
+        finally:
+            self.__lock.release()
+        self._close(connection)
+
+    def reserve(self, connections):
+        """
+        Keep enough idle connections per key for this many requests at once,
+        so that concurrent callers do not close and reopen connections
+        @type connections: int
+        @param connections: number of requests sent at the same time
+        """
+        self.__lock.acquire()
+        try:
+            self.max_idle = max(self.max_idle, connections)
+        finally:
+            self.__lock.release()
+
+    def discard(self, connection):
+        """
+        Close a connection that must not be reused
+        @type connection: HTTPConnection
+        @param connection: connection to close
+        """
+        self.__lock.acquire()
+        try:
+            self.__count_in_use(-1)
+        finally:
+            self.__lock.release()
+        self._close(connection)
+
+    def stats(self):
+        """
+        Utilization of the pool
+        @rtype: dict
+        @return: idle and in_use connections right now, the peak_in_use so far
+                 and the number of connections opened and reused since the start
+        """
+        self.__lock.acquire()
+        try:
+            return {
+                'idle': sum(len(idle) for idle in self.__idle.values()),
+                'in_use': self.__in_use,
+                'peak_in_use': self.__peak_in_use,
+                'opened': self.__opened,
+                'reused': self.__reused,
+            }
+        finally:
+            self.__lock.release()
+
+    def __count_in_use(self, change):
+        # called with the lock held
+        self.__in_use += change
+        self.__peak_in_use = max(self.__peak_in_use, self.__in_use)
+
+    def clear(self):
+        """
+        Close all idle connections
+        """
+        self.__lock.acquire()
+        try:
+            idle, self.__idle = self.__idle, {}
+        finally:
+            self.__lock.release()
+        for connections in idle.values():
+            for connection, last_used in connections:
+                self._close(connection)
 
+    @classmethod
+    def _is_stale(cls, connection):
+        """
+        An idle socket that turns readable was either closed by the server
+        or has unexpected data pending, neither can carry a new request.
+        """
+        sock = getattr(connection, 'sock', None)
+        if sock is None:
+            return False
+        try:
+            readable = select.select([sock], [], [], 0)[0]
+        except (select.error, socket.error, ValueError):
+            return True
+        return bool(readable)
+
+    @classmethod
+    def _close(cls, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
 
 
 class ServerRequestError(Exception):
@@ -144,24 +453,501 @@ class AuthenticationError(Exception):
 
 class Response(object):
 
-    def __init__(self, response):
+    # size of the chunks read from the socket
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, response, max_raw=0):
       self.status = response.status
       self.headers = response.getheaders()
-      self.body = Response._get_body(response)
       self.__msg = response.msg
+      # seconds spent reading and decoding the body and its decompressed
+      # size, None when not measured
+      self.read_time = None
+      self.decode_time = None
+      self.size = None
+      # the decompressed body as it was received, only kept when asked for
+      # and at most max_raw bytes long
+      self.raw_body = None
+      self.__max_raw = max_raw if max_raw and self._announced_size(response) <= max_raw else 0
+      self.body = self._load_body(response)
 
     def get_header(self, header, default=None):
         return self.__msg.getheader(header, default)
 
+    def _load_body(self, response):
+        start = time.time()
+        response_body = ''.join(self._read_chunks(response))
+        read = time.time()
+        self.size = len(response_body)
+        if self.__max_raw and self.size <= self.__max_raw:
+            self.raw_body = response_body
+        response_body = self._decode(response_body)
+        self.read_time = read - start
+        self.decode_time = time.time() - read
+        return response_body
+
+    @classmethod
+    def _announced_size(cls, response):
+        # the sent body is at most as big as the decompressed one, the size
+        # of a chunked body is only known once it was read
+        if 'chunked' in (response.getheader('transfer-encoding') or '').lower():
+            return sys.maxint
+        try:
+            return int(response.getheader('content-length') or 0)
+        except ValueError:
+            return sys.maxint
+
     @classmethod
     def _get_body(cls, response):
-        response_body = response.read()
+        return cls._decode(''.join(cls._read_chunks(response)))
+
+    @classmethod
+    def _decode(cls, response_body):
         try:
             response_body = json.loads(response_body, encoding='utf-8')
         except ValueError:
             pass
         return response_body
 
+    @classmethod
+    def _read_chunks(cls, response):
+        """
+        Read the response body chunk by chunk, decoding gzip and deflate
+        content encodings on the fly
+        @type response: HTTPResponse
+        @param response: http response
+        @rtype: generator of strings
+        @return: decoded chunks of the body
+        """
+        encoding = (response.getheader('content-encoding') or '').strip().lower()
+        if encoding in ('gzip', 'x-gzip'):
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif encoding == 'deflate':
+            decompressor = zlib.decompressobj()
+        else:
+            decompressor = None
+
+        first = True
+        while True:
+            chunk = response.read(cls.CHUNK_SIZE)
+            if not chunk:
+                break
+            if decompressor is None:
+                yield chunk
+                continue
+            try:
+                decoded = decompressor.decompress(chunk)
+            except zlib.error:
+                if encoding != 'deflate' or not first:
+                    raise
+                # some servers send raw deflate data without the zlib header
+                decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+                decoded = decompressor.decompress(chunk)
+            first = False
+            yield decoded
+
+        if decompressor is not None:
+            yield decompressor.flush()
+
+
+
+class StreamingResponse(Response):
+    """
+    Response whose body is a generator of the entries of the "results" array
+    (or of the top level array), decoded while the socket is still being read.
+    A "results" object, like the one of fact_values keyed by host name, gives
+    its members as (key, value) pairs. The remaining top level keys are
+    collected in meta as they are parsed.
+    Error responses and non json bodies are read and decoded as usual.
+
+    @ivar meta: top level keys of the response other than the results
+    """
+
+    __whitespace = re.compile(r'[ \t\n\r]*')
+    __decoder = json.JSONDecoder()
+
+    def __init__(self, response, on_complete=None):
+        self.meta = {}
+        self.__on_complete = on_complete
+        super(StreamingResponse, self).__init__(response)
+
+    def _load_body(self, response):
+        content_type = response.getheader('content-type') or ''
+        if response.status >= 300 or 'json' not in content_type:
+            body = Response._load_body(self, response)
+            self.__complete(True)
+            return body
+        return self.__iter_results(self._read_chunks(response))
+
+    def __complete(self, finished):
+        if self.__on_complete is not None:
+            self.__on_complete(finished)
+            self.__on_complete = None
+
+    def __iter_results(self, chunks):
+        finished = False
+        try:
+            for entry in self.__parse(chunks):
+                yield entry
+            finished = True
+        finally:
+            # a partially read response leaves the connection unusable
+            self.__complete(finished)
+
+    def __parse(self, chunks):
+        state = {'buf': '', 'pos': 0}
+
+        def more():
+            for chunk in chunks:
+                if chunk:
+                    buf = state['buf'][state['pos']:] + chunk
+                    state['buf'], state['pos'] = buf, 0
+                    return True
+            return False
+
+        def skip():
+            while True:
+                state['pos'] = self.__whitespace.match(state['buf'], state['pos']).end()
+                if state['pos'] < len(state['buf']):
+                    return state['buf'][state['pos']]
+                if not more():
+                    raise ValueError('unexpected end of json data')
+
+        def expect(chars):
+            char = skip()
+            if char not in chars:
+                raise ValueError('unexpected %r in json data' % char)
+            state['pos'] += 1
+            return char
+
+        def value():
+            # a value is only complete once something follows it, a number
+            # at the end of the buffer may still continue in the next chunk
+            while True:
+                try:
+                    skip()
+                    obj, end = self.__decoder.raw_decode(state['buf'], state['pos'])
+                    if end < len(state['buf']):
+                        state['pos'] = end
+                        return obj
+                except ValueError:
+                    pass
+                if not more():
+                    obj, end = self.__decoder.raw_decode(state['buf'], state['pos'])
+                    state['pos'] = end
+                    return obj
+
+        def array():
+            if skip() == ']':
+                state['pos'] += 1
+                return
+            while True:
+                yield value()
+                if expect(',]') == ']':
+                    return
+
+        def members():
+            if skip() == '}':
+                state['pos'] += 1
+                return
+            while True:
+                key = value()
+                expect(':')
+                yield key, value()
+                if expect(',}') == '}':
+                    return
+
+        more()
+        if expect('{[') == '[':
+            for entry in array():
+                yield entry
+            return
+
+        if skip() == '}':
+            return
+        while True:
+            key = value()
+            expect(':')
+            if key == 'results' and skip() in '[{':
+                container = array if expect('[{') == '[' else members
+                for entry in container():
+                    yield entry
+            else:
+                self.meta[key] = value()
+            if expect(',}') == '}':
+                return
+
+
+class MultipartBody(object):
+    """
+    File like multipart/form-data body read by httplib block after block.
+    Files are sent in chunks straight from their current position instead of
+    being read into memory, the length is known up front so the request
+    still carries a content-length.
+
+    @ivar boundary: random boundary of the parts
+    """
+
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, fields, boundary=None):
+        """
+        @type fields: [(string, any)]
+        @param fields: field names and values, values with a read method are sent as files
+        """
+        self.boundary = boundary or '----------' + os.urandom(16).encode('hex')
+        self.__parts = []
+        for name, value in fields:
+            if hasattr(value, 'read'):
+                filename = os.path.basename(getattr(value, 'name', None) or name or 'file')
+                self.__add(self.__header(name, filename, ServerConnection._get_content_type(filename)))
+                self.__parts.append((value, self.__tell(value), self.__size(value)))
+                self.__add('\r\n')
+            else:
+                self.__add(self.__header(name) + self.__text(value) + '\r\n')
+        self.__add('--%s--\r\n' % self.boundary)
+        self.__length = sum(part[2] if isinstance(part, tuple) else len(part) for part in self.__parts)
+        self.seek(0)
+
+    @property
+    def content_type(self):
+        return 'multipart/form-data; boundary=%s' % self.boundary
+
+    def __len__(self):
+        return self.__length
+
+    def seek(self, offset, whence=0):
+        # rewinding is all a retried request needs
+        if offset != 0 or whence != 0:
+            raise IOError('multipart bodies can only be rewound')
+        self.__index = 0
+        self.__position = 0
+        for part in self.__parts:
+            if isinstance(part, tuple):
+                part[0].seek(part[1])
+
+    def tell(self):
+        return sum(self.__part_length(part) for part in self.__parts[:self.__index]) + self.__position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.__length
+        chunks = []
+        while size > 0 and self.__index < len(self.__parts):
+            part = self.__parts[self.__index]
+            remaining = self.__part_length(part) - self.__position
+            if isinstance(part, tuple):
+                chunk = part[0].read(min(size, remaining, self.CHUNK_SIZE))
+                if not chunk and remaining:
+                    raise IOError('file %s got shorter while being uploaded' % getattr(part[0], 'name', ''))
+            else:
+                chunk = part[self.__position:self.__position + size]
+            chunks.append(chunk)
+            size -= len(chunk)
+            self.__position += len(chunk)
+            if self.__position >= self.__part_length(part):
+                self.__index += 1
+                self.__position = 0
+        return ''.join(chunks)
+
+    def __add(self, text):
+        # consecutive text is kept in one part
+        if self.__parts and isinstance(self.__parts[-1], str):
+            self.__parts[-1] += text
+        else:
+            self.__parts.append(text)
+
+    def __header(self, name, filename=None, content_type=None):
+        disposition = 'form-data; name="%s"' % self.__quote(name)
+        if filename is None:
+            return '--%s\r\nContent-Disposition: %s\r\n\r\n' % (self.boundary, disposition)
+        return '--%s\r\nContent-Disposition: %s; filename="%s"\r\nContent-Type: %s\r\n\r\n' % (
+            self.boundary, disposition, self.__quote(filename), content_type)
+
+    @classmethod
+    def __quote(cls, name):
+        return cls.__text(name).replace('"', '%22').replace('\r', '%0D').replace('\n', '%0A')
+
+    @classmethod
+    def __text(cls, value):
+        if value is None:
+            return ''
+        if isinstance(value, bool):
+            return 'true' if value else 'false'
+        if isinstance(value, unicode):
+            return value.encode('utf-8')
+        return str(value)
+
+    @classmethod
+    def __part_length(cls, part):
+        return part[2] if isinstance(part, tuple) else len(part)
+
+    @classmethod
+    def __tell(cls, stream):
+        try:
+            return stream.tell()
+        except (AttributeError, IOError):
+            return 0
+
+    @classmethod
+    def __size(cls, stream):
+        """
+        Bytes left from the current position of the stream to its end
+        @raise IOError: if the size cannot be known before sending, e.g. for a pipe
+        """
+        start = cls.__tell(stream)
+        try:
+            status = os.fstat(stream.fileno())
+        except (AttributeError, IOError, OSError):
+            status = None
+        # pipes and sockets report a size of 0 whatever they will give
+        if status is not None and stat.S_ISREG(status.st_mode):
+            return status.st_size - start
+        try:
+            stream.seek(0, 2)
+            end = stream.tell()
+            stream.seek(start)
+        except (AttributeError, IOError):
+            raise IOError(_('cannot upload %s, its size is unknown as it is not seekable')
+                          % (getattr(stream, 'name', None) or 'the file'))
+        return end - start
+
+
+class RequestTimings(object):
+    """
+    Where the time of one request went, handed to the hooks of the
+    ServerConnection. The phases are in seconds and do not overlap, a phase
+    that happened more than once (e.g. after a retry) is summed up.
+
+    @ivar method: http method
+    @ivar url: requested url including the query
+    @ivar status: http status of the response, None until it arrived
+    @ivar reused: whether the request went over a pooled keep-alive connection
+    @ivar retries: number of times the request was sent again, after a dropped
+                   keep-alive connection or renewed credentials
+    @ivar error: exception the request failed with, None on success
+    @ivar request_bytes: size of the request body
+    @ivar response_bytes: size of the decompressed response body, None for
+                          streamed responses
+    @ivar connect: opening a new connection (including the tls handshake when
+                   it cannot be measured on its own)
+    @ivar tls_handshake: the tls handshake of a new connection
+    @ivar auth: generating the authentication headers
+    @ivar send: sending the request line, the headers and the body
+    @ivar first_byte: waiting for the status line and headers of the response
+    @ivar read: reading the response body, None for streamed responses
+    @ivar decode: decoding the json of the response body, None for streamed responses
+    @ivar total: whole request as seen by the caller
+    """
+
+    PHASES = ('connect', 'tls_handshake', 'auth', 'send', 'first_byte', 'read', 'decode')
+
+    def __init__(self, method, url):
+        self.method = method
+        self.url = url
+        self.status = None
+        self.reused = False
+        self.retries = 0
+        self.error = None
+        self.request_bytes = 0
+        self.response_bytes = None
+        self.connect = 0.0
+        self.tls_handshake = 0.0
+        self.auth = 0.0
+        self.send = 0.0
+        self.first_byte = 0.0
+        self.read = None
+        self.decode = None
+        self.total = None
+
+    def to_dict(self):
+        data = dict((phase, getattr(self, phase)) for phase in self.PHASES)
+        data.update({
+            'method': self.method,
+            'url': self.url,
+            'status': self.status,
+            'reused': self.reused,
+            'retries': self.retries,
+            'request_bytes': self.request_bytes,
+            'response_bytes': self.response_bytes,
+            'error': str(self.error) if self.error is not None else None,
+            'total': self.total,
+        })
+        return data
+
+
+class RequestHook(object):
+    """
+    Base of the objects notified about the requests of a ServerConnection,
+    register them with ServerConnection.add_hook. Hooks are called from the
+    thread sending the request.
+    """
+
+    def before_request(self, timings):
+        """
+        @type timings: RequestTimings
+        @param timings: the method and url are set, the phases are still empty
+        """
+        pass
+
+    def after_request(self, timings):
+        """
+        Called once the response headers and (unless streamed) body were read,
+        or the request failed
+        @type timings: RequestTimings
+        """
+        pass
+
+
+class TimingCollector(RequestHook):
+    """
+    Keeps the timings of all requests and writes a summary of them,
+    bin/foreman prints it to stderr with --debug
+
+    @ivar requests: list of RequestTimings in the order the requests finished
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.__lock = threading.Lock()
+
+    def after_request(self, timings):
+        self.__lock.acquire()
+        try:
+            self.requests.append(timings)
+        finally:
+            self.__lock.release()
+
+    def report(self, stream=None, limit=10):
+        """
+        Write the time spent per phase and the slowest requests
+        @type stream: file
+        @param stream: where to write the report, stderr by default
+        @type limit: int
+        @param limit: number of the slowest requests listed
+        """
+        stream = stream or sys.stderr
+        requests = list(self.requests)
+        if not requests:
+            return
+
+        stream.write('%-14s %12s %12s %12s\n' % ('phase', 'total ms', 'mean ms', 'max ms'))
+        for phase in RequestTimings.PHASES + ('total',):
+            values = [getattr(timings, phase) for timings in requests]
+            values = [value for value in values if value is not None]
+            if values:
+                stream.write('%-14s %12.1f %12.1f %12.1f\n' % (phase, sum(values) * 1000,
+                             sum(values) * 1000 / len(values), max(values) * 1000))
+
+        reused = len([timings for timings in requests if timings.reused])
+        failed = len([timings for timings in requests if timings.error is not None])
+        stream.write('%d requests, %d over reused connections, %d failed\n' % (len(requests), reused, failed))
+
+        slowest = sorted(requests, key=lambda timings: timings.total or 0.0, reverse=True)[:limit]
+        for timings in slowest:
+            stream.write('%10.1f ms  %s %s %s\n' % ((timings.total or 0.0) * 1000, timings.status or '---',
+                                                   timings.method, timings.url))
+
 
 class ServerConnection(object):
     """
@@ -172,11 +958,22 @@ class ServerConnection(object):
     @ivar protocol: protocol the katello server is using (http, https)
     @ivar path_prefix: mount point of the katello api (/katello/api)
     @ivar headers: dictionary of http headers to send in requests
+    @ivar pool: pool of keep-alive connections reused between requests
+    @ivar transport: optional callable opening the connections instead of the
+                     authentication strategy, it gets the strategy's opener as
+                     its only argument (see foreman.cassette)
+    @ivar hooks: RequestHook objects notified about every request
+    @ivar cache: optional store of GET responses that are revalidated with
+                 their ETag or Last-Modified instead of being fetched again
+                 (see foreman.http_cache)
     """
     auth_method = NoAuthentication()
 
+    # requests that can be sent again when the server may already have handled them
+    IDEMPOTENT_METHODS = ('GET', 'HEAD', 'PUT')
+
     #---------------------------------------------------------------------------
-    def __init__(self, host, port=443, protocol='https', path_prefix='', accept_lang=None):
+    def __init__(self, host, port=443, protocol='https', path_prefix='', accept_lang=None, pool=None):
         assert protocol in ('http', 'https')
 
         self.host = host
@@ -184,8 +981,13 @@ class ServerConnection(object):
         self.protocol = protocol
         self.path_prefix = "/"+path_prefix
         self.headers = {}
+        self.pool = pool or ConnectionPool()
+        self.transport = None
+        self.hooks = []
+        self.cache = None
 
         default_headers = {'Accept': 'application/json',
+                           'Accept-Encoding': 'gzip, deflate',
                            'content-type': 'application/json',
                            'User-Agent': 'katello-cli/0.1'}
         self.headers.update(default_headers)
@@ -197,14 +999,56 @@ class ServerConnection(object):
     def set_auth_method(self, auth_method):
         self.auth_method = auth_method
 
-    # protected server connection methods -------------------------------------
+    def close(self):
+        """
+        Close all idle connections kept in the pool
+        """
+        self.pool.clear()
+
+    def add_hook(self, hook):
+        """
+        @type hook: RequestHook
+        @param hook: object notified before and after every request
+        """
+        self.hooks.append(hook)
+
+    def remove_hook(self, hook):
+        self.hooks.remove(hook)
 
-    def _connect(self):
-        # make an appropriate connection to the server and cache it
-        return self.auth_method.connect(self.host, self.port, self.protocol)
+    # protected server connection methods -------------------------------------
 
-    def _set_auth_headers(self):
-        self.auth_method.set_headers(self.headers)
+    def _pool_key(self):
+        return (self.host, self.port, self.protocol, self.auth_method, self.transport)
+
+    def _connect(self, timings=None, reuse=True):
+        # get a pooled connection to the server or make an appropriate new one
+        if timings is None:
+            return self.pool.acquire(self._pool_key(), self._open, reuse)
+        return self.pool.acquire(self._pool_key(), lambda: self._open_timed(timings), reuse)
+
+    def _open(self):
+        opener = lambda: self.auth_method.connect(self.host, self.port, self.protocol)
+        if self.transport is not None:
+            return self.transport(opener)
+        return opener()
+
+    def _open_timed(self, timings):
+        # httplib connects lazily on the first request, connect right away
+        # so that the connect is not counted as sending the request
+        start = time.time()
+        connection = self._open()
+        if getattr(connection, 'sock', False) is None:
+            connection.connect()
+        tls_time = getattr(connection, 'tls_time', None) or 0.0
+        timings.connect += time.time() - start - tls_time
+        timings.tls_handshake += tls_time
+        return connection
+
+    def _set_auth_headers(self, headers, timings=None):
+        start = time.time()
+        self.auth_method.set_headers(headers)
+        if timings is not None:
+            timings.auth += time.time() - start
 
 
     # protected request utilities ---------------------------------------------
@@ -218,9 +1062,8 @@ class ServerConnection(object):
 
         # make sure the path is ascii and uses appropriate characters
         path = urllib.quote(path.encode('utf-8'))
-        for key, value in queries.items():
-            if isinstance(value, basestring):
-                queries[key] = value.encode('utf-8')
+        queries = [(key, value.encode('utf-8') if isinstance(value, unicode) else value)
+                   for key, value in queries.items()]
 
         queries = urllib.urlencode(queries)
         if queries:
@@ -228,33 +1071,155 @@ class ServerConnection(object):
         return path
 
 
-    def _request(self, method, path, queries=None, body=None, multipart=False, custom_headers=None):
+    def _request(self, method, path, queries=None, body=None, multipart=False, custom_headers=None, stream=False):
         queries = queries or {}
         custom_headers = custom_headers or {}
 
         # make a request to the server and return the response
-        connection = self._connect()
         url = self._build_url(path, queries)
 
-        content_type, body = self._prepare_body(body, multipart)
+        timings = RequestTimings(method, url)
+        for hook in self.hooks:
+            hook.before_request(timings)
+        started = time.time()
+
+        try:
+            content_type, body = self._prepare_body(body, multipart)
+
+            # headers are built per request so that the connection can be shared between threads
+            headers = dict(self.headers)
+            headers['content-type']   = content_type
+            timings.request_bytes = self._body_length(body)
+            headers['content-length'] = str(timings.request_bytes)
+            self._set_auth_headers(headers, timings)
+
+            cache_key = entry = None
+            if self.cache is not None and method == 'GET' and not stream:
+                cache_key = self.cache.key(url, dict(headers.items() + custom_headers.items()))
+                entry = self.cache.lookup(cache_key)
+                if entry is not None:
+                    headers.update(entry.validators())
+            # only bodies the cache would store are kept raw next to the parsed ones
+            max_raw = self.cache.max_entry_size if cache_key is not None else 0
+
+            response = self._send(method, url, body, dict(headers.items() + custom_headers.items()), stream, timings,
+                                  max_raw)
+
+            if self.auth_method.process_response(response):
+                # the authentication strategy renewed its credentials, repeat the request once
+                timings.retries += 1
+                self._set_auth_headers(headers, timings)
+                if hasattr(body, 'seek'):
+                    body.seek(0)
+                response = self._send(method, url, body, dict(headers.items() + custom_headers.items()), stream, timings,
+                                      max_raw)
+
+            if cache_key is not None:
+                response = self._cached_response(cache_key, entry, response)
+        except Exception, e:
+            timings.error = e
+            timings.total = time.time() - started
+            for hook in self.hooks:
+                hook.after_request(timings)
+            raise
+
+        timings.status = response.status
+        timings.read = response.read_time
+        timings.decode = response.decode_time
+        timings.response_bytes = response.size
+        timings.total = time.time() - started
+        for hook in self.hooks:
+            hook.after_request(timings)
+        return response
+
+    @classmethod
+    def _body_length(cls, body):
+        if body is None:
+            return 0
+        if hasattr(body, '__len__'):
+            return len(body)
+        # plain files are sent from their current position
+        return os.fstat(body.fileno()).st_size - body.tell()
+
+    def _cached_response(self, key, entry, response):
+        if response.status == 304 and entry is not None:
+            # not modified, answer with the stored body
+            self.cache.refresh(key)
+            return self._process_response(entry.response())
+        self.cache.store(key, response)
+        # the raw body was only kept for the cache, do not hold it twice
+        response.raw_body = None
+        return response
+
+    def _send(self, method, url, body, headers, stream=False, timings=None, max_raw=0):
+        timings = timings or RequestTimings(method, url)
+        key = self._pool_key()
+        connection, reused = self._connect(timings)
+        timings.reused = reused
+        try:
+            try:
+                raw_response = self._exchange(connection, method, url, body, headers, timings)
+            except (httplib.BadStatusLine, httplib.CannotSendRequest, socket.error), e:
+                if not reused or not self._can_resend(method, e):
+                    raise
+                # the server dropped the kept-alive connection, retry once on a fresh one
+                self.pool.discard(connection)
+                connection = None
+                connection, reused = self._connect(timings, reuse=False)
+                timings.reused = False
+                timings.retries += 1
+                if hasattr(body, 'seek'):
+                    body.seek(0)
+                raw_response = self._exchange(connection, method, url, body, headers, timings)
+            if stream:
+                # the connection can only be handed back once the body was consumed
+                return StreamingResponse(raw_response,
+                    lambda finished: self._finish(key, connection, raw_response, finished))
+            response = self._process_response(raw_response, max_raw)
+        except:
+            if connection is not None:
+                self.pool.discard(connection)
+            raise
+
+        self._finish(key, connection, raw_response, True)
+        return response
 
-        self.headers['content-type']   = content_type
-        self.headers['content-length'] = str(len(body) if body else 0)
-        self._set_auth_headers()
+    def _can_resend(self, method, error):
+        # a request that failed before it was sent in full cannot have been handled
+        return method in self.IDEMPOTENT_METHODS or not getattr(error, 'request_sent', False)
 
-        connection.request(method, url, body=body, headers=dict(self.headers.items() + custom_headers.items()))
-        return self._process_response(connection.getresponse())
+    def _exchange(self, connection, method, url, body, headers, timings):
+        start = time.time()
+        connection.request(method, url, body=body, headers=headers)
+        sent = time.time()
+        try:
+            raw_response = connection.getresponse()
+        except Exception, e:
+            e.request_sent = True
+            raise
+        timings.send += sent - start
+        timings.first_byte += time.time() - sent
+        return raw_response
+
+    def _finish(self, key, connection, raw_response, finished):
+        if finished and not raw_response.will_close:
+            self.pool.release(key, connection)
+        else:
+            self.pool.discard(connection)
 
 
-    def _process_response(self, response):
+    def _process_response(self, response, max_raw=0):
         """
         Try to parse the response
         @type response: HTTPResponse
         @param response: http response
+        @type max_raw: int
+        @param max_raw: keep the body as received next to the parsed one if it
+                        has at most this many bytes
         @rtype: (int, string)
         @return: tuple of the response status and response body
         """
-        response = Response(response)
+        response = Response(response, max_raw)
 
         # if response.status >= 300:
         #     raise ServerRequestError(response)
@@ -268,7 +1233,7 @@ class ServerConnection(object):
         @param body: data to encode
         @type multipart: boolean
         @param multipart: set True for multipart requests
-        @rtype: (string, string)
+        @rtype: (string, string or file like)
         @return: tuple of the content type and the encoded body
         """
         content_type = 'application/json'
@@ -320,38 +1285,14 @@ class ServerConnection(object):
 
     def _encode_multipart_formdata(self, data):
         """
-        Encode data for httplib request
+        Encode data for httplib request, files are streamed rather than read into memory
         @type data: any
         @param data: data to encode for the request
-        @rtype: (string, string)
-        @return: tuple of the content type and encoded data
+        @rtype: (string, MultipartBody)
+        @return: tuple of the content type and the file like body
         """
-        fields = self._flatten_to_multipart(data)
-
-        boundary = '----------BOUNDARY_$'
-        lines = []
-
-        for (key, value) in fields:
-            if isinstance(value, (file)):
-                filename = value.name
-                content  = value.read()
-
-                lines.append('--' + boundary)
-                lines.append('Content-Disposition: form-data; name="%s"; filename="%s"' % (str(key), str(filename)))
-                lines.append('Content-Type: %s' % self._get_content_type(filename))
-                lines.append('')
-                lines.append(content)
-            else:
-                lines.append('--' + boundary)
-                lines.append('Content-Disposition: form-data; name="%s"' % str(key))
-                lines.append('')
-                lines.append(value)
-        lines.append('--' + boundary + '--')
-        lines.append('')
-
-        body = '\r\n'.join(lines)
-        content_type = 'multipart/form-data; boundary=%s' % boundary
-        return content_type, body
+        body = MultipartBody(self._flatten_to_multipart(data))
+        return body.content_type, body
 
     def _encode_json(self, data):
         content_type = 'application/json'
@@ -383,7 +1324,7 @@ class ServerConnection(object):
         """
         return self._request('DELETE', path, body=body, custom_headers=None)
 
-    def GET(self, path, queries=None, custom_headers=None):
+    def GET(self, path, queries=None, custom_headers=None, stream=False):
         """
         Send a GET request to the katello server.
         @type path: str
@@ -393,11 +1334,14 @@ class ServerConnection(object):
                         query parameters in the request
         @type custom_headers: dict or iterable of tuple pairs
         @param custom_headers: custom headers
+        @type stream: boolean
+        @param stream: set True to get the results as a generator while the
+                       response is still being read (see StreamingResponse)
         @rtype: (int, dict or None or str)
         @return: tuple of the http response status and the response body
         @raise ServerRequestError: if the request fails
         """
-        return self._request('GET', path, queries, custom_headers=custom_headers)
+        return self._request('GET', path, queries, custom_headers=custom_headers, stream=stream)
 
     def HEAD(self, path, custom_headers=None):
         """
@@ -445,30 +1389,501 @@ class ServerConnection(object):
         return self._request('PUT', path, body=body, multipart=multipart, custom_headers=custom_headers)
 
 
+class RequestFuture(object):
+    """
+    Result of a request sent by AsyncServerConnection
+    """
+
+    def __init__(self):
+        self.__done = threading.Event()
+        self.__lock = threading.Lock()
+        self.__callbacks = []
+        self.__response = None
+        self.__error = None
+
+    def done(self):
+        return self.__done.is_set()
+
+    def result(self, timeout=None):
+        """
+        Wait for the request to finish
+        @type timeout: float
+        @param timeout: seconds to wait, None waits forever
+        @rtype: Response
+        @return: the response of the server
+        @raise RuntimeError: if the request did not finish in time
+        """
+        if not self.__done.wait(timeout):
+            raise RuntimeError(_('request did not finish in %s seconds') % timeout)
+        if self.__error is not None:
+            raise self.__error[0], self.__error[1], self.__error[2]
+        return self.__response
+
+    def exception(self, timeout=None):
+        self.__done.wait(timeout)
+        return self.__error and self.__error[1]
+
+    def add_done_callback(self, callback):
+        """
+        Call callback(future) once the request is finished, right away if it already is
+        """
+        self.__lock.acquire()
+        try:
+            if not self.__done.is_set():
+                self.__callbacks.append(callback)
+                return
+        finally:
+            self.__lock.release()
+        callback(self)
+
+    def _set_result(self, response=None, error=None):
+        self.__lock.acquire()
+        try:
+            self.__response = response
+            self.__error = error
+            self.__done.set()
+            callbacks, self.__callbacks = self.__callbacks, []
+        finally:
+            self.__lock.release()
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                logging.getLogger(__name__).exception('request callback failed')
+
+
+class AsyncServerConnection(ServerConnection):
+    """
+    Server connection that does not block the caller. Requests are queued and
+    sent by a bounded set of worker threads sharing one connection pool, the
+    request methods return a RequestFuture right away. Resource classes work
+    on it unchanged, their methods then return futures instead of responses.
+
+        api = Bindings(AsyncServerConnection('foreman.example.com', workers=64))
+        futures = [api.host.status({'id': host_id}) for host_id in host_ids]
+        statuses = [future.result().body for future in futures]
+
+    @ivar workers: maximum number of requests in flight
+    """
+
+    def __init__(self, host, port=443, protocol='https', path_prefix='', accept_lang=None, pool=None, workers=16):
+        super(AsyncServerConnection, self).__init__(host, port, protocol, path_prefix, accept_lang,
+                                                    pool or ConnectionPool(max_idle=workers))
+        self.workers = workers
+        self.__queue = Queue.Queue()
+        self.__threads = []
+        self.__lock = threading.Lock()
+
+    def _request(self, *args, **kwargs):
+        future = RequestFuture()
+        self.__start_workers()
+        self.__queue.put((future, args, kwargs))
+        return future
+
+    def shutdown(self, wait=True):
+        """
+        Stop the workers once the queued requests are sent and close the pool
+        @type wait: boolean
+        @param wait: block until the queued requests are finished
+        """
+        self.__lock.acquire()
+        try:
+            threads, self.__threads = self.__threads, []
+            for thread in threads:
+                self.__queue.put(None)
+        finally:
+            self.__lock.release()
+        if wait:
+            for thread in threads:
+                thread.join()
+        self.close()
+
+    def __start_workers(self):
+        self.__lock.acquire()
+        try:
+            while len(self.__threads) < self.workers:
+                thread = threading.Thread(target=self.__work)
+                thread.daemon = True
+                thread.start()
+                self.__threads.append(thread)
+        finally:
+            self.__lock.release()
+
+    def __work(self):
+        while True:
+            item = self.__queue.get()
+            if item is None:
+                return
+            future, args, kwargs = item
+            try:
+                response = ServerConnection._request(self, *args, **kwargs)
+            except Exception:
+                future._set_result(error=sys.exc_info())
+            else:
+                future._set_result(response)
 
 
 class ApipieApi(object):
 
+    # page size used by paginate when the caller does not choose one
+    DEFAULT_PER_PAGE = 100
+
     def __init__(self, connection):
         self._connection = connection
 
+    def paginate(self, method, params=None, per_page=None, prefetch=True):
+        """
+        Iterate over all records of an index method, requesting page after page.
+        The next page is fetched in the background while the current one is
+        being consumed.
+        @type method: callable
+        @param method: index method of a resource, e.g. api.host.index
+        @type params: dict
+        @param params: parameters passed to every call, page and per_page are set here
+        @type per_page: int
+        @param per_page: number of records requested per page, bigger pages mean
+                         less round trips but bigger payloads
+        @type prefetch: boolean
+        @param prefetch: set False to request the next page only when it is needed
+        @rtype: generator
+        @return: records of all pages
+        @raise ServerRequestError: if any of the pages fails
+        """
+        params = params or {}
+        per_page = per_page or self.DEFAULT_PER_PAGE
+        return self.__paginate(method, params, per_page, prefetch)
+
+    def paginate_concurrently(self, method, params=None, per_page=None, concurrency=4):
+        """
+        Iterate over all records of an index method, fetching the pages in
+        parallel. The first page tells the total number of records, the rest
+        of the pages is then requested by up to `concurrency` threads at once.
+        Records are yielded in page order; records that moved to the next
+        page while paging (and so would come twice) are skipped.
+        Falls back to paginate when the server does not report the total.
+        @type method: callable
+        @param method: index method of a resource, e.g. api.host.index
+        @type params: dict
+        @param params: parameters passed to every call, page and per_page are set here
+        @type per_page: int
+        @param per_page: number of records requested per page
+        @type concurrency: int
+        @param concurrency: maximum number of pages requested at the same time
+        @rtype: generator
+        @return: records of all pages
+        @raise ServerRequestError: if any of the pages fails
+        """
+        params = params or {}
+        per_page = per_page or self.DEFAULT_PER_PAGE
+
+        first = self._fetch_page(method, params, 1, per_page)
+        body = first.body
+        total = self.page_total(body)
+        if total is None:
+            for record in self.__paginate(method, params, per_page, True, first):
+                yield record
+            return
+
+        seen = set()
+
+        def unique(records):
+            for record in records:
+                record_id = self.record_id(record)
+                if record_id is not None:
+                    if record_id in seen:
+                        continue
+                    seen.add(record_id)
+                yield record
+
+        for record in unique(self.page_records(body)):
+            yield record
+
+        self._connection.pool.reserve(concurrency)
+        # the server may serve less than asked for
+        served = self.page_size(body, per_page)
+        last_page = (total + served - 1) // served
+        pages = iter(range(2, last_page + 1))
+        pending = collections.deque()
+
+        def schedule():
+            for page in pages:
+                pending.append(_in_background(self._fetch_page, method, params, page, per_page))
+                return
+
+        for i in range(max(concurrency, 1)):
+            schedule()
+        while pending:
+            body = pending.popleft()().body
+            schedule()
+            for record in unique(self.page_records(body)):
+                yield record
+
+    def pages(self, method, params=None, per_page=None, prefetch=True):
+        """
+        Iterate over the pages of an index method. Unlike paginate it does not
+        count the records, so it also suits responses whose results are not a
+        list of records, e.g. fact_values grouping the values by host name.
+        @type method: callable
+        @param method: index method of a resource, e.g. api.fact_value.index
+        @type params: dict
+        @param params: parameters passed to every call, page and per_page are set here
+        @type per_page: int
+        @param per_page: number of records requested per page
+        @type prefetch: boolean
+        @param prefetch: set False to request the next page only when it is needed
+        @rtype: generator
+        @return: decoded bodies of all pages
+        @raise ServerRequestError: if any of the pages fails
+        """
+        params = params or {}
+        per_page = per_page or self.DEFAULT_PER_PAGE
+
+        def fetch(page):
+            return self._fetch_page(method, params, page, per_page)
+
+        page = 1
+        pending = _in_background(fetch, page) if prefetch else (lambda: fetch(1))
+        while pending is not None:
+            body = pending().body
+            records = self.page_records(body)
+            total = self.page_total(body)
+            # the server may serve less than asked for
+            served = self.page_size(body, per_page)
+
+            if not records:
+                pending = None
+            elif total is not None:
+                pending = fetch if page * served < total else None
+            elif isinstance(records, list) and len(records) < served:
+                pending = None
+            else:
+                pending = fetch
+            if pending is not None:
+                page += 1
+                pending = _in_background(fetch, page) if prefetch else (lambda page=page: fetch(page))
+
+            yield body
+
+    def __paginate(self, method, params, per_page, prefetch, first=None):
+        """
+        Records of page after page, starting with the already fetched
+        response of the first page if there is one
+        """
+        def fetch(page):
+            return self._fetch_page(method, params, page, per_page)
+
+        page = 1
+        if first is not None:
+            pending = lambda: first
+        else:
+            pending = _in_background(fetch, page) if prefetch else (lambda: fetch(1))
+        seen = 0
+        while pending is not None:
+            body = pending().body
+            records = self.page_records(body)
+            seen += len(records)
+
+            total = self.page_total(body)
+            if total is not None:
+                finished = seen >= total
+            else:
+                # the server may serve less than asked for
+                finished = len(records) < self.page_size(body, per_page)
+            if not records or finished:
+                pending = None
+            elif prefetch:
+                page += 1
+                pending = _in_background(fetch, page)
+            else:
+                page += 1
+                pending = lambda page=page: fetch(page)
+
+            for record in records:
+                yield record
+
+    def _fetch_page(self, method, params, page, per_page):
+        page_params = dict(params)
+        page_params['page'] = page
+        page_params['per_page'] = per_page
+        response = method(page_params)
+        if response.status >= 300:
+            raise ServerRequestError(response)
+        return response
+
+    @classmethod
+    def record_id(cls, record):
+        """
+        Id of a record of an index response, records can be wrapped
+        in their resource name (e.g. {"host": {"id": 1, ...}})
+        @type record: dict
+        @param record: one record of an index response
+        @rtype: object or None
+        """
+        if not isinstance(record, dict):
+            return None
+        if 'id' in record:
+            return record['id']
+        if len(record) == 1:
+            wrapped = record.values()[0]
+            if isinstance(wrapped, dict):
+                return wrapped.get('id')
+        return None
+
+    @classmethod
+    def page_records(cls, body):
+        """
+        Records of one page of an index response
+        @type body: list or dict
+        @param body: decoded body of the response
+        @rtype: list
+        """
+        if isinstance(body, dict):
+            return body.get('results') or []
+        return body or []
+
+    @classmethod
+    def page_size(cls, body, requested):
+        """
+        Number of records per page the server served, servers cap the page size
+        @type body: list or dict
+        @param body: decoded body of the response
+        @type requested: int
+        @param requested: page size that was asked for, used when the response
+                          does not tell
+        @rtype: int
+        """
+        if isinstance(body, dict) and body.get('per_page'):
+            return int(body['per_page'])
+        return requested
+
+    @classmethod
+    def page_total(cls, body):
+        """
+        Total number of records reported by an index response, if any
+        @type body: list or dict
+        @param body: decoded body of the response
+        @rtype: int or None
+        """
+        if isinstance(body, dict):
+            total = body.get('subtotal', body.get('total'))
+            if total is not None:
+                return int(total)
+        return None
+
     @classmethod
     def params_in_path(cls, url):
         return re.findall(':([^\/]*)', url)
 
     @classmethod
-    def fill_params_in_url(cls, url, params):
-      params = params or {}
-      url = url + "/"
+    def route(cls, url):
+        """
+        Compiled template of a route, compiled on first use and cached
+        @type url: str
+        @param url: route with :param placeholders, e.g. /api/hosts/:host_id/parameters/:id
+        @rtype: RouteTemplate
+        """
+        template = _routes.get(url)
+        if template is None:
+            template = _routes[url] = RouteTemplate(url)
+        return template
 
-      # insert param values
-      url_param_names = ApipieApi.params_in_path(url)
-      for param_name in url_param_names:
-          if not param_name in params:
-              raise Exception("missing param '%s' in parameters" % param_name)
+    @classmethod
+    def routes(cls):
+        """
+        @rtype: list of RouteTemplate
+        @return: templates of all routes used so far
+        """
+        return _routes.values()
 
-          url = url.replace(":%s/" % param_name, "%s/" % str(params.get(param_name)))
-          del params[param_name]
+    @classmethod
+    def expand_route(cls, url, params):
+        """
+        Fill the path params of a route, the caller's params are left untouched
+        @type url: str
+        @param url: route with :param placeholders
+        @type params: dict
+        @param params: path params and the params to send with the request
+        @rtype: (str, dict)
+        @return: tuple of the url and the params that are not part of the path
+        """
+        return cls.route(url).expand(params)
+
+    @classmethod
+    def fill_params_in_url(cls, url, params):
+      """
+      Fill the path params of a route and remove them from params
+      (use expand_route to keep params untouched)
+      """
+      template = cls.route(url)
+      url, rest = template.expand(params)
+      if params:
+          for param_name in template.params:
+              del params[param_name]
       return url
 
 
+_routes = {}
+
+
+class RouteTemplate(object):
+    """
+    Route compiled into a format string and the ordered names of its path params.
+    Like the original fill_params_in_url, expanded urls end with a slash.
+
+    @ivar template: the route as given, e.g. /api/hosts/:id
+    @ivar params: names of the path params in the order they appear
+    """
+
+    __param = re.compile(':([^\/]*)')
+
+    def __init__(self, url):
+        self.template = url
+        url = url + "/"
+        self.params = tuple(self.__param.findall(url))
+        self.__url = url
+        self.__format = self.__param.sub('%s', url.replace('%', '%%'))
+
+    def expand(self, params):
+        """
+        @type params: dict
+        @param params: path params and the params to send with the request
+        @rtype: (str, dict)
+        @return: tuple of the url and a new dict of the params not used in the path
+        """
+        params = params or {}
+        if not self.params:
+            return self.__url, params
+
+        rest = dict(params)
+        try:
+            values = tuple([rest.pop(param_name) for param_name in self.params])
+        except KeyError, e:
+            raise Exception("missing param '%s' in parameters" % e.args[0])
+        return self.__format % values, rest
+
+
+def _in_background(function, *args):
+    """
+    Call the function in a separate thread
+    @rtype: callable
+    @return: function waiting for the call to finish and returning its result
+             or raising its exception
+    """
+    result = {}
+
+    def run():
+        try:
+            result['value'] = function(*args)
+        except Exception:
+            result['error'] = sys.exc_info()
+
+    thread = threading.Thread(target=run)
+    thread.daemon = True
+    thread.start()
+
+    def wait():
+        thread.join()
+        if 'error' in result:
+            raise result['error'][0], result['error'][1], result['error'][2]
+        return result['value']
+    return wait
@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class Audit(ApipieApi):
@@ -23,18 +23,19 @@ class Audit(ApipieApi):
     # @option params [String] page  paginate results 
     # @option params [String] per_page  number of entries per request 
     # @option params [String] search  filter results 
+    # @param [Boolean] stream yield the results while the response is being read
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = Audit.fill_params_in_url("/api/audits", params)
-        return self._connection.GET(url, params)
+    def index(self, params = None, stream = False):
+        url, params = Audit.expand_route("/api/audits", params)
+        return self._connection.GET(url, params, stream=stream)
 
     # @param [Hash] params a hash of params to be passed to the service
     # @option params [String] id
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def show(self, params = {}):
-        url = Audit.fill_params_in_url("/api/audits/:id", params)
+    def show(self, params = None):
+        url, params = Audit.expand_route("/api/audits/:id", params)
         return self._connection.GET(url, params)
@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class AuthSourceLdap(ApipieApi):
@@ -23,8 +23,8 @@ class AuthSourceLdap(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = AuthSourceLdap.fill_params_in_url("/api/auth_source_ldaps", params)
+    def index(self, params = None):
+        url, params = AuthSourceLdap.expand_route("/api/auth_source_ldaps", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -32,8 +32,8 @@ class AuthSourceLdap(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def show(self, params = {}):
-        url = AuthSourceLdap.fill_params_in_url("/api/auth_source_ldaps/:id", params)
+    def show(self, params = None):
+        url, params = AuthSourceLdap.expand_route("/api/auth_source_ldaps/:id", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -54,8 +54,8 @@ class AuthSourceLdap(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def create(self, params = {}):
-        url = AuthSourceLdap.fill_params_in_url("/api/auth_source_ldaps", params)
+    def create(self, params = None):
+        url, params = AuthSourceLdap.expand_route("/api/auth_source_ldaps", params)
         return self._connection.POST(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -77,8 +77,8 @@ class AuthSourceLdap(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def update(self, params = {}):
-        url = AuthSourceLdap.fill_params_in_url("/api/auth_source_ldaps/:id", params)
+    def update(self, params = None):
+        url, params = AuthSourceLdap.expand_route("/api/auth_source_ldaps/:id", params)
         return self._connection.PUT(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -86,6 +86,6 @@ class AuthSourceLdap(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def destroy(self, params = {}):
-        url = AuthSourceLdap.fill_params_in_url("/api/auth_source_ldaps/:id", params)
+    def destroy(self, params = None):
+        url, params = AuthSourceLdap.expand_route("/api/auth_source_ldaps/:id", params)
         return self._connection.DELETE(url, params)
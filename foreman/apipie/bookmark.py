@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class Bookmark(ApipieApi):
@@ -23,8 +23,8 @@ class Bookmark(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = Bookmark.fill_params_in_url("/api/bookmarks", params)
+    def index(self, params = None):
+        url, params = Bookmark.expand_route("/api/bookmarks", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -32,8 +32,8 @@ class Bookmark(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def show(self, params = {}):
-        url = Bookmark.fill_params_in_url("/api/bookmarks/:id", params)
+    def show(self, params = None):
+        url, params = Bookmark.expand_route("/api/bookmarks/:id", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -46,8 +46,8 @@ class Bookmark(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def create(self, params = {}):
-        url = Bookmark.fill_params_in_url("/api/bookmarks", params)
+    def create(self, params = None):
+        url, params = Bookmark.expand_route("/api/bookmarks", params)
         return self._connection.POST(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -61,8 +61,8 @@ class Bookmark(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def update(self, params = {}):
-        url = Bookmark.fill_params_in_url("/api/bookmarks/:id", params)
+    def update(self, params = None):
+        url, params = Bookmark.expand_route("/api/bookmarks/:id", params)
         return self._connection.PUT(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -70,6 +70,6 @@ class Bookmark(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def destroy(self, params = {}):
-        url = Bookmark.fill_params_in_url("/api/bookmarks/:id", params)
+    def destroy(self, params = None):
+        url, params = Bookmark.expand_route("/api/bookmarks/:id", params)
         return self._connection.DELETE(url, params)
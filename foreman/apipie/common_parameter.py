@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class CommonParameter(ApipieApi):
@@ -25,8 +25,8 @@ class CommonParameter(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = CommonParameter.fill_params_in_url("/api/common_parameters", params)
+    def index(self, params = None):
+        url, params = CommonParameter.expand_route("/api/common_parameters", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -34,8 +34,8 @@ class CommonParameter(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def show(self, params = {}):
-        url = CommonParameter.fill_params_in_url("/api/common_parameters/:id", params)
+    def show(self, params = None):
+        url, params = CommonParameter.expand_route("/api/common_parameters/:id", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -46,8 +46,8 @@ class CommonParameter(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def create(self, params = {}):
-        url = CommonParameter.fill_params_in_url("/api/common_parameters", params)
+    def create(self, params = None):
+        url, params = CommonParameter.expand_route("/api/common_parameters", params)
         return self._connection.POST(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -59,8 +59,8 @@ class CommonParameter(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def update(self, params = {}):
-        url = CommonParameter.fill_params_in_url("/api/common_parameters/:id", params)
+    def update(self, params = None):
+        url, params = CommonParameter.expand_route("/api/common_parameters/:id", params)
         return self._connection.PUT(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -68,6 +68,6 @@ class CommonParameter(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def destroy(self, params = {}):
-        url = CommonParameter.fill_params_in_url("/api/common_parameters/:id", params)
+    def destroy(self, params = None):
+        url, params = CommonParameter.expand_route("/api/common_parameters/:id", params)
         return self._connection.DELETE(url, params)
@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class ConfigTemplate(ApipieApi):
@@ -25,8 +25,8 @@ class ConfigTemplate(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = ConfigTemplate.fill_params_in_url("/api/config_templates", params)
+    def index(self, params = None):
+        url, params = ConfigTemplate.expand_route("/api/config_templates", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -34,8 +34,8 @@ class ConfigTemplate(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def show(self, params = {}):
-        url = ConfigTemplate.fill_params_in_url("/api/config_templates/:id", params)
+    def show(self, params = None):
+        url, params = ConfigTemplate.expand_route("/api/config_templates/:id", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -51,8 +51,8 @@ class ConfigTemplate(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def create(self, params = {}):
-        url = ConfigTemplate.fill_params_in_url("/api/config_templates", params)
+    def create(self, params = None):
+        url, params = ConfigTemplate.expand_route("/api/config_templates", params)
         return self._connection.POST(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -69,8 +69,8 @@ class ConfigTemplate(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def update(self, params = {}):
-        url = ConfigTemplate.fill_params_in_url("/api/config_templates/:id", params)
+    def update(self, params = None):
+        url, params = ConfigTemplate.expand_route("/api/config_templates/:id", params)
         return self._connection.PUT(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -78,8 +78,8 @@ class ConfigTemplate(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def revision(self, params = {}):
-        url = ConfigTemplate.fill_params_in_url("/api/config_templates/revision", params)
+    def revision(self, params = None):
+        url, params = ConfigTemplate.expand_route("/api/config_templates/revision", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -87,14 +87,14 @@ class ConfigTemplate(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def destroy(self, params = {}):
-        url = ConfigTemplate.fill_params_in_url("/api/config_templates/:id", params)
+    def destroy(self, params = None):
+        url, params = ConfigTemplate.expand_route("/api/config_templates/:id", params)
         return self._connection.DELETE(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def build_pxe_default(self, params = {}):
-        url = ConfigTemplate.fill_params_in_url("/api/config_templates/build_pxe_default", params)
+    def build_pxe_default(self, params = None):
+        url, params = ConfigTemplate.expand_route("/api/config_templates/build_pxe_default", params)
         return self._connection.GET(url, params)
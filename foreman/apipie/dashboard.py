@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class Dashboard(ApipieApi):
@@ -22,6 +22,6 @@ class Dashboard(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = Dashboard.fill_params_in_url("/api/dashboard", params)
+    def index(self, params = None):
+        url, params = Dashboard.expand_route("/api/dashboard", params)
         return self._connection.GET(url, params)
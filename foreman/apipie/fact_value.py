@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class FactValue(ApipieApi):
@@ -23,9 +23,10 @@ class FactValue(ApipieApi):
     # @option params [String] page  paginate results 
     # @option params [String] per_page  number of entries per request 
     # @option params [String] search  filter results 
+    # @param [Boolean] stream yield the results while the response is being read
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = FactValue.fill_params_in_url("/api/fact_values", params)
-        return self._connection.GET(url, params)
+    def index(self, params = None, stream = False):
+        url, params = FactValue.expand_route("/api/fact_values", params)
+        return self._connection.GET(url, params, stream=stream)
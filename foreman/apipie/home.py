@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class Home(ApipieApi):
@@ -21,14 +21,14 @@ class Home(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = Home.fill_params_in_url("/api", params)
+    def index(self, params = None):
+        url, params = Home.expand_route("/api", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def status(self, params = {}):
-        url = Home.fill_params_in_url("/api/status", params)
+    def status(self, params = None):
+        url, params = Home.expand_route("/api/status", params)
         return self._connection.GET(url, params)
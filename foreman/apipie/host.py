@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class Host(ApipieApi):
@@ -22,20 +22,21 @@ class Host(ApipieApi):
     # @option params [String] page  paginate results 
     # @option params [String] per_page  number of entries per request 
     # @option params [String] search  filter results 
+    # @param [Boolean] stream yield the results while the response is being read
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = Host.fill_params_in_url("/api/hosts", params)
-        return self._connection.GET(url, params)
+    def index(self, params = None, stream = False):
+        url, params = Host.expand_route("/api/hosts", params)
+        return self._connection.GET(url, params, stream=stream)
 
     # @param [Hash] params a hash of params to be passed to the service
     # @option params [String] id
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def show(self, params = {}):
-        url = Host.fill_params_in_url("/api/hosts/:id", params)
+    def show(self, params = None):
+        url, params = Host.expand_route("/api/hosts/:id", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -62,8 +63,8 @@ class Host(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def create(self, params = {}):
-        url = Host.fill_params_in_url("/api/hosts", params)
+    def create(self, params = None):
+        url, params = Host.expand_route("/api/hosts", params)
         return self._connection.POST(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -91,8 +92,8 @@ class Host(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def update(self, params = {}):
-        url = Host.fill_params_in_url("/api/hosts/:id", params)
+    def update(self, params = None):
+        url, params = Host.expand_route("/api/hosts/:id", params)
         return self._connection.PUT(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -100,8 +101,8 @@ class Host(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def destroy(self, params = {}):
-        url = Host.fill_params_in_url("/api/hosts/:id", params)
+    def destroy(self, params = None):
+        url, params = Host.expand_route("/api/hosts/:id", params)
         return self._connection.DELETE(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -109,6 +110,6 @@ class Host(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def status(self, params = {}):
-        url = Host.fill_params_in_url("/api/hosts/:id/status", params)
+    def status(self, params = None):
+        url, params = Host.expand_route("/api/hosts/:id/status", params)
         return self._connection.GET(url, params)
@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class HostgroupClass(ApipieApi):
@@ -22,8 +22,8 @@ class HostgroupClass(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = HostgroupClass.fill_params_in_url("/api/hostgroups/:hostgroup_id/puppetclass_ids", params)
+    def index(self, params = None):
+        url, params = HostgroupClass.expand_route("/api/hostgroups/:hostgroup_id/puppetclass_ids", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -32,8 +32,8 @@ class HostgroupClass(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def create(self, params = {}):
-        url = HostgroupClass.fill_params_in_url("/api/hostgroups/:hostgroup_id/puppetclass_ids", params)
+    def create(self, params = None):
+        url, params = HostgroupClass.expand_route("/api/hostgroups/:hostgroup_id/puppetclass_ids", params)
         return self._connection.POST(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -43,6 +43,6 @@ class HostgroupClass(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def destroy(self, params = {}):
-        url = HostgroupClass.fill_params_in_url("/api/hostgroups/:hostgroup_id/puppetclass_ids/:id", params)
+    def destroy(self, params = None):
+        url, params = HostgroupClass.expand_route("/api/hostgroups/:hostgroup_id/puppetclass_ids/:id", params)
         return self._connection.DELETE(url, params)
@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class Image(ApipieApi):
@@ -26,8 +26,8 @@ class Image(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = Image.fill_params_in_url("/api/compute_resources/:compute_resource_id/images", params)
+    def index(self, params = None):
+        url, params = Image.expand_route("/api/compute_resources/:compute_resource_id/images", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -36,8 +36,8 @@ class Image(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def show(self, params = {}):
-        url = Image.fill_params_in_url("/api/compute_resources/:compute_resource_id/images/:id", params)
+    def show(self, params = None):
+        url, params = Image.expand_route("/api/compute_resources/:compute_resource_id/images/:id", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -53,8 +53,8 @@ class Image(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def create(self, params = {}):
-        url = Image.fill_params_in_url("/api/compute_resources/:compute_resource_id/images", params)
+    def create(self, params = None):
+        url, params = Image.expand_route("/api/compute_resources/:compute_resource_id/images", params)
         return self._connection.POST(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -71,8 +71,8 @@ class Image(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def update(self, params = {}):
-        url = Image.fill_params_in_url("/api/compute_resources/:compute_resource_id/images/:id", params)
+    def update(self, params = None):
+        url, params = Image.expand_route("/api/compute_resources/:compute_resource_id/images/:id", params)
         return self._connection.PUT(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -81,6 +81,6 @@ class Image(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def destroy(self, params = {}):
-        url = Image.fill_params_in_url("/api/compute_resources/:compute_resource_id/images/:id", params)
+    def destroy(self, params = None):
+        url, params = Image.expand_route("/api/compute_resources/:compute_resource_id/images/:id", params)
         return self._connection.DELETE(url, params)
@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class LookupKey(ApipieApi):
@@ -26,8 +26,8 @@ class LookupKey(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = LookupKey.fill_params_in_url("/api/lookup_keys", params)
+    def index(self, params = None):
+        url, params = LookupKey.expand_route("/api/lookup_keys", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -35,8 +35,8 @@ class LookupKey(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def show(self, params = {}):
-        url = LookupKey.fill_params_in_url("/api/lookup_keys/:id", params)
+    def show(self, params = None):
+        url, params = LookupKey.expand_route("/api/lookup_keys/:id", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -51,8 +51,8 @@ class LookupKey(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def create(self, params = {}):
-        url = LookupKey.fill_params_in_url("/api/lookup_keys", params)
+    def create(self, params = None):
+        url, params = LookupKey.expand_route("/api/lookup_keys", params)
         return self._connection.POST(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -68,8 +68,8 @@ class LookupKey(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def update(self, params = {}):
-        url = LookupKey.fill_params_in_url("/api/lookup_keys/:id", params)
+    def update(self, params = None):
+        url, params = LookupKey.expand_route("/api/lookup_keys/:id", params)
         return self._connection.PUT(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -77,6 +77,6 @@ class LookupKey(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def destroy(self, params = {}):
-        url = LookupKey.fill_params_in_url("/api/lookup_keys/:id", params)
+    def destroy(self, params = None):
+        url, params = LookupKey.expand_route("/api/lookup_keys/:id", params)
         return self._connection.DELETE(url, params)
@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class OperatingSystem(ApipieApi):
@@ -25,8 +25,8 @@ class OperatingSystem(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = OperatingSystem.fill_params_in_url("/api/operatingsystems", params)
+    def index(self, params = None):
+        url, params = OperatingSystem.expand_route("/api/operatingsystems", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -34,8 +34,8 @@ class OperatingSystem(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def show(self, params = {}):
-        url = OperatingSystem.fill_params_in_url("/api/operatingsystems/:id", params)
+    def show(self, params = None):
+        url, params = OperatingSystem.expand_route("/api/operatingsystems/:id", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -49,8 +49,8 @@ class OperatingSystem(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def create(self, params = {}):
-        url = OperatingSystem.fill_params_in_url("/api/operatingsystems", params)
+    def create(self, params = None):
+        url, params = OperatingSystem.expand_route("/api/operatingsystems", params)
         return self._connection.POST(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -65,8 +65,8 @@ class OperatingSystem(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def update(self, params = {}):
-        url = OperatingSystem.fill_params_in_url("/api/operatingsystems/:id", params)
+    def update(self, params = None):
+        url, params = OperatingSystem.expand_route("/api/operatingsystems/:id", params)
         return self._connection.PUT(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -74,8 +74,8 @@ class OperatingSystem(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def destroy(self, params = {}):
-        url = OperatingSystem.fill_params_in_url("/api/operatingsystems/:id", params)
+    def destroy(self, params = None):
+        url, params = OperatingSystem.expand_route("/api/operatingsystems/:id", params)
         return self._connection.DELETE(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -85,6 +85,6 @@ class OperatingSystem(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def bootfiles(self, params = {}):
-        url = OperatingSystem.fill_params_in_url("/api/operatingsystems/:id/bootfiles", params)
+    def bootfiles(self, params = None):
+        url, params = OperatingSystem.expand_route("/api/operatingsystems/:id/bootfiles", params)
         return self._connection.GET(url, params)
@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class Parameter(ApipieApi):
@@ -27,8 +27,8 @@ class Parameter(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = Parameter.fill_params_in_url("/api/host/:host_id/parameters", params)
+    def index(self, params = None):
+        url, params = Parameter.expand_route("/api/host/:host_id/parameters", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -40,8 +40,8 @@ class Parameter(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def show(self, params = {}):
-        url = Parameter.fill_params_in_url("/api/host/:host_id/parameters/:id", params)
+    def show(self, params = None):
+        url, params = Parameter.expand_route("/api/host/:host_id/parameters/:id", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -57,8 +57,8 @@ class Parameter(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def create(self, params = {}):
-        url = Parameter.fill_params_in_url("/api/host/:host_id/parameters/:id", params)
+    def create(self, params = None):
+        url, params = Parameter.expand_route("/api/host/:host_id/parameters/:id", params)
         return self._connection.POST(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -74,8 +74,8 @@ class Parameter(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def update(self, params = {}):
-        url = Parameter.fill_params_in_url("/api/host/:host_id/parameters/:id", params)
+    def update(self, params = None):
+        url, params = Parameter.expand_route("/api/host/:host_id/parameters/:id", params)
         return self._connection.PUT(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -87,8 +87,8 @@ class Parameter(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def destroy(self, params = {}):
-        url = Parameter.fill_params_in_url("/api/host/:host_id/parameters/:id", params)
+    def destroy(self, params = None):
+        url, params = Parameter.expand_route("/api/host/:host_id/parameters/:id", params)
         return self._connection.DELETE(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -99,6 +99,6 @@ class Parameter(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def reset(self, params = {}):
-        url = Parameter.fill_params_in_url("/api/host/:host_id/parameters", params)
+    def reset(self, params = None):
+        url, params = Parameter.expand_route("/api/host/:host_id/parameters", params)
         return self._connection.DELETE(url, params)
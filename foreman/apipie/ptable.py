@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class Ptable(ApipieApi):
@@ -25,8 +25,8 @@ class Ptable(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = Ptable.fill_params_in_url("/api/ptables", params)
+    def index(self, params = None):
+        url, params = Ptable.expand_route("/api/ptables", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -34,8 +34,8 @@ class Ptable(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def show(self, params = {}):
-        url = Ptable.fill_params_in_url("/api/ptables/:id", params)
+    def show(self, params = None):
+        url, params = Ptable.expand_route("/api/ptables/:id", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -47,8 +47,8 @@ class Ptable(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def create(self, params = {}):
-        url = Ptable.fill_params_in_url("/api/ptables", params)
+    def create(self, params = None):
+        url, params = Ptable.expand_route("/api/ptables", params)
         return self._connection.POST(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -61,8 +61,8 @@ class Ptable(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def update(self, params = {}):
-        url = Ptable.fill_params_in_url("/api/ptables/:id", params)
+    def update(self, params = None):
+        url, params = Ptable.expand_route("/api/ptables/:id", params)
         return self._connection.PUT(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -70,6 +70,6 @@ class Ptable(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def destroy(self, params = {}):
-        url = Ptable.fill_params_in_url("/api/ptables/:id", params)
+    def destroy(self, params = None):
+        url, params = Ptable.expand_route("/api/ptables/:id", params)
         return self._connection.DELETE(url, params)
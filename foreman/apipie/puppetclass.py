@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class Puppetclass(ApipieApi):
@@ -24,8 +24,8 @@ class Puppetclass(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = Puppetclass.fill_params_in_url("/api/puppetclasses", params)
+    def index(self, params = None):
+        url, params = Puppetclass.expand_route("/api/puppetclasses", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -36,8 +36,8 @@ class Puppetclass(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def show(self, params = {}):
-        url = Puppetclass.fill_params_in_url("/api/puppetclasses/:id", params)
+    def show(self, params = None):
+        url, params = Puppetclass.expand_route("/api/puppetclasses/:id", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -47,8 +47,8 @@ class Puppetclass(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def create(self, params = {}):
-        url = Puppetclass.fill_params_in_url("/api/puppetclasses", params)
+    def create(self, params = None):
+        url, params = Puppetclass.expand_route("/api/puppetclasses", params)
         return self._connection.POST(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -59,8 +59,8 @@ class Puppetclass(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def update(self, params = {}):
-        url = Puppetclass.fill_params_in_url("/api/puppetclasses/:id", params)
+    def update(self, params = None):
+        url, params = Puppetclass.expand_route("/api/puppetclasses/:id", params)
         return self._connection.PUT(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -68,6 +68,6 @@ class Puppetclass(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def destroy(self, params = {}):
-        url = Puppetclass.fill_params_in_url("/api/puppetclasses/:id", params)
+    def destroy(self, params = None):
+        url, params = Puppetclass.expand_route("/api/puppetclasses/:id", params)
         return self._connection.DELETE(url, params)
@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class Report(ApipieApi):
@@ -22,20 +22,21 @@ class Report(ApipieApi):
     # @option params [String] page  paginate results 
     # @option params [String] per_page  number of entries per request 
     # @option params [String] search  filter results 
+    # @param [Boolean] stream yield the results while the response is being read
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = Report.fill_params_in_url("/api/reports", params)
-        return self._connection.GET(url, params)
+    def index(self, params = None, stream = False):
+        url, params = Report.expand_route("/api/reports", params)
+        return self._connection.GET(url, params, stream=stream)
 
     # @param [Hash] params a hash of params to be passed to the service
     # @option params [String] id
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def show(self, params = {}):
-        url = Report.fill_params_in_url("/api/reports/:id", params)
+    def show(self, params = None):
+        url, params = Report.expand_route("/api/reports/:id", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -43,8 +44,8 @@ class Report(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def destroy(self, params = {}):
-        url = Report.fill_params_in_url("/api/ptables/:id", params)
+    def destroy(self, params = None):
+        url, params = Report.expand_route("/api/ptables/:id", params)
         return self._connection.DELETE(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -53,6 +54,6 @@ class Report(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def last(self, params = {}):
-        url = Report.fill_params_in_url("/api/hosts/:host_id/reports/last", params)
+    def last(self, params = None):
+        url, params = Report.expand_route("/api/hosts/:host_id/reports/last", params)
         return self._connection.GET(url, params)
@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class Role(ApipieApi):
@@ -23,8 +23,8 @@ class Role(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = Role.fill_params_in_url("/api/roles", params)
+    def index(self, params = None):
+        url, params = Role.expand_route("/api/roles", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -32,8 +32,8 @@ class Role(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def show(self, params = {}):
-        url = Role.fill_params_in_url("/api/roles/:id", params)
+    def show(self, params = None):
+        url, params = Role.expand_route("/api/roles/:id", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -43,8 +43,8 @@ class Role(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def create(self, params = {}):
-        url = Role.fill_params_in_url("/api/roles", params)
+    def create(self, params = None):
+        url, params = Role.expand_route("/api/roles", params)
         return self._connection.POST(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -55,8 +55,8 @@ class Role(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def update(self, params = {}):
-        url = Role.fill_params_in_url("/api/roles/:id", params)
+    def update(self, params = None):
+        url, params = Role.expand_route("/api/roles/:id", params)
         return self._connection.PUT(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -64,6 +64,6 @@ class Role(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def destroy(self, params = {}):
-        url = Role.fill_params_in_url("/api/roles/:id", params)
+    def destroy(self, params = None):
+        url, params = Role.expand_route("/api/roles/:id", params)
         return self._connection.DELETE(url, params)
@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class Setting(ApipieApi):
@@ -25,8 +25,8 @@ class Setting(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = Setting.fill_params_in_url("/api/settings", params)
+    def index(self, params = None):
+        url, params = Setting.expand_route("/api/settings", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -34,8 +34,8 @@ class Setting(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def show(self, params = {}):
-        url = Setting.fill_params_in_url("/api/settings/:id", params)
+    def show(self, params = None):
+        url, params = Setting.expand_route("/api/settings/:id", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -46,6 +46,6 @@ class Setting(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def update(self, params = {}):
-        url = Setting.fill_params_in_url("/api/settings/:id", params)
+    def update(self, params = None):
+        url, params = Setting.expand_route("/api/settings/:id", params)
         return self._connection.PUT(url, params)
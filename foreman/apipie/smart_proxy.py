@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class SmartProxy(ApipieApi):
@@ -24,8 +24,8 @@ class SmartProxy(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = SmartProxy.fill_params_in_url("/api/smart_proxies", params)
+    def index(self, params = None):
+        url, params = SmartProxy.expand_route("/api/smart_proxies", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -33,8 +33,8 @@ class SmartProxy(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def show(self, params = {}):
-        url = SmartProxy.fill_params_in_url("/api/smart_proxies/:id", params)
+    def show(self, params = None):
+        url, params = SmartProxy.expand_route("/api/smart_proxies/:id", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -45,8 +45,8 @@ class SmartProxy(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def create(self, params = {}):
-        url = SmartProxy.fill_params_in_url("/api/smart_proxies", params)
+    def create(self, params = None):
+        url, params = SmartProxy.expand_route("/api/smart_proxies", params)
         return self._connection.POST(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -58,8 +58,8 @@ class SmartProxy(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def update(self, params = {}):
-        url = SmartProxy.fill_params_in_url("/api/smart_proxies/:id", params)
+    def update(self, params = None):
+        url, params = SmartProxy.expand_route("/api/smart_proxies/:id", params)
         return self._connection.PUT(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -67,6 +67,6 @@ class SmartProxy(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def destroy(self, params = {}):
-        url = SmartProxy.fill_params_in_url("/api/smart_proxies/:id", params)
+    def destroy(self, params = None):
+        url, params = SmartProxy.expand_route("/api/smart_proxies/:id", params)
         return self._connection.DELETE(url, params)
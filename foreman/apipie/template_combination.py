@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class TemplateCombination(ApipieApi):
@@ -22,8 +22,8 @@ class TemplateCombination(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = TemplateCombination.fill_params_in_url("/api/config_templates/:config_template_id/template_combinations", params)
+    def index(self, params = None):
+        url, params = TemplateCombination.expand_route("/api/config_templates/:config_template_id/template_combinations", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -35,8 +35,8 @@ class TemplateCombination(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def create(self, params = {}):
-        url = TemplateCombination.fill_params_in_url("/api/config_templates/:config_template_id/template_combinations", params)
+    def create(self, params = None):
+        url, params = TemplateCombination.expand_route("/api/config_templates/:config_template_id/template_combinations", params)
         return self._connection.POST(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -44,8 +44,8 @@ class TemplateCombination(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def show(self, params = {}):
-        url = TemplateCombination.fill_params_in_url("/api/template_combinations/:id", params)
+    def show(self, params = None):
+        url, params = TemplateCombination.expand_route("/api/template_combinations/:id", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -53,6 +53,6 @@ class TemplateCombination(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def destroy(self, params = {}):
-        url = TemplateCombination.fill_params_in_url("/api/template_combinations/:id", params)
+    def destroy(self, params = None):
+        url, params = TemplateCombination.expand_route("/api/template_combinations/:id", params)
         return self._connection.DELETE(url, params)
@@ -11,7 +11,7 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import ApipieApi
+from foreman.apipie import ApipieApi
 
 
 class TemplateKind(ApipieApi):
@@ -23,6 +23,6 @@ class TemplateKind(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = TemplateKind.fill_params_in_url("/api/template_kinds", params)
+    def index(self, params = None):
+        url, params = TemplateKind.expand_route("/api/template_kinds", params)
         return self._connection.GET(url, params)
@@ -25,8 +25,8 @@ class User(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def index(self, params = {}):
-        url = User.fill_params_in_url("/api/users", params)
+    def index(self, params = None):
+        url, params = User.expand_route("/api/users", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -34,8 +34,8 @@ class User(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def show(self, params = {}):
-        url = User.fill_params_in_url("/api/users/:id", params)
+    def show(self, params = None):
+        url, params = User.expand_route("/api/users/:id", params)
         return self._connection.GET(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -51,8 +51,8 @@ class User(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def create(self, params = {}):
-        url = User.fill_params_in_url("/api/users", params)
+    def create(self, params = None):
+        url, params = User.expand_route("/api/users", params)
         return self._connection.POST(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -68,8 +68,8 @@ class User(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def update(self, params = {}):
-        url = User.fill_params_in_url("/api/users/:id", params)
+    def update(self, params = None):
+        url, params = User.expand_route("/api/users/:id", params)
         return self._connection.PUT(url, params)
 
     # @param [Hash] params a hash of params to be passed to the service
@@ -77,6 +77,6 @@ class User(ApipieApi):
     #
     # @param [Hash] headers additional http headers
     # @return [Array] First item: parsed data; second item: raw body
-    def destroy(self, params = {}):
-        url = User.fill_params_in_url("/api/users/:id", params)
+    def destroy(self, params = None):
+        url, params = User.expand_route("/api/users/:id", params)
         return self._connection.DELETE(url, params)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Running cli commands of a batch file side by side in one process.
+
+The commands share the prompt and sys.stdout and sys.stderr. While they run,
+every thread writes into a buffer of its own. The output of a command is
+written in one piece once the command finished, so the output of commands
+that run at the same time does not interleave.
+"""
+
+import Queue
+import sys
+import threading
+
+
+class _Capture(object):
+    """
+    Output buffers of the running threads, threads without one write through
+    """
+
+    def __init__(self):
+        self.__local = threading.local()
+        self.__lock = threading.Lock()
+
+    def start(self):
+        self.__local.chunks = []
+
+    def buffer(self):
+        return getattr(self.__local, 'chunks', None)
+
+    def finish(self):
+        """
+        Write the buffered output of the current thread, in the order it was written
+        """
+        chunks, self.__local.chunks = self.__local.chunks, None
+        self.__lock.acquire()
+        try:
+            for stream, text in chunks:
+                stream.write(text)
+            for stream in set(stream for stream, text in chunks):
+                if hasattr(stream, 'flush'):
+                    stream.flush()
+        finally:
+            self.__lock.release()
+
+
+class _CapturedStream(object):
+
+    def __init__(self, capture, stream):
+        self.__capture = capture
+        self.__stream = stream
+
+    def write(self, text):
+        chunks = self.__capture.buffer()
+        if chunks is None:
+            self.__stream.write(text)
+        else:
+            chunks.append((self.__stream, text))
+
+    def flush(self):
+        if self.__capture.buffer() is None and hasattr(self.__stream, 'flush'):
+            self.__stream.flush()
+
+    def __getattr__(self, name):
+        # encoding, isatty, fileno, ... of the real stream
+        return getattr(self.__stream, name)
+
+
+def run_parallel(run, commands, parallel, prompt):
+    """
+    Run the commands from `parallel` threads at once
+    @type run: callable
+    @param run: called with the command line, returns its exit status
+    @type commands: list of (int, str)
+    @param commands: line numbers and command lines
+    @type parallel: int
+    @param parallel: number of commands run at the same time
+    @type prompt: okaara.prompt.Prompt
+    @param prompt: prompt the commands write to
+    @rtype: dict
+    @return: line number -> exit status
+    """
+    todo = Queue.Queue()
+    for command in commands:
+        todo.put(command)
+    statuses = {}
+    capture = _Capture()
+
+    def work():
+        while True:
+            try:
+                number, line = todo.get_nowait()
+            except Queue.Empty:
+                return
+            capture.start()
+            try:
+                statuses[number] = run(line)
+            finally:
+                capture.finish()
+
+    saved = prompt.output, sys.stdout, sys.stderr
+    prompt.output, sys.stdout, sys.stderr = [_CapturedStream(capture, stream) for stream in saved]
+    try:
+        workers = [threading.Thread(target=work) for i in range(min(parallel, len(commands)))]
+        for worker in workers:
+            worker.daemon = True
+            worker.start()
+        for worker in workers:
+            worker.join()
+    finally:
+        prompt.output, sys.stdout, sys.stderr = saved
+    return statuses
@@ -11,14 +11,80 @@
 # have received a copy of GPLv2 along with this software; if not, see
 # http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
 
-from apipie import user
+import importlib
+
 
 class Bindings(object):
+    """
+    Entry point to all api resources. A resource is an attribute named after
+    its module in foreman.apipie, the module is imported and the resource
+    instantiated only when the attribute is first accessed.
+    """
+
+    # Please keep the following in alphabetical order to ease reading
+    RESOURCES = {
+        'architecture':         'Architecture',
+        'audit':                'Audit',
+        'auth_source_ldap':     'AuthSourceLdap',
+        'bookmark':             'Bookmark',
+        'common_parameter':     'CommonParameter',
+        'compute_resource':     'ComputeResource',
+        'config_template':      'ConfigTemplate',
+        'dashboard':            'Dashboard',
+        'domain':               'Domain',
+        'environment':          'Environment',
+        'fact_value':           'FactValue',
+        'home':                 'Home',
+        'host':                 'Host',
+        'host_class':           'HostClass',
+        'hostgroup':            'Hostgroup',
+        'hostgroup_class':      'HostgroupClass',
+        'image':                'Image',
+        'lookup_key':           'LookupKey',
+        'medium':               'Medium',
+        'model':                'Model',
+        'operating_system':     'OperatingSystem',
+        'parameter':            'Parameter',
+        'ptable':               'Ptable',
+        'puppetclass':          'Puppetclass',
+        'report':               'Report',
+        'role':                 'Role',
+        'setting':              'Setting',
+        'smart_proxy':          'SmartProxy',
+        'subnet':               'Subnet',
+        'template_combination': 'TemplateCombination',
+        'template_kind':        'TemplateKind',
+        'user':                 'User',
+        'usergroup':            'Usergroup',
+    }
 
     def __init__(self, connection):
         """
-        @type:   pulp_connection: pulp.bindings.server.PulpConnection
+        @type:   connection: foreman.apipie.ServerConnection
+        """
+        self.connection = connection
+        self.__resolver = None
+
+    @property
+    def resolver(self):
+        """
+        Name to id resolver of the catalogs, created on first use
+        @rtype: foreman.resolver.Resolver
         """
+        if self.__resolver is None:
+            from foreman.resolver import Resolver
+            self.__resolver = Resolver(self)
+        return self.__resolver
+
+    def __getattr__(self, name):
+        # only called for attributes that were not set yet
+        class_name = self.RESOURCES.get(name)
+        if class_name is None:
+            raise AttributeError(name)
+        module = importlib.import_module('foreman.apipie.' + name)
+        resource = getattr(module, class_name)(self.connection)
+        setattr(self, name, resource)
+        return resource
 
-        # Please keep the following in alphabetical order to ease reading
-        self.user = user.User(connection)
+    def __dir__(self):
+        return sorted(set(dir(type(self)) + self.__dict__.keys() + self.RESOURCES.keys()))
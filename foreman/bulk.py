@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import csv
+import logging
+import Queue
+import sys
+import threading
+import time
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+
+log = logging.getLogger(__name__)
+
+
+def read_definitions(stream, format='json', resource='host'):
+    """
+    Read resource definitions one by one from json lines or csv with a header
+    row. Definitions that are not wrapped in the resource name are wrapped,
+    so {"name": "a"} becomes {"host": {"name": "a"}}.
+    @type stream: file
+    @param stream: opened file with the definitions
+    @type format: str
+    @param format: 'json' or 'csv'
+    @type resource: str
+    @param resource: name the definitions are wrapped in
+    @rtype: generator of dict
+    """
+    if format == 'csv':
+        records = (dict((key, value) for key, value in row.items() if value != '')
+                   for row in csv.DictReader(stream))
+    elif format == 'json':
+        records = (json.loads(line) for line in stream if line.strip())
+    else:
+        raise ValueError(_('unknown format %s') % format)
+
+    for record in records:
+        if resource not in record:
+            record = {resource: record}
+        yield record
+
+
+class BulkResult(object):
+    """
+    Outcome of one item of a bulk run
+
+    @ivar index: position of the item in the input
+    @ivar name: name of the resource, if the definition had one
+    @ivar created: True if the server accepted the item
+    @ivar attempts: number of requests sent for the item
+    @ivar status: http status of the last response, None if no response came
+    @ivar body: body of the last response
+    @ivar error: text of the last exception, None if there was none
+    @ivar elapsed: seconds spent on the item including retries
+    """
+
+    def __init__(self, index, name):
+        self.index = index
+        self.name = name
+        self.created = False
+        self.attempts = 0
+        self.status = None
+        self.body = None
+        self.error = None
+        self.elapsed = 0.0
+
+    def to_dict(self):
+        return {
+            'index': self.index,
+            'name': self.name,
+            'created': self.created,
+            'attempts': self.attempts,
+            'status': self.status,
+            'body': self.body,
+            'error': self.error,
+            'elapsed': round(self.elapsed, 3),
+        }
+
+
+class BulkRunner(object):
+    """
+    Run one api method for a stream of items with bounded concurrency.
+    The method is usually not idempotent, an item is only sent again when the
+    server cannot have handled it: the request failed before it was sent, or
+    the server answered that it is throttling (429) or unavailable (503).
+    After other connection and server errors (5xx) the item may exist on the
+    server, it is looked up with `find` and only sent again if it is missing.
+    Client errors are not retried. The input is consumed lazily so it can be
+    arbitrarily long.
+
+        runner = BulkRunner(api.host.create, concurrency=16, find=find_host)
+        for result in runner.run(read_definitions(open('rack.json'))):
+            print result.to_dict()
+
+    @ivar method: api method called with every item, e.g. api.host.create
+    @ivar concurrency: maximum number of requests in flight
+    @ivar retries: maximum number of retries per item
+    @ivar retry_delay: seconds before the first retry, doubled with every retry
+    @ivar find: callable taking an item and returning the resource it created
+                or None, without it items are not retried after errors that
+                leave their outcome unknown
+    """
+
+    RETRY_STATUSES = (429, 503)
+
+    def __init__(self, method, concurrency=8, retries=2, retry_delay=1.0, resource='host', find=None):
+        self.method = method
+        self.concurrency = max(int(concurrency), 1)
+        self.retries = max(int(retries), 0)
+        self.retry_delay = retry_delay
+        self.resource = resource
+        self.find = find
+
+    def run(self, items):
+        """
+        @type items: iterable of dict
+        @param items: parameters for the method, one per call
+        @rtype: generator of BulkResult
+        @return: results in the order the items finish
+        """
+        todo = Queue.Queue(self.concurrency * 2)
+        done = Queue.Queue()
+        workers = []
+        for i in range(self.concurrency):
+            worker = threading.Thread(target=self.__work, args=(todo, done))
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+
+        feeder = threading.Thread(target=self.__feed, args=(items, todo, done))
+        feeder.daemon = True
+        feeder.start()
+
+        running = len(workers)
+        while running:
+            result = done.get()
+            if result is None:
+                running -= 1
+            elif isinstance(result, tuple):
+                # reading the input failed
+                raise result[0], result[1], result[2]
+            else:
+                yield result
+
+    def run_one(self, index, item):
+        """
+        Call the method for one item, retrying as needed
+        @rtype: BulkResult
+        """
+        result = BulkResult(index, self._name(item))
+        start = time.time()
+        delay = self.retry_delay
+        while True:
+            result.attempts += 1
+            try:
+                response = self.method(item)
+            except Exception, e:
+                log.debug('bulk item %d failed', index, exc_info=True)
+                result.error = str(e) or e.__class__.__name__
+                # set by the connection once the server may have read the request
+                unknown = getattr(e, 'request_sent', False)
+            else:
+                result.status = response.status
+                result.body = response.body
+                result.error = None
+                result.created = response.status < 300
+                if response.status not in self.RETRY_STATUSES and response.status < 500:
+                    break
+                unknown = response.status not in self.RETRY_STATUSES
+
+            if result.attempts > self.retries or (unknown and self.find is None):
+                break
+            time.sleep(delay)
+            delay *= 2
+            if unknown and self.__created(index, item, result):
+                break
+        result.elapsed = time.time() - start
+        return result
+
+    def __created(self, index, item, result):
+        """
+        Look the item up after an error that may have followed its creation
+        @rtype: bool
+        @return: True if the item must not be sent again
+        """
+        try:
+            existing = self.find(item)
+        except Exception, e:
+            log.debug('looking up bulk item %d failed', index, exc_info=True)
+            result.error = str(e) or e.__class__.__name__
+            return True
+        if existing is None:
+            return False
+        result.created = True
+        result.body = existing
+        result.error = None
+        return True
+
+    def _name(self, item):
+        try:
+            return item[self.resource].get('name')
+        except (KeyError, TypeError, AttributeError):
+            return None
+
+    def __feed(self, items, todo, done):
+        try:
+            for index, item in enumerate(items):
+                todo.put((index, item))
+        except Exception:
+            done.put(sys.exc_info())
+        finally:
+            for i in range(self.concurrency):
+                todo.put(None)
+
+    def __work(self, todo, done):
+        try:
+            while True:
+                entry = todo.get()
+                if entry is None:
+                    return
+                done.put(self.run_one(*entry))
+        finally:
+            done.put(None)
@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Record the http traffic of a ServerConnection and replay it without a server.
+
+    cassette = Cassette()
+    cassette.record(connection)
+    Bindings(connection).host.index({'per_page': 1000})
+    cassette.save('hosts.cassette.gz')
+
+    cassette = Cassette.load('hosts.cassette.gz')
+    cassette.replay(connection, latency=0.05)
+    Bindings(connection).host.index({'per_page': 1000})   # served from the file
+
+Interactions are stored as gzip compressed json lines. Response bodies are
+kept exactly as they came over the wire (still gzip or deflate encoded if
+the server compressed them), so replay exercises the same decoding path.
+"""
+
+import base64
+import gzip
+import hashlib
+import httplib
+import threading
+import time
+from StringIO import StringIO
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+
+class CassetteError(Exception):
+    """
+    Raised on replay when no interaction was recorded for a request
+    """
+    pass
+
+
+class Interaction(object):
+    """
+    One recorded request and its response
+    """
+
+    def __init__(self, method, url, body_hash, status, reason, headers, body):
+        self.method = method
+        self.url = url
+        self.body_hash = body_hash
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+
+    def to_dict(self):
+        return {
+            'method': self.method,
+            'url': self.url,
+            'body_hash': self.body_hash,
+            'status': self.status,
+            'reason': self.reason,
+            'headers': self.headers,
+            'body': base64.b64encode(self.body),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['method'], data['url'], data['body_hash'], data['status'],
+                   data['reason'], data['headers'], base64.b64decode(data['body']))
+
+
+def _body_hash(body):
+    if isinstance(body, unicode):
+        body = body.encode('utf-8')
+    if isinstance(body, str):
+        return hashlib.sha1(body).hexdigest()
+    return None
+
+
+class Cassette(object):
+    """
+    Ordered set of interactions. On replay, requests are matched by method,
+    url and a hash of the request body, falling back to method and url only.
+    Repeated identical requests get the recorded responses in order, the last
+    one is served again once they are used up.
+
+    @ivar interactions: recorded interactions in the order they happened
+    """
+
+    def __init__(self, interactions=None):
+        self.interactions = []
+        self.__lock = threading.Lock()
+        self.__index = {}
+        self.__served = {}
+        for interaction in interactions or []:
+            self.add(interaction)
+
+    @classmethod
+    def load(cls, path):
+        stream = gzip.open(path, 'rb')
+        try:
+            return cls([Interaction.from_dict(json.loads(line)) for line in stream if line.strip()])
+        finally:
+            stream.close()
+
+    def save(self, path):
+        stream = gzip.open(path, 'wb')
+        try:
+            for interaction in self.interactions:
+                stream.write(json.dumps(interaction.to_dict(), separators=(',', ':')) + '\n')
+        finally:
+            stream.close()
+
+    def record(self, server_connection):
+        """
+        Send the requests of the server connection to the server and record them
+        @type server_connection: foreman.apipie.ServerConnection
+        """
+        server_connection.transport = lambda opener: RecordingConnection(opener(), self)
+
+    def replay(self, server_connection, latency=0.0, bandwidth=None):
+        """
+        Serve the requests of the server connection from the cassette
+        @type server_connection: foreman.apipie.ServerConnection
+        @type latency: float
+        @param latency: seconds waited before every response
+        @type bandwidth: int
+        @param bandwidth: bytes per second the response bodies are read at, unlimited if None
+        """
+        server_connection.transport = lambda opener: ReplayConnection(self, latency, bandwidth)
+
+    def add(self, interaction):
+        self.__lock.acquire()
+        try:
+            self.interactions.append(interaction)
+            for key in self.__keys(interaction.method, interaction.url, interaction.body_hash):
+                self.__index.setdefault(key, []).append(interaction)
+        finally:
+            self.__lock.release()
+
+    def find(self, method, url, body):
+        """
+        @rtype: Interaction
+        @raise CassetteError: if nothing was recorded for the request
+        """
+        self.__lock.acquire()
+        try:
+            for key in self.__keys(method, url, _body_hash(body)):
+                candidates = self.__index.get(key)
+                if candidates:
+                    served = self.__served.get(key, 0)
+                    self.__served[key] = served + 1
+                    return candidates[min(served, len(candidates) - 1)]
+        finally:
+            self.__lock.release()
+        raise CassetteError('no interaction recorded for %s %s' % (method, url))
+
+    @classmethod
+    def __keys(cls, method, url, body_hash):
+        return ((method, url, body_hash), (method, url))
+
+
+class RecordedResponse(object):
+    """
+    Stand-in for httplib.HTTPResponse built from an interaction
+    """
+
+    def __init__(self, interaction, bandwidth=None):
+        self.status = interaction.status
+        self.reason = interaction.reason
+        self.msg = httplib.HTTPMessage(StringIO(interaction.headers), 0)
+        self.will_close = False
+        self.__body = StringIO(interaction.body)
+        self.__bandwidth = bandwidth
+
+    def getheader(self, name, default=None):
+        return self.msg.getheader(name, default)
+
+    def getheaders(self):
+        return self.msg.items()
+
+    def read(self, amt=None):
+        data = self.__body.read() if amt is None else self.__body.read(amt)
+        if self.__bandwidth and data:
+            time.sleep(float(len(data)) / self.__bandwidth)
+        return data
+
+
+class RecordingConnection(object):
+    """
+    Wraps a real http connection and adds every interaction to the cassette
+    """
+
+    def __init__(self, connection, cassette):
+        self.__connection = connection
+        self.__cassette = cassette
+        self.__request = None
+
+    @property
+    def sock(self):
+        return self.__connection.sock
+
+    def connect(self):
+        self.__connection.connect()
+
+    def request(self, method, url, body=None, headers=None):
+        self.__request = (method, url, _body_hash(body))
+        self.__connection.request(method, url, body=body, headers=headers or {})
+
+    def getresponse(self):
+        response = self.__connection.getresponse()
+        body = response.read()
+        method, url, body_hash = self.__request
+        interaction = Interaction(method, url, body_hash, response.status, response.reason,
+                                  ''.join(response.msg.headers), body)
+        self.__cassette.add(interaction)
+
+        recorded = RecordedResponse(interaction)
+        recorded.will_close = response.will_close
+        return recorded
+
+    def close(self):
+        self.__connection.close()
+
+
+class ReplayConnection(object):
+    """
+    Connection answering from the cassette, it never touches the network
+    """
+
+    def __init__(self, cassette, latency=0.0, bandwidth=None):
+        self.__cassette = cassette
+        self.__latency = latency
+        self.__bandwidth = bandwidth
+        self.__request = None
+
+    def request(self, method, url, body=None, headers=None):
+        self.__request = (method, url, body)
+
+    def getresponse(self):
+        interaction = self.__cassette.find(*self.__request)
+        if self.__latency:
+            time.sleep(self.__latency)
+        return RecordedResponse(interaction, self.__bandwidth)
+
+    def close(self):
+        pass
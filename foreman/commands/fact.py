@@ -0,0 +1,105 @@
+#
+# Foreman fact actions
+# Copyright 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+
+import os
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+from foreman.cli import ForemanCommand
+from foreman.fact_diff import FactSnapshot, HostChange, SnapshotError, diff_facts
+from foreman.fact_export import export_facts
+
+
+class Export(ForemanCommand):
+
+    description = _('export the facts of all hosts as one compressed numpy column (.npz) per fact')
+    name = 'export'
+
+    def _setup_options(self):
+        self.create_option('--directory', _("where the export is written"), required=True)
+        self.create_option('--search', _("export only the hosts matching the search"))
+        self.create_option('--per-page', _("fact values fetched per request (default: 1000)"))
+        self.create_option('--max-dictionary', _("most distinct values of a dictionary encoded fact, "
+                                                 "facts with more are written plain (default: 4096)"))
+
+    def run(self, options):
+        manifest = export_facts(self.api, options['directory'], options.get('search'),
+                                int(options.get('per-page') or 1000), int(options.get('max-dictionary') or 4096))
+        plain = [name for name, fact in manifest['facts'].items() if fact['encoding'] == 'plain']
+        self.prompt.write(_('%d hosts, %d facts (%d plain) written to %s')
+                          % (manifest['rows'], len(manifest['facts']), len(plain), options['directory']))
+        return os.EX_OK
+
+
+class Diff(ForemanCommand):
+
+    description = _('show the hosts and facts that changed since the last diff')
+    name = 'diff'
+
+    def _setup_options(self):
+        self.create_option('--snapshot', _("sqlite file of the snapshot (default: ~/.foreman/facts.sqlite)"))
+        self.create_option('--search', _("compare only the hosts matching the search"))
+        self.create_option('--ignore', _("comma separated facts that change all the time, e.g. uptime,memoryfree"))
+        self.create_option('--per-page', _("fact values fetched per request (default: 1000)"))
+        self.create_option('--format', _("output format: text or json (one host per line) (default: text)"))
+        self.create_flag('--dry-run', _("leave the snapshot as it was"))
+
+    def run(self, options):
+        ignore = [fact.strip() for fact in (options.get('ignore') or '').split(',') if fact.strip()]
+        snapshot = FactSnapshot(options.get('snapshot'), ignore)
+        try:
+            first = snapshot.empty()
+            hosts = 0
+            try:
+                for change in diff_facts(self.api, snapshot, options.get('search'),
+                                         int(options.get('per-page') or 1000)):
+                    hosts += 1
+                    if not first:
+                        self._write_change(change, options.get('format') or 'text')
+            except SnapshotError, e:
+                snapshot.rollback()
+                self.prompt.write(_('diff failed, the snapshot is unchanged: %s') % e)
+                return os.EX_DATAERR
+            if options.get('dry-run'):
+                snapshot.rollback()
+            else:
+                snapshot.commit()
+        finally:
+            snapshot.close()
+
+        if first:
+            self.prompt.write(_('no snapshot to compare with, took one of %d hosts') % hosts)
+        return os.EX_OK
+
+    def _write_change(self, change, format):
+        if format == 'json':
+            self.prompt.write(json.dumps(change.to_dict(), sort_keys=True))
+            return
+        if change.status == HostChange.ADDED:
+            self.prompt.write(_('+ %s (new host, %d facts)') % (change.name, len(change.added)))
+        elif change.status == HostChange.REMOVED:
+            self.prompt.write(_('- %s (host gone)') % change.name)
+        else:
+            self.prompt.write('~ %s' % change.name)
+            for fact in sorted(change.added):
+                self.prompt.write('    + %s: %s' % (fact, change.added[fact]))
+            for fact in sorted(change.removed):
+                self.prompt.write('    - %s: %s' % (fact, change.removed[fact]))
+            for fact in sorted(change.changed):
+                self.prompt.write('    ~ %s: %s -> %s' % ((fact,) + change.changed[fact]))
@@ -0,0 +1,73 @@
+#
+# Foreman host actions
+# Copyright 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+
+import os
+import sys
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+from foreman.bulk import BulkRunner, read_definitions
+from foreman.cli import ForemanCommand
+
+
+class BulkCreate(ForemanCommand):
+
+    description = _('create hosts from a file of json lines or csv')
+    name = 'bulk_create'
+
+    def _setup_options(self):
+        self.create_option('--file', _("file with host definitions, '-' reads stdin (default: -)"))
+        self.create_option('--format', _("format of the file: json (one host per line) or csv (default: json)"))
+        self.create_option('--concurrency', _("number of hosts created at the same time (default: 8)"))
+        self.create_option('--retries', _("retries of a host after a server or connection error (default: 2)"))
+
+    def run(self, options):
+        path = options.get('file') or '-'
+        stream = sys.stdin if path == '-' else open(path)
+        concurrency = int(options.get('concurrency') or 8)
+        self.api.connection.pool.reserve(concurrency)
+        runner = BulkRunner(self.api.host.create,
+                            concurrency=concurrency,
+                            retries=int(options.get('retries') or 2),
+                            find=self._find)
+
+        failed = 0
+        try:
+            for result in runner.run(read_definitions(stream, options.get('format') or 'json')):
+                if not result.created:
+                    failed += 1
+                self.prompt.write(json.dumps(result.to_dict()))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        if failed:
+            return os.EX_DATAERR
+        return os.EX_OK
+
+    def _find(self, item):
+        # the host an earlier attempt may have created before an error
+        name = item['host'].get('name')
+        if not name:
+            return None
+        response = self.api.host.index({'search': 'name = "%s"' % name, 'per_page': 1})
+        if response.status >= 300:
+            raise Exception(_('looking up host %s failed with status %d') % (name, response.status))
+        results = response.body.get('results') or []
+        return results[0] if results else None
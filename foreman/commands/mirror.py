@@ -0,0 +1,108 @@
+#
+# Foreman inventory mirror actions
+# Copyright 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public License,
+# version 2 (GPLv2). There is NO WARRANTY for this software, express or
+# implied, including the implied warranties of MERCHANTABILITY or FITNESS
+# FOR A PARTICULAR PURPOSE. You should have received a copy of GPLv2
+# along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+#
+# Red Hat trademarks are not licensed under GPLv2. No permission is
+# granted to use or replicate Red Hat trademarks that are incorporated
+# in this software or its documentation.
+#
+
+import os
+import sqlite3
+
+from foreman.cli import ForemanCommand
+from foreman.mirror import Mirror
+
+
+class MirrorCommand(ForemanCommand):
+
+    def _setup_options(self):
+        self.create_option('--database', _("sqlite file of the mirror (default: ~/.foreman/mirror.sqlite)"))
+
+    def _mirror(self, options):
+        return Mirror(self.api, options.get('database'))
+
+    def _write_counts(self, counts):
+        for name in sorted(counts):
+            self.prompt.write('%-14s %d' % (name, counts[name]))
+
+
+class Pull(MirrorCommand):
+
+    description = _('copy hosts, hostgroups, puppet classes, parameters and facts into the mirror')
+    name = 'pull'
+
+    def _setup_options(self):
+        super(Pull, self)._setup_options()
+        self.create_flag('--no-facts', _("leave the facts out, they take the longest"))
+
+    def run(self, options):
+        mirror = self._mirror(options)
+        try:
+            self._write_counts(mirror.pull(facts=not options.get('no-facts')))
+        finally:
+            mirror.close()
+        return os.EX_OK
+
+
+class Sync(MirrorCommand):
+
+    description = _('apply the changes recorded in the audits since the last pull or sync')
+    name = 'sync'
+
+    def _setup_options(self):
+        super(Sync, self)._setup_options()
+        self.create_flag('--facts', _("fetch the facts of all hosts again, fact uploads are not audited"))
+
+    def run(self, options):
+        mirror = self._mirror(options)
+        try:
+            if mirror.meta('pulled_at') is None:
+                self.prompt.write(_('the mirror is empty, run "mirror pull" first'))
+                return os.EX_DATAERR
+            self._write_counts(mirror.sync(facts=bool(options.get('facts'))))
+        finally:
+            mirror.close()
+        return os.EX_OK
+
+
+class Query(MirrorCommand):
+
+    description = _('run an sql query against the mirror')
+    name = 'query'
+
+    def _setup_options(self):
+        super(Query, self)._setup_options()
+        self.create_option('--sql', _("the query, e.g. \"SELECT name FROM hosts WHERE hostgroup_id = 3\""),
+                           required=True)
+
+    def run(self, options):
+        mirror = self._mirror(options)
+        try:
+            try:
+                columns, rows = mirror.query(options['sql'])
+            except sqlite3.Error, e:
+                self.prompt.write(_('query failed: %s') % e)
+                return os.EX_DATAERR
+        finally:
+            mirror.close()
+
+        self.prompt.write('\t'.join(columns))
+        for row in rows:
+            self.prompt.write('\t'.join(_text(value) for value in row))
+        return os.EX_OK
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, unicode):
+        return value
+    return str(value)
@@ -15,10 +15,15 @@
 #
 
 import os
+import shlex
+import sys
+import traceback
 
 import pertinax.shell
 from pertinax.cli import PertinaxCommand
 
+from foreman.batch import run_parallel
+
 # shell action ------------------------------------------------------------
 
 class Shell(PertinaxCommand):
@@ -26,9 +31,72 @@ class Shell(PertinaxCommand):
     name = "shell"
     description = _('run the cli as a shell')
 
+    def _setup_options(self):
+        self.create_option('--file', _("run the commands from a file instead of interactively, '-' reads stdin"))
+        self.create_option('--parallel', _("number of commands from the file run at the same time, "
+                                           "only use for independent commands (default: 1)"))
+
     def run(self, options):
         self.context.cli.remove_command(self.name)
+
+        if options.get('file'):
+            return self.run_batch(options['file'], int(options.get('parallel') or 1))
+
         shell = pertinax.shell.Shell(self.context.cli, prompt="foreman> ")
         shell.cmdloop()
 
         return os.EX_OK
+
+    def run_batch(self, path, parallel=1):
+        """
+        Run every line of the file as a cli command in this process, so that
+        all of them share the api connection. Blank lines and lines starting
+        with # are skipped.
+        @type path: str
+        @param path: file with the commands, '-' for stdin
+        @type parallel: int
+        @param parallel: number of commands run at the same time
+        @rtype: int
+        @return: os.EX_OK if all commands succeeded, os.EX_DATAERR otherwise
+        """
+        stream = sys.stdin if path == '-' else open(path)
+        try:
+            commands = [(number, line.strip()) for number, line in enumerate(stream, 1)
+                        if line.strip() and not line.strip().startswith('#')]
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        if parallel > 1:
+            statuses = self._run_parallel(commands, parallel)
+        else:
+            statuses = dict((number, self._run_line(line)) for number, line in commands)
+
+        failed = 0
+        self.prompt.write(_('line   status   command'))
+        for number, line in commands:
+            status = statuses[number]
+            if status != os.EX_OK:
+                failed += 1
+            self.prompt.write('%-6d %-8s %s' % (number, status, line))
+        self.prompt.write(_('%d commands, %d failed') % (len(commands), failed))
+
+        if failed:
+            return os.EX_DATAERR
+        return os.EX_OK
+
+    def _run_parallel(self, commands, parallel):
+        # the commands share the prompt, their output is buffered per command
+        return run_parallel(self._run_line, commands, parallel, self.prompt)
+
+    def _run_line(self, line):
+        try:
+            status = self.context.cli.run(shlex.split(line))
+        except SystemExit, e:
+            status = e.code
+        except Exception:
+            self.prompt.write(traceback.format_exc())
+            status = os.EX_SOFTWARE
+        if status is None:
+            return os.EX_OK
+        return status
@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Long-lived process that runs cli commands on behalf of bin/foreman.
+
+`foreman --daemon` keeps the configuration, the loaded extensions, the api
+bindings with their pooled connections and authentication state alive and
+listens on a unix socket. Every other `foreman` invocation first tries to
+forward its arguments there and only runs the command itself when no daemon
+answers. The thin client side (forward) is imported before anything else in
+bin/foreman, keep the imports of this module light.
+
+Protocol: the client sends one json line {"argv": [...], "cwd": "..."}, the
+daemon acknowledges it with the line {"accepted": true} and answers with one
+json document {"status": 0, "stdout": "...", "stderr": "..."} or
+{"fallback": true} when the command must run locally. A client that gets no
+acknowledgement in time (the daemon serves one command at a time) closes the
+socket and runs the command itself, the daemon then drops the request.
+"""
+
+import os
+import socket
+import sys
+import traceback
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+
+DEFAULT_SOCKET = os.path.join('~', '.foreman', 'daemon.sock')
+
+# seconds to wait for the daemon to take a command before running it locally
+ACCEPT_TIMEOUT = 2.0
+
+# seconds to wait for the result of an accepted command, $FOREMAN_DAEMON_TIMEOUT overrides it
+DEFAULT_TIMEOUT = 3600.0
+
+
+class NotForwardable(Exception):
+    """
+    Raised by the daemon's run callable for commands that have to run in the
+    client's own process, e.g. the interactive shell
+    """
+    pass
+
+
+# commands reading stdin run in the client's process, the daemon only has an
+# empty one; the value is the option that makes them read a file instead
+STDIN_COMMANDS = {
+    ('shell',): None,
+    ('host', 'bulk_create'): '--file',
+}
+
+
+def reads_stdin(args):
+    """
+    @type args: list of str
+    @param args: the command and its options, without the global options
+    @rtype: bool
+    @return: True if the command would read stdin
+    """
+    for command, file_option in STDIN_COMMANDS.items():
+        if tuple(args[:len(command)]) != command:
+            continue
+        if file_option is None:
+            return True
+        path = '-'
+        rest = args[len(command):]
+        for i, arg in enumerate(rest):
+            if arg == file_option and i + 1 < len(rest):
+                path = rest[i + 1]
+            elif arg.startswith(file_option + '='):
+                path = arg[len(file_option) + 1:]
+        return path == '-'
+    return False
+
+
+def socket_path():
+    """
+    @rtype: str
+    @return: path of the daemon socket, $FOREMAN_DAEMON_SOCKET overrides the default
+    """
+    return os.path.expanduser(os.environ.get('FOREMAN_DAEMON_SOCKET') or DEFAULT_SOCKET)
+
+
+def forward(argv, path=None, stdout=None, stderr=None, timeout=None):
+    """
+    Run a command in the daemon
+    @type argv: list of str
+    @param argv: arguments of bin/foreman
+    @type path: str
+    @param path: socket of the daemon
+    @type timeout: float
+    @param timeout: seconds to wait for the result once the daemon took the command
+    @rtype: int or None
+    @return: exit status of the command, None when no daemon is running, it is
+             busy or it asks to run the command locally
+    """
+    path = path or socket_path()
+    if not os.path.exists(path):
+        return None
+    if timeout is None:
+        timeout = float(os.environ.get('FOREMAN_DAEMON_TIMEOUT') or DEFAULT_TIMEOUT)
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(ACCEPT_TIMEOUT)
+        try:
+            sock.connect(path)
+            sock.sendall(json.dumps({'argv': argv, 'cwd': os.getcwd()}) + '\n')
+            stream = sock.makefile('rb')
+            accepted = stream.readline()
+        except socket.error:
+            # stale socket of a daemon that is gone, or a busy or hung daemon
+            return None
+        if not accepted:
+            return None
+
+        # the command runs in the daemon now, running it locally could repeat it
+        sock.settimeout(timeout)
+        try:
+            reply = json.loads(stream.read())
+        except socket.timeout:
+            # i18n is not set up yet this early in bin/foreman
+            (stderr or sys.stderr).write('no result from the foreman daemon within %d seconds\n' % timeout)
+            return os.EX_TEMPFAIL
+        except (socket.error, ValueError):
+            # the daemon failed or was stopped while running the command
+            (stderr or sys.stderr).write('the foreman daemon closed the connection without a result\n')
+            return os.EX_SOFTWARE
+    finally:
+        sock.close()
+
+    if reply.get('fallback'):
+        return None
+    (stdout or sys.stdout).write(reply.get('stdout', '').encode('utf-8'))
+    (stderr or sys.stderr).write(reply.get('stderr', '').encode('utf-8'))
+    return reply.get('status')
+
+
+class Daemon(object):
+    """
+    Serves commands forwarded by bin/foreman one at a time.
+
+    @ivar run: callable taking the argv list and returning the exit status,
+               it runs with stdin, stdout, stderr and the working directory
+               of the request
+    @ivar path: path of the unix socket
+    """
+
+    def __init__(self, run, path=None):
+        self.run = run
+        self.path = path or socket_path()
+
+    def serve_forever(self):
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, 0700)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # the daemon holds the credentials, only its owner may talk to it
+        old_umask = os.umask(0077)
+        try:
+            server.bind(self.path)
+        finally:
+            os.umask(old_umask)
+        server.listen(16)
+
+        try:
+            while True:
+                connection = server.accept()[0]
+                try:
+                    self.handle(connection)
+                except Exception:
+                    traceback.print_exc()
+                finally:
+                    connection.close()
+        finally:
+            server.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def handle(self, connection):
+        stream = connection.makefile('rb')
+        try:
+            request = json.loads(stream.readline())
+        finally:
+            stream.close()
+        try:
+            connection.sendall(json.dumps({'accepted': True}) + '\n')
+        except socket.error:
+            # the client stopped waiting and runs the command itself
+            return
+        connection.sendall(json.dumps(self.execute(request.get('argv', []), request.get('cwd'))))
+
+    def execute(self, argv, cwd=None):
+        """
+        Run one command with its output captured
+        @rtype: dict
+        @return: the reply sent to the client
+        """
+        from StringIO import StringIO
+
+        stdout, stderr = StringIO(), StringIO()
+        saved = sys.stdin, sys.stdout, sys.stderr, os.getcwd()
+        sys.stdin, sys.stdout, sys.stderr = StringIO(), stdout, stderr
+        try:
+            if cwd:
+                os.chdir(cwd)
+            status = self.run(argv)
+        except NotForwardable:
+            return {'fallback': True}
+        except SystemExit, e:
+            status = e.code
+        except Exception:
+            traceback.print_exc(file=stderr)
+            status = os.EX_SOFTWARE
+        finally:
+            sys.stdin, sys.stdout, sys.stderr = saved[:3]
+            os.chdir(saved[3])
+
+        if status is None:
+            status = os.EX_OK
+        elif not isinstance(status, int):
+            stderr.write('%s\n' % status)
+            status = 1
+        return {'status': status, 'stdout': _text(stdout.getvalue()), 'stderr': _text(stderr.getvalue())}
+
+
+def _text(value):
+    if isinstance(value, unicode):
+        return value
+    return value.decode('utf-8', 'replace')
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Differences between the current facts of the hosts and a local snapshot.
+
+    snapshot = FactSnapshot('~/.foreman/facts.sqlite', ignore=['uptime'])
+    for change in snapshot.diff(host_facts(bindings.fact_value)):
+        print change.name, change.status, change.changed
+    snapshot.commit()       # the current facts become the snapshot
+
+The snapshot keeps a hash of the facts of every host. Hosts whose hash did
+not change are skipped, only the others are compared fact by fact against
+the stored values. That needs the complete facts of a host at once, a host
+that comes twice (the server did not order the fact values by host, see
+foreman.facts) raises SnapshotError and the snapshot must be rolled back.
+"""
+
+import hashlib
+import os
+import sqlite3
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+from foreman.facts import host_facts
+
+
+DEFAULT_SNAPSHOT = os.path.join('~', '.foreman', 'facts.sqlite')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hosts (
+    name TEXT PRIMARY KEY,
+    hash TEXT,
+    facts TEXT
+);
+"""
+
+# hosts written to the snapshot in one statement
+BATCH_SIZE = 500
+
+
+class SnapshotError(Exception):
+    """
+    Raised when the facts cannot be compared with the snapshot
+    """
+    pass
+
+
+class HostChange(object):
+    """
+    @ivar name: host name
+    @ivar status: 'added', 'removed' or 'changed'
+    @ivar added: facts the host did not have before, name -> value
+    @ivar removed: facts the host does not have any more, name -> old value
+    @ivar changed: facts with a new value, name -> (old value, new value)
+    """
+
+    ADDED = 'added'
+    REMOVED = 'removed'
+    CHANGED = 'changed'
+
+    def __init__(self, name, status, added=None, removed=None, changed=None):
+        self.name = name
+        self.status = status
+        self.added = added or {}
+        self.removed = removed or {}
+        self.changed = changed or {}
+
+    def to_dict(self):
+        return {'name': self.name, 'status': self.status, 'added': self.added,
+                'removed': self.removed,
+                'changed': dict((fact, {'old': old, 'new': new}) for fact, (old, new) in self.changed.items())}
+
+
+class FactSnapshot(object):
+    """
+    @ivar path: the sqlite database
+    @ivar ignore: facts left out of the hashes and the comparison, e.g. uptime
+    """
+
+    def __init__(self, path=None, ignore=()):
+        self.path = os.path.expanduser(path or DEFAULT_SNAPSHOT)
+        self.ignore = frozenset(ignore)
+
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, 0700)
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def empty(self):
+        return self.db.execute('SELECT 1 FROM hosts LIMIT 1').fetchone() is None
+
+    def diff(self, facts, complete=True):
+        """
+        Compare the facts with the snapshot and put them in its place, the
+        snapshot is updated when commit() is called
+        @type facts: iterable of (str, dict)
+        @param facts: host names and their facts, e.g. foreman.facts.host_facts
+        @type complete: bool
+        @param complete: the facts are those of all hosts, the hosts of the
+                         snapshot missing from them were removed
+        @rtype: generator of HostChange
+        @return: the hosts that are new, gone or whose facts differ
+        @raise SnapshotError: if a host comes more than once
+        """
+        seen = set()
+        batch = []
+        for name, values in facts:
+            if name in seen:
+                raise SnapshotError(_('the facts of %s came in parts, the server did not order them by host') % name)
+            seen.add(name)
+            values = dict((fact, value) for fact, value in values.iteritems() if fact not in self.ignore)
+            encoded = json.dumps(values, sort_keys=True, separators=(',', ':'))
+            digest = hashlib.sha1(encoded).hexdigest()
+
+            row = self.db.execute('SELECT hash FROM hosts WHERE name = ?', (name,)).fetchone()
+            if row is not None and row[0] == digest:
+                continue
+            if row is None:
+                yield HostChange(name, HostChange.ADDED, added=values)
+            else:
+                change = self.__compare(name, values)
+                if change is not None:
+                    yield change
+            batch.append((name, digest, encoded))
+            if len(batch) >= BATCH_SIZE:
+                self.__store(batch)
+                batch = []
+        self.__store(batch)
+        if not complete:
+            return
+
+        gone = [name for (name,) in self.db.execute('SELECT name FROM hosts') if name not in seen]
+        for name in sorted(gone):
+            yield HostChange(name, HostChange.REMOVED, removed=self.__stored(name))
+        self.db.executemany('DELETE FROM hosts WHERE name = ?', [(name,) for name in gone])
+
+    def commit(self):
+        self.db.commit()
+
+    def rollback(self):
+        self.db.rollback()
+
+    def __compare(self, name, values):
+        old = self.__stored(name)
+        added = dict((fact, value) for fact, value in values.iteritems() if fact not in old)
+        removed = dict((fact, value) for fact, value in old.iteritems() if fact not in values)
+        changed = dict((fact, (old[fact], value)) for fact, value in values.iteritems()
+                       if fact in old and old[fact] != value)
+        if not (added or removed or changed):
+            # only the ignored facts changed since the snapshot was taken
+            return None
+        return HostChange(name, HostChange.CHANGED, added, removed, changed)
+
+    def __stored(self, name):
+        row = self.db.execute('SELECT facts FROM hosts WHERE name = ?', (name,)).fetchone()
+        values = json.loads(row[0]) if row else {}
+        return dict((fact, value) for fact, value in values.iteritems() if fact not in self.ignore)
+
+    def __store(self, batch):
+        if batch:
+            self.db.executemany('INSERT OR REPLACE INTO hosts (name, hash, facts) VALUES (?, ?, ?)', batch)
+
+
+def diff_facts(bindings, snapshot, search=None, per_page=1000):
+    """
+    Fetch the facts of all (or the searched) hosts and compare them with the snapshot
+    @type bindings: foreman.bindings.Bindings
+    @type snapshot: FactSnapshot
+    @rtype: generator of HostChange
+    """
+    params = {'search': search} if search else None
+    return snapshot.diff(host_facts(bindings.fact_value, params, per_page), complete=not search)
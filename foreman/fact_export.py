@@ -0,0 +1,353 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Export of the facts of all hosts as a host x fact matrix, one compressed
+numpy archive (.npz) per fact column:
+
+    <directory>/hosts.npz           values, valid: host name of every row
+    <directory>/facts/<fact>.npz    codes, dictionary: dictionary encoded column
+                                    or values, valid: plain column
+    <directory>/manifest.json       rows, facts and the file of every fact
+
+Low cardinality facts are dictionary encoded, `codes` holds the index of
+the value in `dictionary` for every host, -1 where the host lacks the fact.
+Facts with more distinct values than max_dictionary (ip addresses, uptimes)
+fall back to a plain `values` column with a `valid` mask.
+
+    import numpy
+    column = numpy.load('export/facts/operatingsystem.npz')
+    values = column['dictionary'][column['codes']]
+
+The archives are written without numpy. Column data is spilled to
+temporary files while the pages are read, so memory does not grow with the
+number of hosts, only with the number of facts and the dictionary sizes.
+"""
+
+import array
+import os
+import re
+import shutil
+import struct
+import tempfile
+import zipfile
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+from foreman.facts import host_facts
+
+
+# column entries buffered in memory before they are appended to the spill file
+BUFFER_SIZE = 1024
+
+
+class Column(object):
+    """
+    One fact of all hosts, built row by row
+
+    @ivar name: fact name
+    @ivar rows: number of rows written so far, including the missing ones
+    @ivar dictionary: distinct values, None once the column became plain
+    """
+
+    def __init__(self, name, spill_directory, max_dictionary):
+        self.name = name
+        self.rows = 0
+        self.max_dictionary = max_dictionary
+        self.dictionary = []
+        self.__index = {}
+        self.__max_chars = 1
+        self.__path = _spill_file(spill_directory)
+        self.__buffer = array.array('i')
+        self.__plain = []
+
+    def append(self, row, value):
+        """
+        @type row: int
+        @param row: row of the host, rows between the last one and this are missing
+        @type value: unicode or None
+        """
+        self.pad(row)
+        if self.dictionary is not None:
+            code = -1
+            if value is not None:
+                code = self.__index.get(value)
+                if code is None:
+                    if len(self.dictionary) >= self.max_dictionary:
+                        self.__make_plain()
+                        return self.append(row, value)
+                    code = self.__index[value] = len(self.dictionary)
+                    self.dictionary.append(value)
+                    self.__max_chars = max(self.__max_chars, len(value))
+            self.__buffer.append(code)
+            if len(self.__buffer) >= BUFFER_SIZE:
+                self.flush()
+        else:
+            if value is not None:
+                self.__max_chars = max(self.__max_chars, len(value))
+            self.__plain.append(value)
+            if len(self.__plain) >= BUFFER_SIZE:
+                self.flush()
+        self.rows += 1
+
+    def pad(self, rows):
+        # hosts without the fact
+        while self.rows < rows:
+            if self.dictionary is not None:
+                self.__buffer.append(-1)
+            else:
+                self.__plain.append(None)
+            self.rows += 1
+            if len(self.__buffer) >= BUFFER_SIZE or len(self.__plain) >= BUFFER_SIZE:
+                self.flush()
+
+    def flush(self):
+        stream = open(self.__path, 'ab')
+        try:
+            if self.__buffer:
+                self.__buffer.tofile(stream)
+                self.__buffer = array.array('i')
+            for value in self.__plain:
+                if value is None:
+                    stream.write(struct.pack('<i', -1))
+                else:
+                    encoded = value.encode('utf-8')
+                    stream.write(struct.pack('<i', len(encoded)) + encoded)
+            self.__plain = []
+        finally:
+            stream.close()
+
+    def write(self, archive_path, rows, work_directory):
+        """
+        Write the column as an npz archive and drop its spill file
+        @type rows: int
+        @param rows: number of hosts, the column is padded up to it
+        """
+        self.pad(rows)
+        self.flush()
+        arrays = []
+        try:
+            if self.dictionary is not None:
+                arrays.append(('codes', _write_npy(work_directory, '<i4', rows, self.__codes())))
+                arrays.append(('dictionary', _write_npy(work_directory, '<U%d' % self.__max_chars,
+                               len(self.dictionary), _utf32(self.dictionary, self.__max_chars))))
+            else:
+                arrays.append(('values', _write_npy(work_directory, '<U%d' % self.__max_chars, rows,
+                               _utf32(self.__values(), self.__max_chars))))
+                arrays.append(('valid', _write_npy(work_directory, '|b1', rows,
+                               ('\x00' if value is None else '\x01' for value in self.__values()))))
+            _write_npz(archive_path, arrays)
+        finally:
+            for name, path in arrays:
+                os.unlink(path)
+            os.unlink(self.__path)
+
+    def __make_plain(self):
+        """
+        Too many distinct values, rewrite the codes written so far as values
+        """
+        self.flush()
+        path = self.__path
+        self.__path = _spill_file(os.path.dirname(path))
+        dictionary, self.dictionary = self.dictionary, None
+        for code in _read_codes(path):
+            self.__plain.append(None if code < 0 else dictionary[code])
+            if len(self.__plain) >= BUFFER_SIZE:
+                self.flush()
+        self.flush()
+        os.unlink(path)
+        self.__index = None
+
+    def __codes(self):
+        for code in _read_codes(self.__path):
+            yield struct.pack('<i', code)
+
+    def __values(self):
+        stream = open(self.__path, 'rb')
+        try:
+            while True:
+                prefix = stream.read(4)
+                if not prefix:
+                    return
+                length = struct.unpack('<i', prefix)[0]
+                yield None if length < 0 else stream.read(length).decode('utf-8')
+        finally:
+            stream.close()
+
+
+class FactExporter(object):
+    """
+    @ivar directory: where the export is written
+    @ivar max_dictionary: most distinct values of a dictionary encoded column
+    """
+
+    def __init__(self, directory, max_dictionary=4096):
+        self.directory = directory
+        self.max_dictionary = max_dictionary
+
+    def export(self, facts):
+        """
+        @type facts: iterable of (str, dict)
+        @param facts: host names and their facts, e.g. foreman.facts.host_facts
+        @rtype: dict
+        @return: the manifest
+        """
+        for path in (self.directory, os.path.join(self.directory, 'facts')):
+            if not os.path.isdir(path):
+                os.makedirs(path)
+        work = tempfile.mkdtemp(prefix='.export', dir=self.directory)
+        try:
+            columns = {}
+            hosts = Column('host', work, 0)
+            rows = 0
+            for host, values in facts:
+                hosts.append(rows, _text(host))
+                for name, value in values.iteritems():
+                    column = columns.get(name)
+                    if column is None:
+                        column = columns[name] = Column(name, work, self.max_dictionary)
+                    column.append(rows, _text(value))
+                rows += 1
+
+            manifest = {'rows': rows, 'hosts': 'hosts.npz', 'facts': {}}
+            hosts.write(os.path.join(self.directory, 'hosts.npz'), rows, work)
+            used = set()
+            for name in sorted(columns):
+                column = columns.pop(name)
+                filename = _filename(name, used)
+                column.write(os.path.join(self.directory, 'facts', filename), rows, work)
+                manifest['facts'][name] = {
+                    'file': 'facts/' + filename,
+                    'encoding': 'dictionary' if column.dictionary is not None else 'plain',
+                    'cardinality': len(column.dictionary) if column.dictionary is not None else None,
+                }
+        finally:
+            shutil.rmtree(work, True)
+
+        stream = open(os.path.join(self.directory, 'manifest.json'), 'w')
+        try:
+            json.dump(manifest, stream, indent=2, sort_keys=True)
+        finally:
+            stream.close()
+        return manifest
+
+
+def export_facts(bindings, directory, search=None, per_page=1000, max_dictionary=4096):
+    """
+    Read the facts of all (or the searched) hosts page by page and export them
+    @type bindings: foreman.bindings.Bindings
+    @rtype: dict
+    @return: the manifest
+    """
+    params = {'search': search} if search else None
+    return FactExporter(directory, max_dictionary).export(host_facts(bindings.fact_value, params, per_page))
+
+
+def _text(value):
+    if value is None:
+        return None
+    if isinstance(value, unicode):
+        return value
+    if isinstance(value, str):
+        return value.decode('utf-8', 'replace')
+    if isinstance(value, (dict, list)):
+        return json.dumps(value).decode('utf-8')
+    return unicode(value)
+
+
+def _filename(name, used):
+    filename = re.sub(r'[^A-Za-z0-9_.-]+', '_', name.encode('utf-8')).strip('.') or 'fact'
+    candidate, index = filename, 1
+    while candidate.lower() in used:
+        index += 1
+        candidate = '%s_%d' % (filename, index)
+    used.add(candidate.lower())
+    return candidate + '.npz'
+
+
+def _spill_file(directory):
+    # the spill files are opened only while they are written or read, a
+    # column held open for every fact runs out of file descriptors
+    descriptor, path = tempfile.mkstemp(dir=directory)
+    os.close(descriptor)
+    return path
+
+
+def _read_codes(path):
+    stream = open(path, 'rb')
+    try:
+        while True:
+            codes = array.array('i')
+            try:
+                codes.fromfile(stream, BUFFER_SIZE * 16)
+            except EOFError:
+                # fromfile keeps what it could read before the end
+                pass
+            if not codes:
+                return
+            for code in codes:
+                yield code
+    finally:
+        stream.close()
+
+
+def _utf32(values, chars):
+    width = chars * 4
+    for value in values:
+        encoded = (value or u'').encode('utf-32-le')
+        yield encoded + '\x00' * (width - len(encoded))
+
+
+def _write_npy(directory, dtype, length, chunks):
+    """
+    Write a one dimensional array in the .npy format
+    @type dtype: str
+    @param dtype: numpy type description, e.g. '<i4' or '<U12'
+    @type chunks: iterable of str
+    @param chunks: the raw little endian data
+    @rtype: str
+    @return: path of the written file
+    """
+    header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }" % (dtype, length)
+    # magic, version and header length take 10 bytes, the data starts 64 byte aligned
+    header += ' ' * (63 - (10 + len(header)) % 64) + '\n'
+    descriptor, path = tempfile.mkstemp(dir=directory, suffix='.npy')
+    stream = os.fdopen(descriptor, 'wb')
+    try:
+        stream.write('\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header)
+        buffered = []
+        size = 0
+        for chunk in chunks:
+            buffered.append(chunk)
+            size += len(chunk)
+            if size >= 64 * 1024:
+                stream.write(''.join(buffered))
+                buffered, size = [], 0
+        stream.write(''.join(buffered))
+    finally:
+        stream.close()
+    return path
+
+
+def _write_npz(path, arrays):
+    temporary = path + '.part'
+    archive = zipfile.ZipFile(temporary, 'w', zipfile.ZIP_DEFLATED, allowZip64=True)
+    try:
+        for name, npy in arrays:
+            archive.write(npy, name + '.npy')
+    finally:
+        archive.close()
+    os.rename(temporary, path)
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Reading the facts of all hosts from FactValue.index.
+
+The api pages fact values one value at a time and groups every page by host
+name, so the facts of a host can be split over pages. host_facts asks for
+the values ordered by host, then the facts of a host are on consecutive pages
+and it puts them back together while keeping no more than two pages in
+memory. A server that ignores the order can list a host again on a later
+page; that host is then yielded again with its other facts, so consumers
+merge the facts of repeated hosts instead of replacing them.
+"""
+
+# fact values ordered by host keep the facts of a host on consecutive pages
+ORDER = 'host'
+
+
+def host_facts(fact_value_api, params=None, per_page=1000):
+    """
+    Iterate over the hosts and their complete facts
+    @type fact_value_api: foreman.apipie.fact_value.FactValue
+    @param fact_value_api: the fact_value resource of the bindings
+    @type params: dict
+    @param params: parameters of the index calls, e.g. a search, the order is
+                   always by host
+    @type per_page: int
+    @param per_page: number of fact values requested per page
+    @rtype: generator of (str, dict)
+    @return: host name and its facts (name -> value), every host comes once
+             if the server honours the order
+    """
+    params = dict(params or {})
+    params['order'] = ORDER
+    pending = {}
+    for body in fact_value_api.pages(fact_value_api.index, params, per_page):
+        results = fact_value_api.page_records(body)
+        if not isinstance(results, dict):
+            continue
+
+        # pages are ordered by host, a host missing from this page is complete
+        for name in sorted(name for name in pending if name not in results):
+            yield name, pending.pop(name)
+        for name, facts in results.iteritems():
+            pending.setdefault(name, {}).update(facts or {})
+
+    for name in sorted(pending):
+        yield name, pending[name]
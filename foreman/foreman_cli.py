@@ -14,7 +14,7 @@
 import os
 from gettext import gettext as _
 
-from foreman.commands import fake, user, shell
+from foreman.commands import fact, fake, host, mirror, user, shell
 
 # -- framework hook -----------------------------------------------------------
 
@@ -29,6 +29,18 @@ def initialize(context):
     loc.add_command(fake.Fake(context, "update"))
     loc.add_command(fake.Fake(context, "delete"))
 
+    hst = context.cli.create_section('host', _('host specific actions'))
+    hst.add_command(host.BulkCreate(context))
+
+    fct = context.cli.create_section('fact', _('fact specific actions'))
+    fct.add_command(fact.Export(context))
+    fct.add_command(fact.Diff(context))
+
+    mir = context.cli.create_section('mirror', _('local sqlite copy of the inventory'))
+    mir.add_command(mirror.Pull(context))
+    mir.add_command(mirror.Sync(context))
+    mir.add_command(mirror.Query(context))
+
     usr = context.cli.create_section('user', _('user specific actions'))
     usr.add_command(user.List(context))
 
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+On-disk cache of GET responses revalidated with their ETag or Last-Modified.
+
+    connection.cache = HttpCache()
+    Bindings(connection).architecture.index()   # fetched and stored
+    Bindings(connection).architecture.index()   # If-None-Match, 304, body from disk
+
+Responses are always revalidated, the cache only saves transferring and
+decompressing bodies that did not change. Entries are keyed by the url and
+the headers that change the answer (credentials, language), the credentials
+are only stored hashed. Every entry is one file, least recently used entries
+are dropped once the cache grows over its size and entries unused for
+longer than the maximum age are dropped on the next sweep. Bodies over
+max_entry_size (big index pages) are not stored, they would push out the
+small catalog responses the cache pays off for.
+"""
+
+import hashlib
+import httplib
+import os
+import tempfile
+import threading
+import time
+from StringIO import StringIO
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+
+# headers that describe the transfer rather than the stored body, or must not be replayed
+_UNSTORED_HEADERS = ('connection', 'content-encoding', 'content-length', 'keep-alive',
+                     'set-cookie', 'transfer-encoding')
+
+# request headers the key is built from
+_KEY_HEADERS = ('accept', 'accept-language', 'authorization', 'cookie')
+
+
+class CacheEntry(object):
+    """
+    Stored response
+
+    @ivar status: http status
+    @ivar headers: list of (name, value) tuples without the transfer headers
+    @ivar body: decompressed body
+    """
+
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def get_header(self, name, default=None):
+        name = name.lower()
+        for header, value in self.headers:
+            if header.lower() == name:
+                return value
+        return default
+
+    def validators(self):
+        """
+        @rtype: dict
+        @return: conditional request headers for revalidating the entry
+        """
+        headers = {}
+        if self.get_header('etag'):
+            headers['If-None-Match'] = self.get_header('etag')
+        if self.get_header('last-modified'):
+            headers['If-Modified-Since'] = self.get_header('last-modified')
+        return headers
+
+    def response(self):
+        """
+        @rtype: StoredResponse
+        @return: stand-in for the httplib response the entry was stored from
+        """
+        return StoredResponse(self)
+
+
+class StoredResponse(object):
+    """
+    Stand-in for httplib.HTTPResponse built from a cache entry
+    """
+
+    def __init__(self, entry):
+        self.status = entry.status
+        self.reason = httplib.responses.get(entry.status, '')
+        self.msg = httplib.HTTPMessage(StringIO(''.join('%s: %s\r\n' % header for header in entry.headers)), 0)
+        self.will_close = False
+        self.__body = StringIO(entry.body)
+
+    def getheader(self, name, default=None):
+        return self.msg.getheader(name, default)
+
+    def getheaders(self):
+        return self.msg.items()
+
+    def read(self, amt=None):
+        return self.__body.read() if amt is None else self.__body.read(amt)
+
+
+class HttpCache(object):
+    """
+    @ivar directory: where the entries are stored
+    @ivar max_size: bytes the entries may take together
+    @ivar max_age: seconds an entry is kept without being used
+    @ivar max_entry_size: biggest body that is stored
+    """
+
+    DEFAULT_DIRECTORY = os.path.join('~', '.foreman', 'http_cache')
+
+    def __init__(self, directory=None, max_size=64 * 1024 * 1024, max_age=7 * 24 * 3600,
+                 max_entry_size=1024 * 1024):
+        self.directory = os.path.expanduser(directory or self.DEFAULT_DIRECTORY)
+        self.max_size = max_size
+        self.max_age = max_age
+        self.max_entry_size = max_entry_size
+        self.__size = None
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def key(cls, url, headers):
+        """
+        @type url: str
+        @param url: requested url including the query
+        @type headers: dict
+        @param headers: headers of the request
+        @rtype: str
+        """
+        digest = hashlib.sha1(url)
+        lowered = dict((name.lower(), value) for name, value in headers.items())
+        for name in _KEY_HEADERS:
+            digest.update('\0%s\0%s' % (name, lowered.get(name, '')))
+        return digest.hexdigest()
+
+    def lookup(self, key):
+        """
+        @rtype: CacheEntry or None
+        """
+        path = self.__path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.max_age:
+                self.__remove(path)
+                return None
+            stream = open(path, 'rb')
+        except (IOError, OSError):
+            return None
+        try:
+            try:
+                meta = json.loads(stream.readline())
+                return CacheEntry(meta['status'], [tuple(header) for header in meta['headers']], stream.read())
+            except (ValueError, KeyError):
+                # written by another version or damaged, drop it
+                self.__remove(path)
+                return None
+        finally:
+            stream.close()
+
+    def store(self, key, response):
+        """
+        Store a response if it can be revalidated
+        @type response: foreman.apipie.Response
+        @param response: response read with its raw body kept
+        @rtype: boolean
+        @return: whether the response was stored
+        """
+        if response.status != 200 or response.raw_body is None:
+            return False
+        if len(response.raw_body) > self.max_entry_size:
+            return False
+        if not (response.get_header('etag') or response.get_header('last-modified')):
+            return False
+        if 'no-store' in (response.get_header('cache-control') or ''):
+            return False
+
+        headers = [(name, value) for name, value in response.headers if name.lower() not in _UNSTORED_HEADERS]
+        meta = json.dumps({'status': response.status, 'headers': headers})
+
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory, 0700)
+            except OSError:
+                if not os.path.isdir(self.directory):
+                    raise
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, prefix='.entry')
+        try:
+            stream = os.fdopen(descriptor, 'wb')
+            try:
+                stream.write(meta + '\n')
+                stream.write(response.raw_body)
+            finally:
+                stream.close()
+            os.rename(temporary, self.__path(key))
+        except:
+            self.__remove(temporary)
+            raise
+
+        self.__grow(len(meta) + 1 + len(response.raw_body))
+        return True
+
+    def refresh(self, key):
+        """
+        Mark an entry as used after the server confirmed it is still fresh
+        """
+        try:
+            os.utime(self.__path(key), None)
+        except OSError:
+            pass
+
+    def clear(self):
+        for path, size, used in self.__entries():
+            self.__remove(path)
+        self.__lock.acquire()
+        try:
+            self.__size = 0
+        finally:
+            self.__lock.release()
+
+    def evict(self):
+        """
+        Drop the entries unused for longer than max_age and then the least
+        recently used ones until the cache takes less than 90% of max_size
+        """
+        now = time.time()
+        entries = sorted(self.__entries(), key=lambda entry: entry[2])
+        size = 0
+        kept = []
+        for path, entry_size, used in entries:
+            if now - used > self.max_age:
+                self.__remove(path)
+            else:
+                kept.append((path, entry_size))
+                size += entry_size
+        for path, entry_size in kept:
+            if size <= self.max_size * 0.9:
+                break
+            self.__remove(path)
+            size -= entry_size
+
+        self.__lock.acquire()
+        try:
+            self.__size = size
+        finally:
+            self.__lock.release()
+
+    def __grow(self, size):
+        self.__lock.acquire()
+        try:
+            if self.__size is None:
+                self.__size = sum(entry[1] for entry in self.__entries())
+            else:
+                self.__size += size
+            over = self.__size > self.max_size
+        finally:
+            self.__lock.release()
+        if over:
+            self.evict()
+
+    def __entries(self):
+        """
+        @rtype: list of (str, int, float)
+        @return: path, size and time of the last use of every entry
+        """
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if not name.endswith('.entry') or name.startswith('.'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def __path(self, key):
+        return os.path.join(self.directory, key + '.entry')
+
+    @classmethod
+    def __remove(cls, path):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+# This module is loaded before anything else when profiling the startup,
+# keep its own imports to the bare minimum.
+import __builtin__
+import sys
+import time
+
+
+class ImportProfiler(object):
+    """
+    Measures how long importing every module takes by wrapping __import__.
+    Cumulative time includes the modules imported by the module, self time
+    does not.
+
+    @ivar timings: module name -> (cumulative seconds, self seconds)
+    """
+
+    def __init__(self):
+        self.timings = {}
+        self.__stack = []
+        self.__original = None
+        self.__started = None
+
+    def install(self):
+        self.__original = __builtin__.__import__
+        self.__started = time.time()
+        __builtin__.__import__ = self.__import
+
+    def uninstall(self):
+        if self.__original is not None:
+            __builtin__.__import__ = self.__original
+            self.__original = None
+
+    def report(self, stream=None, limit=40):
+        """
+        Write the slowest imports, sorted by cumulative time
+        @type stream: file
+        @param stream: where to write the report, stderr by default
+        @type limit: int
+        @param limit: number of modules listed
+        """
+        stream = stream or sys.stderr
+        rows = sorted(self.timings.items(), key=lambda item: item[1][0], reverse=True)
+
+        stream.write('%-50s %12s %12s\n' % ('module', 'cumulative ms', 'self ms'))
+        for name, (cumulative, own) in rows[:limit]:
+            stream.write('%-50s %12.1f %12.1f\n' % (name, cumulative * 1000, own * 1000))
+        stream.write('%d modules imported, %.1f ms in imports, %.1f ms since start\n' % (
+            len(self.timings),
+            sum(own for cumulative, own in self.timings.values()) * 1000,
+            (time.time() - self.__started) * 1000))
+
+    def __import(self, name, *args, **kwargs):
+        if name in sys.modules:
+            return self.__original(name, *args, **kwargs)
+
+        self.__stack.append(0.0)
+        start = time.time()
+        try:
+            module = self.__original(name, *args, **kwargs)
+        finally:
+            elapsed = time.time() - start
+            children = self.__stack.pop()
+            if self.__stack:
+                self.__stack[-1] += elapsed
+
+        # implicit relative imports are recorded under the real module name
+        key = name if name in sys.modules else getattr(module, '__name__', name)
+        cumulative, own = self.timings.get(key, (0.0, 0.0))
+        self.timings[key] = (cumulative + elapsed, own + elapsed - children)
+        return module
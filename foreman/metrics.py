@@ -0,0 +1,399 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Metrics of the api requests for long-running programs embedding the bindings.
+
+    metrics = Metrics()
+    metrics.attach(connection)
+    metrics.serve(9464)                       # prometheus scrapes /metrics
+    metrics.write_textfile('/var/lib/node_exporter/foreman.prom')
+
+    connection.add_hook(StatsdHook('statsd.example.com', 8125))
+
+Requests are grouped by http method and endpoint template (/api/hosts/:id),
+so the number of series does not grow with the number of records.
+"""
+
+import BaseHTTPServer
+import os
+import re
+import socket
+import tempfile
+import threading
+import urllib
+
+from foreman.apipie import ApipieApi, RequestHook
+
+
+# seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+class Histogram(object):
+    """
+    Cumulative histogram in the prometheus sense
+
+    @ivar buckets: upper bounds of the buckets
+    @ivar counts: number of observations per bucket (not cumulative)
+    @ivar sum: sum of all observations
+    @ivar count: number of observations
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = 0
+        for bound in self.buckets:
+            if value <= bound:
+                break
+            index += 1
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """
+        @rtype: list of (str, int)
+        @return: upper bound as the le label and cumulative count, ending with +Inf
+        """
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (None,), self.counts):
+            total += count
+            result.append(('+Inf' if bound is None else _number(bound), total))
+        return result
+
+
+class EndpointIndex(object):
+    """
+    Maps request paths back to the route templates of the bindings,
+    /foreman/api/hosts/42/ -> /api/hosts/:id. Paths of unknown routes get
+    their numeric segments replaced by :id and the path prefix left out.
+    """
+
+    CACHE_SIZE = 10000
+
+    def __init__(self):
+        self.__known = 0
+        self.__templates = {}
+        self.__cache = {}
+        self.__lock = threading.Lock()
+
+    def endpoint(self, url):
+        """
+        @type url: str
+        @param url: requested url, with the path prefix and query
+        @rtype: str
+        """
+        path = url.split('?', 1)[0]
+        endpoint = self.__cache.get(path)
+        if endpoint is not None:
+            return endpoint
+
+        routes = ApipieApi.routes()
+        self.__lock.acquire()
+        try:
+            if len(routes) != self.__known:
+                self.__index(routes)
+            endpoint = self.__match([urllib.unquote(segment) for segment in path.split('/') if segment])
+            if len(self.__cache) >= self.CACHE_SIZE:
+                self.__cache.clear()
+            self.__cache[path] = endpoint
+        finally:
+            self.__lock.release()
+        return endpoint
+
+    def __index(self, routes):
+        templates = {}
+        for route in routes:
+            segments = [segment for segment in route.template.split('/') if segment]
+            literals = tuple((position, segment) for position, segment in enumerate(segments)
+                             if not segment.startswith(':'))
+            templates.setdefault(len(segments), []).append((len(route.params), literals, route.template))
+        for candidates in templates.values():
+            # prefer the most specific route, /api/hosts/new over /api/hosts/:id
+            candidates.sort()
+        self.__templates = templates
+        self.__known = len(routes)
+        self.__cache.clear()
+
+    def __match(self, segments):
+        # the path prefix (/foreman) comes before the templates' segments
+        for length in range(len(segments), 0, -1):
+            tail = segments[len(segments) - length:]
+            for params, literals, template in self.__templates.get(length, ()):
+                for position, literal in literals:
+                    if tail[position] != literal:
+                        break
+                else:
+                    return template
+        if 'api' in segments:
+            segments = segments[segments.index('api'):]
+        return '/' + '/'.join(':id' if segment.isdigit() else segment for segment in segments)
+
+
+class Metrics(RequestHook):
+    """
+    Collects the metrics of the requests of the connections it is attached to
+    and renders them in the prometheus text format.
+
+    @ivar buckets: upper bounds of the latency histogram in seconds
+    """
+
+    PREFIX = 'foreman_api'
+
+    def __init__(self, buckets=LATENCY_BUCKETS, size_buckets=SIZE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.size_buckets = tuple(size_buckets)
+        self.endpoints = EndpointIndex()
+        self.__requests = {}
+        self.__latency = {}
+        self.__request_sizes = {}
+        self.__response_sizes = {}
+        self.__retries = {}
+        self.__pools = []
+        self.__lock = threading.Lock()
+
+    def attach(self, connection):
+        """
+        Collect the requests of the connection and the utilization of its pool
+        @type connection: foreman.apipie.ServerConnection
+        """
+        connection.add_hook(self)
+        self.__lock.acquire()
+        try:
+            if connection.pool not in self.__pools:
+                self.__pools.append(connection.pool)
+        finally:
+            self.__lock.release()
+
+    def after_request(self, timings):
+        key = (timings.method, self.endpoints.endpoint(timings.url))
+        status = 'error' if timings.error is not None else str(timings.status)
+
+        self.__lock.acquire()
+        try:
+            self.__requests[key + (status,)] = self.__requests.get(key + (status,), 0) + 1
+            if timings.retries:
+                self.__retries[key] = self.__retries.get(key, 0) + timings.retries
+            if timings.total is not None:
+                self.__histogram(self.__latency, key, self.buckets).observe(timings.total)
+            self.__histogram(self.__request_sizes, key, self.size_buckets).observe(timings.request_bytes)
+            if timings.response_bytes is not None:
+                self.__histogram(self.__response_sizes, key, self.size_buckets).observe(timings.response_bytes)
+        finally:
+            self.__lock.release()
+
+    @classmethod
+    def __histogram(cls, histograms, key, buckets):
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(buckets)
+        return histogram
+
+    def render(self):
+        """
+        @rtype: str
+        @return: all metrics in the prometheus text exposition format
+        """
+        lines = []
+        name = self.PREFIX + '_requests_total'
+        self.__lock.acquire()
+        try:
+            lines.append('# HELP %s Requests sent, by method, endpoint and response status.' % name)
+            lines.append('# TYPE %s counter' % name)
+            for (method, endpoint, status), count in sorted(self.__requests.items()):
+                lines.append(_sample(name, {'method': method, 'endpoint': endpoint, 'status': status}, count))
+
+            name = self.PREFIX + '_retries_total'
+            lines.append('# HELP %s Requests sent again after a dropped connection or renewed credentials.' % name)
+            lines.append('# TYPE %s counter' % name)
+            for (method, endpoint), count in sorted(self.__retries.items()):
+                lines.append(_sample(name, {'method': method, 'endpoint': endpoint}, count))
+
+            for suffix, help, histograms in (
+                    ('_request_duration_seconds', 'Time from sending the request until the response was read.',
+                     self.__latency),
+                    ('_request_size_bytes', 'Size of the request bodies.', self.__request_sizes),
+                    ('_response_size_bytes', 'Size of the decompressed response bodies.', self.__response_sizes)):
+                name = self.PREFIX + suffix
+                lines.append('# HELP %s %s' % (name, help))
+                lines.append('# TYPE %s histogram' % name)
+                for (method, endpoint), histogram in sorted(histograms.items()):
+                    labels = {'method': method, 'endpoint': endpoint}
+                    for bound, count in histogram.cumulative():
+                        lines.append(_sample(name + '_bucket', dict(labels, le=bound), count))
+                    lines.append(_sample(name + '_sum', labels, histogram.sum))
+                    lines.append(_sample(name + '_count', labels, histogram.count))
+
+            pools = [pool.stats() for pool in self.__pools]
+        finally:
+            self.__lock.release()
+
+        for field, kind, help in (
+                ('in_use', 'gauge', 'Connections currently carrying a request.'),
+                ('peak_in_use', 'gauge', 'Most connections carrying a request at the same time.'),
+                ('idle', 'gauge', 'Idle keep-alive connections in the pool.'),
+                ('opened', 'counter', 'Connections opened.'),
+                ('reused', 'counter', 'Requests sent over a reused keep-alive connection.')):
+            name = '%s_pool_%s%s' % (self.PREFIX, field, '_total' if kind == 'counter' else '')
+            lines.append('# HELP %s %s' % (name, help))
+            lines.append('# TYPE %s %s' % (name, kind))
+            for index, stats in enumerate(pools):
+                lines.append(_sample(name, {'pool': str(index)}, stats[field]))
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path):
+        """
+        Write the metrics to a file, e.g. for the textfile collector of the
+        node exporter. The file is replaced atomically.
+        @type path: str
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.metrics')
+        try:
+            stream = os.fdopen(descriptor, 'w')
+            try:
+                stream.write(self.render())
+            finally:
+                stream.close()
+            os.chmod(temporary, 0644)
+            os.rename(temporary, path)
+        except:
+            os.unlink(temporary)
+            raise
+
+    def serve(self, port, host='127.0.0.1'):
+        """
+        Serve the metrics over http at /metrics from a background thread
+        @type port: int
+        @param port: port to listen on, 0 picks a free one
+        @type host: str
+        @param host: address to listen on
+        @rtype: BaseHTTPServer.HTTPServer
+        @return: the running server, its server_address tells the port and
+                 shutdown() stops it
+        """
+        metrics = self
+
+        class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = BaseHTTPServer.HTTPServer((host, port), Handler)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return server
+
+
+class StatsdHook(RequestHook):
+    """
+    Pushes every request to statsd over udp, or over a unix datagram socket
+    when a path is given:
+
+        <prefix>.requests.<method>.<endpoint>.<status>:1|c
+        <prefix>.latency.<method>.<endpoint>:<ms>|ms
+        <prefix>.request_bytes.<method>.<endpoint>:<bytes>|h
+        <prefix>.response_bytes.<method>.<endpoint>:<bytes>|h
+        <prefix>.retries.<method>.<endpoint>:<count>|c
+        <prefix>.pool.in_use:<count>|g
+
+    Sending never raises, lost packets are lost metrics.
+    """
+
+    __unsafe = re.compile(r'[^A-Za-z0-9_-]+')
+
+    def __init__(self, host='127.0.0.1', port=8125, prefix='foreman.api', path=None, pool=None):
+        """
+        @type path: str
+        @param path: unix datagram socket to send to instead of host and port
+        @type pool: foreman.apipie.ConnectionPool
+        @param pool: pool whose utilization is sent along with every request
+        """
+        self.prefix = prefix
+        self.endpoints = EndpointIndex()
+        self.pool = pool
+        if path:
+            self.__address = path
+            self.__socket = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        else:
+            self.__address = (host, port)
+            self.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def after_request(self, timings):
+        endpoint = self.endpoints.endpoint(timings.url)
+        name = '%s.%s' % (timings.method.lower(),
+                          '.'.join(self.__unsafe.sub('_', part) for part in endpoint.split('/') if part))
+        status = 'error' if timings.error is not None else str(timings.status)
+
+        lines = ['%s.requests.%s.%s:1|c' % (self.prefix, name, status)]
+        if timings.total is not None:
+            lines.append('%s.latency.%s:%.3f|ms' % (self.prefix, name, timings.total * 1000))
+        lines.append('%s.request_bytes.%s:%d|h' % (self.prefix, name, timings.request_bytes))
+        if timings.response_bytes is not None:
+            lines.append('%s.response_bytes.%s:%d|h' % (self.prefix, name, timings.response_bytes))
+        if timings.retries:
+            lines.append('%s.retries.%s:%d|c' % (self.prefix, name, timings.retries))
+        if self.pool is not None:
+            stats = self.pool.stats()
+            lines.append('%s.pool.in_use:%d|g' % (self.prefix, stats['in_use']))
+            lines.append('%s.pool.idle:%d|g' % (self.prefix, stats['idle']))
+        self.send('\n'.join(lines))
+
+    def send(self, packet):
+        try:
+            self.__socket.sendto(packet, self.__address)
+        except socket.error:
+            pass
+
+    def close(self):
+        self.__socket.close()
+
+
+def _sample(name, labels, value):
+    if labels:
+        pairs = ','.join('%s="%s"' % (key, _escape(labels[key])) for key in sorted(labels))
+        return '%s{%s} %s' % (name, pairs, _number(value))
+    return '%s %s' % (name, _number(value))
+
+
+def _escape(value):
+    if isinstance(value, unicode):
+        value = value.encode('utf-8')
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Local SQLite copy of the inventory for reporting queries.
+
+    mirror = Mirror(bindings, '~/.foreman/mirror.sqlite')
+    mirror.pull()       # everything, once
+    mirror.sync()       # only what the audits recorded since the last pull or sync
+    mirror.query('SELECT name FROM hosts WHERE hostgroup_id = ?', (3,))
+
+Tables: hosts, hostgroups, puppetclasses, host_puppetclasses, parameters
+(host parameters) and facts. Every record table has the full record as json
+in its data column next to the columns worth querying.
+
+Foreman does not audit fact uploads, sync refreshes the facts of the hosts
+it touches, pull(facts=True) or sync(facts=True) fetches all of them again.
+"""
+
+import os
+import Queue
+import sqlite3
+import threading
+import time
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+from foreman.apipie import ServerRequestError
+from foreman.facts import host_facts
+
+
+DEFAULT_DATABASE = os.path.join('~', '.foreman', 'mirror.sqlite')
+
+HOST_COLUMNS = ('name', 'ip', 'mac', 'hostgroup_id', 'environment_id', 'operatingsystem_id',
+                'architecture_id', 'domain_id', 'subnet_id', 'enabled', 'build',
+                'created_at', 'updated_at')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS hosts (
+    id INTEGER PRIMARY KEY,
+    %s,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS hosts_name ON hosts (name);
+CREATE INDEX IF NOT EXISTS hosts_hostgroup ON hosts (hostgroup_id);
+CREATE TABLE IF NOT EXISTS hostgroups (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS puppetclasses (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    data TEXT
+);
+CREATE TABLE IF NOT EXISTS host_puppetclasses (
+    host_id INTEGER,
+    puppetclass_id INTEGER,
+    PRIMARY KEY (host_id, puppetclass_id)
+);
+CREATE TABLE IF NOT EXISTS parameters (
+    host_id INTEGER,
+    id INTEGER,
+    name TEXT,
+    value TEXT,
+    PRIMARY KEY (host_id, id)
+);
+CREATE INDEX IF NOT EXISTS parameters_name ON parameters (name);
+CREATE TABLE IF NOT EXISTS facts (
+    host_id INTEGER,
+    name TEXT,
+    value TEXT,
+    PRIMARY KEY (host_id, name)
+);
+CREATE INDEX IF NOT EXISTS facts_name ON facts (name, value);
+""" % ',\n    '.join('%s %s' % (column, 'INTEGER' if column.endswith('_id') else 'TEXT')
+                       for column in HOST_COLUMNS)
+
+# auditable types of the records the mirror keeps
+HOST_TYPES = ('Host', 'Host::Base', 'Host::Managed')
+PARAMETER_TYPES = ('Parameter', 'HostParameter')
+
+
+class Mirror(object):
+    """
+    @ivar path: the sqlite database
+    @ivar per_page: page size of the index calls
+    @ivar concurrency: number of hosts whose parameters and classes are fetched at once
+    """
+
+    def __init__(self, bindings, path=None, per_page=1000, concurrency=8):
+        """
+        @type bindings: foreman.bindings.Bindings
+        """
+        self.bindings = bindings
+        self.path = os.path.expanduser(path or DEFAULT_DATABASE)
+        self.per_page = per_page
+        self.concurrency = concurrency
+
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory, 0700)
+        self.db = sqlite3.connect(self.path)
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def meta(self, key, default=None):
+        row = self.db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def query(self, sql, args=()):
+        """
+        @rtype: (list of str, list of tuple)
+        @return: column names and rows of the result
+        """
+        cursor = self.db.execute(sql, args)
+        columns = [column[0] for column in cursor.description or ()]
+        return columns, cursor.fetchall()
+
+    def pull(self, facts=True):
+        """
+        Replace the mirror with a full copy of the inventory
+        @type facts: boolean
+        @param facts: set False to skip the facts, the slowest part
+        @rtype: dict
+        @return: number of records pulled per table
+        """
+        # changes made while pulling are applied by the next sync
+        last_audit_id = self.__latest_audit_id()
+        counts = {}
+        try:
+            self.db.execute('DELETE FROM hosts')
+            self.db.execute('DELETE FROM hostgroups')
+            self.db.execute('DELETE FROM puppetclasses')
+            self.db.execute('DELETE FROM host_puppetclasses')
+            self.db.execute('DELETE FROM parameters')
+
+            host_ids = []
+            for host in self.__all(self.bindings.host):
+                self.__store_host(host)
+                host_ids.append(host['id'])
+            counts['hosts'] = len(host_ids)
+            counts['hostgroups'] = self.__store_all('hostgroups', self.__all(self.bindings.hostgroup))
+            counts['puppetclasses'] = self.__store_all('puppetclasses', self.__all(self.bindings.puppetclass))
+            counts['parameters'] = self.__refresh_host_details(host_ids)
+            if facts:
+                counts['facts'] = self.__pull_facts()
+
+            self.__set_meta('last_audit_id', last_audit_id)
+            self.__set_meta('pulled_at', int(time.time()))
+            self.__set_meta('synced_at', int(time.time()))
+            self.db.commit()
+        except:
+            self.db.rollback()
+            raise
+        return counts
+
+    def sync(self, facts=False):
+        """
+        Apply the changes recorded by the audits since the last pull or sync
+        @type facts: boolean
+        @param facts: fetch the facts of all hosts again
+        @rtype: dict
+        @return: number of audits read and of records refreshed and removed
+        """
+        last_audit_id = int(self.meta('last_audit_id') or 0)
+        audit_api = self.bindings.audit
+        audits = [_unwrap(audit) for audit in audit_api.paginate(audit_api.index,
+                  {'search': 'id > %d' % last_audit_id, 'order': 'id ASC'}, self.per_page)]
+        audits.sort(key=lambda audit: audit['id'])
+
+        # only the last action on a record matters
+        hosts, hostgroups, puppetclasses, host_details = {}, {}, {}, set()
+        for audit in audits:
+            kind, record_id, action = audit.get('auditable_type'), audit.get('auditable_id'), audit.get('action')
+            if kind in HOST_TYPES:
+                hosts[record_id] = action
+                host_details.add(record_id)
+            elif kind == 'Hostgroup':
+                hostgroups[record_id] = action
+            elif kind == 'Puppetclass':
+                puppetclasses[record_id] = action
+            elif kind in PARAMETER_TYPES + ('HostClass',) and \
+                    (audit.get('associated_type') or '').startswith('Host') and audit.get('associated_id'):
+                host_details.add(audit['associated_id'])
+
+        counts = {'audits': len(audits), 'removed': 0}
+        try:
+            for record_id, action in hosts.items():
+                host = None if action == 'destroy' else self.__show(self.bindings.host, record_id)
+                if host is None:
+                    self.__delete_host(record_id)
+                    host_details.discard(record_id)
+                    counts['removed'] += 1
+                else:
+                    self.__store_host(host)
+            counts['hosts'] = len(hosts)
+
+            for table, api, changes in (('hostgroups', self.bindings.hostgroup, hostgroups),
+                                        ('puppetclasses', self.bindings.puppetclass, puppetclasses)):
+                for record_id, action in changes.items():
+                    record = None if action == 'destroy' else self.__show(api, record_id)
+                    if record is None:
+                        self.db.execute('DELETE FROM %s WHERE id = ?' % table, (record_id,))
+                        counts['removed'] += 1
+                    else:
+                        self.__store_all(table, [record])
+                counts[table] = len(changes)
+
+            known = set(row[0] for row in self.db.execute('SELECT id FROM hosts'))
+            host_details = [host_id for host_id in host_details if host_id in known]
+            self.__refresh_host_details(host_details)
+            if facts:
+                counts['facts'] = self.__pull_facts()
+            else:
+                counts['facts'] = self.__refresh_facts(host_details)
+
+            if audits:
+                self.__set_meta('last_audit_id', audits[-1]['id'])
+            self.__set_meta('synced_at', int(time.time()))
+            self.db.commit()
+        except:
+            self.db.rollback()
+            raise
+        return counts
+
+    # fetching ----------------------------------------------------------------
+
+    def __all(self, api):
+        for record in api.paginate_concurrently(api.index, per_page=self.per_page):
+            yield _unwrap(record)
+
+    def __show(self, api, record_id):
+        response = api.show({'id': record_id})
+        if response.status == 404:
+            return None
+        if response.status >= 300:
+            raise ServerRequestError(response)
+        return _unwrap(response.body)
+
+    def __latest_audit_id(self):
+        response = self.bindings.audit.index({'order': 'id DESC', 'per_page': 1})
+        if response.status >= 300:
+            raise ServerRequestError(response)
+        records = self.bindings.audit.page_records(response.body)
+        return _unwrap(records[0])['id'] if records else 0
+
+    def __host_details(self, host_id):
+        parameters = self.bindings.parameter.index({'host_id': host_id, 'per_page': self.per_page})
+        classes = self.bindings.host_class.index({'host_id': host_id})
+        for response in (parameters, classes):
+            if response.status >= 300:
+                raise ServerRequestError(response)
+        return ([_unwrap(record) for record in self.bindings.parameter.page_records(parameters.body)],
+                self.bindings.host_class.page_records(classes.body))
+
+    # storing -----------------------------------------------------------------
+
+    def __set_meta(self, key, value):
+        self.db.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, str(value)))
+
+    def __store_host(self, host):
+        columns = ('id',) + HOST_COLUMNS + ('data',)
+        values = [host['id']] + [_column(host.get(column)) for column in HOST_COLUMNS] + [json.dumps(host)]
+        self.db.execute('INSERT OR REPLACE INTO hosts (%s) VALUES (%s)'
+                        % (', '.join(columns), ', '.join('?' * len(columns))), values)
+
+    def __delete_host(self, host_id):
+        for table, column in (('hosts', 'id'), ('host_puppetclasses', 'host_id'),
+                              ('parameters', 'host_id'), ('facts', 'host_id')):
+            self.db.execute('DELETE FROM %s WHERE %s = ?' % (table, column), (host_id,))
+
+    def __store_all(self, table, records):
+        count = 0
+        for record in records:
+            self.db.execute('INSERT OR REPLACE INTO %s (id, name, data) VALUES (?, ?, ?)' % table,
+                            (record['id'], record.get('title') or record.get('name'), json.dumps(record)))
+            count += 1
+        return count
+
+    def __refresh_host_details(self, host_ids):
+        """
+        Replace the parameters and puppet classes of the hosts
+        @rtype: int
+        @return: number of parameters stored
+        """
+        count = 0
+        self.bindings.connection.pool.reserve(self.concurrency)
+        for host_id, (parameters, class_ids) in _concurrently(self.__host_details, host_ids, self.concurrency):
+            self.db.execute('DELETE FROM parameters WHERE host_id = ?', (host_id,))
+            self.db.execute('DELETE FROM host_puppetclasses WHERE host_id = ?', (host_id,))
+            self.db.executemany('INSERT OR REPLACE INTO parameters (host_id, id, name, value) VALUES (?, ?, ?, ?)',
+                                [(host_id, parameter['id'], parameter.get('name'), _column(parameter.get('value')))
+                                 for parameter in parameters])
+            self.db.executemany('INSERT OR REPLACE INTO host_puppetclasses (host_id, puppetclass_id) VALUES (?, ?)',
+                                [(host_id, _unwrap(class_id)) for class_id in class_ids])
+            count += len(parameters)
+        return count
+
+    def __pull_facts(self):
+        self.db.execute('DELETE FROM facts')
+        return self.__store_facts(host_facts(self.bindings.fact_value, per_page=self.per_page))
+
+    def __refresh_facts(self, host_ids):
+        names = []
+        for host_id in host_ids:
+            row = self.db.execute('SELECT name FROM hosts WHERE id = ?', (host_id,)).fetchone()
+            if row:
+                names.append(row[0])
+        count = 0
+        for name in names:
+            count += self.__store_facts(host_facts(self.bindings.fact_value, {'search': 'host = %s' % name},
+                                                   self.per_page), [name])
+        return count
+
+    def __store_facts(self, facts, replace=()):
+        """
+        Merge facts into the stored ones, a host can come more than once with
+        part of its facts (see foreman.facts)
+        @type facts: iterable of (str, dict)
+        @param facts: host names and their facts
+        @type replace: list of str
+        @param replace: hosts whose stored facts are dropped first
+        """
+        ids = dict(self.db.execute('SELECT name, id FROM hosts'))
+        for name in replace:
+            if name in ids:
+                self.db.execute('DELETE FROM facts WHERE host_id = ?', (ids[name],))
+        count = 0
+        for name, values in facts:
+            host_id = ids.get(name)
+            if host_id is None:
+                continue
+            self.db.executemany('INSERT OR REPLACE INTO facts (host_id, name, value) VALUES (?, ?, ?)',
+                                [(host_id, fact, _column(value)) for fact, value in values.iteritems()])
+            count += len(values)
+        return count
+
+
+def _unwrap(record):
+    # records may come wrapped in their resource name, {"host": {...}}
+    if isinstance(record, dict) and len(record) == 1 and isinstance(record.values()[0], dict):
+        return record.values()[0]
+    return record
+
+
+def _column(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    if isinstance(value, bool):
+        return int(value)
+    return value
+
+
+def _concurrently(function, items, concurrency):
+    """
+    Call the function for every item from `concurrency` threads
+    @rtype: generator of (item, result)
+    @return: results in the order the calls finish
+    @raise Exception: the first error of a call, the remaining calls are dropped
+    """
+    items = list(items)
+    todo = Queue.Queue()
+    done = Queue.Queue()
+    for item in items:
+        todo.put(item)
+
+    def work():
+        while True:
+            try:
+                item = todo.get_nowait()
+            except Queue.Empty:
+                return
+            try:
+                done.put((item, function(item), None))
+            except Exception, e:
+                done.put((item, None, e))
+
+    threads = [threading.Thread(target=work) for i in range(max(min(concurrency, len(items)), 1))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+
+    try:
+        for i in range(len(items)):
+            item, result, error = done.get()
+            if error is not None:
+                raise error
+            yield item, result
+    finally:
+        # let the workers run out of work
+        while True:
+            try:
+                todo.get_nowait()
+            except Queue.Empty:
+                break
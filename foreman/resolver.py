@@ -0,0 +1,307 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Translation between the names and ids of the small catalogs (architectures,
+domains, operating systems, ...) that hosts and hostgroups refer to.
+
+    resolver = bindings.resolver
+    resolver.id('domain', 'example.com')                      # -> 2
+    bindings.host.create({'host': resolver.resolve({
+        'name': 'web01', 'domain_id': 'example.com', 'architecture_name': 'x86_64'})})
+
+A catalog is loaded in full with one paginated index call and kept for `ttl`
+seconds, in memory and in a file shared by the processes that use the same
+server and credentials, the records a user may see depend on their role.
+Every create, update or destroy of a catalog record sent through the
+connection drops that catalog, it is loaded again on the next lookup.
+"""
+
+import hashlib
+import os
+import tempfile
+import threading
+import time
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+from foreman.apipie import RequestHook
+
+
+# bindings resource -> path of its api
+CATALOGS = {
+    'architecture':     'architectures',
+    'compute_resource': 'compute_resources',
+    'domain':           'domains',
+    'environment':      'environments',
+    'hostgroup':        'hostgroups',
+    'medium':           'media',
+    'model':            'models',
+    'operating_system': 'operatingsystems',
+    'ptable':           'ptables',
+    'puppetclass':      'puppetclasses',
+    'smart_proxy':      'smart_proxies',
+    'subnet':           'subnets',
+}
+
+# host and hostgroup attribute -> bindings resource
+ATTRIBUTES = {
+    'architecture_id':     'architecture',
+    'compute_resource_id': 'compute_resource',
+    'domain_id':           'domain',
+    'environment_id':      'environment',
+    'hostgroup_id':        'hostgroup',
+    'medium_id':           'medium',
+    'model_id':            'model',
+    'operatingsystem_id':  'operating_system',
+    'ptable_id':           'ptable',
+    'puppet_proxy_id':     'smart_proxy',
+    'puppet_ca_proxy_id':  'smart_proxy',
+    'subnet_id':           'subnet',
+}
+
+# record fields a record can be looked up by
+NAME_FIELDS = ('name', 'title', 'label')
+
+
+class ResolveError(Exception):
+    """
+    Raised when a name matches no record or more than one
+    """
+    pass
+
+
+class Catalog(object):
+    """
+    All records of one resource indexed by id and by name
+
+    @ivar loaded_at: time the records were fetched
+    @ivar names: id -> name
+    @ivar ids: name -> list of ids, more than one for ambiguous names
+    """
+
+    def __init__(self, records, loaded_at):
+        self.loaded_at = loaded_at
+        self.records = records
+        self.names = {}
+        self.ids = {}
+        for record in records:
+            self.names[record['id']] = record.get('name')
+            for field in NAME_FIELDS:
+                name = record.get(field)
+                if name is not None and record['id'] not in self.ids.get(name, ()):
+                    self.ids.setdefault(name, []).append(record['id'])
+
+    @classmethod
+    def from_records(cls, records, loaded_at=None):
+        """
+        @type records: list of dict
+        @param records: records of an index response, wrapped in their
+                        resource name or not
+        """
+        compact = []
+        for record in records:
+            if len(record) == 1 and isinstance(record.values()[0], dict):
+                record = record.values()[0]
+            compact.append(dict((field, record[field]) for field in ('id',) + NAME_FIELDS if field in record))
+        return cls(compact, loaded_at or time.time())
+
+
+class Resolver(object):
+    """
+    @ivar ttl: seconds a loaded catalog is used before it is fetched again
+    @ivar directory: where the catalogs are shared between processes, None
+                     keeps them in memory only
+    """
+
+    DEFAULT_DIRECTORY = os.path.join('~', '.foreman', 'resolver')
+
+    def __init__(self, bindings, ttl=300, directory=DEFAULT_DIRECTORY, per_page=1000):
+        """
+        @type bindings: foreman.bindings.Bindings
+        """
+        self.bindings = bindings
+        self.ttl = ttl
+        self.per_page = per_page
+        self.directory = None
+        if directory:
+            connection = bindings.connection
+            server = '%s:%s%s\0%s' % (connection.host, connection.port, connection.path_prefix,
+                                       connection.auth_method.identity() or '')
+            self.directory = os.path.join(os.path.expanduser(directory), hashlib.sha1(server).hexdigest()[:16])
+        self.__catalogs = {}
+        self.__lock = threading.RLock()
+        bindings.connection.add_hook(_Invalidator(self))
+
+    def id(self, resource, name):
+        """
+        @type resource: str
+        @param resource: bindings resource of the catalog, e.g. 'domain'
+        @type name: str or int
+        @param name: name, title or label of the record, ids are returned as they are
+        @rtype: int
+        @raise ResolveError: if no record or more than one has the name
+        """
+        if isinstance(name, (int, long)) or (isinstance(name, basestring) and name.isdigit()):
+            return int(name)
+        ids = self.catalog(resource).ids.get(name)
+        if not ids:
+            # the record may be newer than the catalog
+            ids = self.catalog(resource, reload=True).ids.get(name)
+        if not ids:
+            raise ResolveError(_('%s "%s" not found') % (resource, name))
+        if len(ids) > 1:
+            raise ResolveError(_('%s "%s" is ambiguous, it matches ids %s')
+                               % (resource, name, ', '.join(str(i) for i in sorted(ids))))
+        return ids[0]
+
+    def name(self, resource, id):
+        """
+        @rtype: str
+        @raise ResolveError: if there is no record with the id
+        """
+        names = self.catalog(resource).names
+        if int(id) not in names:
+            names = self.catalog(resource, reload=True).names
+        if int(id) not in names:
+            raise ResolveError(_('%s with id %s not found') % (resource, id))
+        return names[int(id)]
+
+    def resolve(self, attributes):
+        """
+        Replace the names in the id attributes of a host or hostgroup,
+        `domain_id: "example.com"` or `domain_name: "example.com"` both
+        become `domain_id: 2`
+        @type attributes: dict
+        @rtype: dict
+        @return: copy of the attributes with ids only
+        @raise ResolveError: if a name cannot be resolved
+        """
+        resolved = dict(attributes)
+        for key, value in attributes.items():
+            if key.endswith('_name') and key[:-len('_name')] + '_id' in ATTRIBUTES:
+                del resolved[key]
+                key = key[:-len('_name')] + '_id'
+            if key in ATTRIBUTES and value is not None:
+                resolved[key] = self.id(ATTRIBUTES[key], value)
+        return resolved
+
+    def catalog(self, resource, reload=False):
+        """
+        @rtype: Catalog
+        @return: the catalog of the resource, fetched if it is not known or too old
+        """
+        self.__lock.acquire()
+        try:
+            catalog = self.__catalogs.get(resource)
+            if reload or catalog is None or self.__expired(catalog):
+                catalog = None if reload else self.__read(resource)
+                if catalog is None or self.__expired(catalog):
+                    catalog = self.__fetch(resource)
+                    self.__write(resource, catalog)
+                self.__catalogs[resource] = catalog
+            return catalog
+        finally:
+            self.__lock.release()
+
+    def invalidate(self, resource=None):
+        """
+        Drop the catalog of a resource, or all catalogs, from memory and disk
+        """
+        self.__lock.acquire()
+        try:
+            for name in [resource] if resource else CATALOGS.keys():
+                self.__catalogs.pop(name, None)
+                if self.directory:
+                    try:
+                        os.unlink(self.__path(name))
+                    except OSError:
+                        pass
+        finally:
+            self.__lock.release()
+
+    def __expired(self, catalog):
+        return time.time() - catalog.loaded_at > self.ttl
+
+    def __fetch(self, resource):
+        if resource not in CATALOGS:
+            raise ResolveError(_('%s is not a catalog the resolver knows') % resource)
+        api = getattr(self.bindings, resource)
+        loaded_at = time.time()
+        return Catalog.from_records(list(api.paginate(api.index, per_page=self.per_page)), loaded_at)
+
+    def __path(self, resource):
+        return os.path.join(self.directory, resource + '.json')
+
+    def __read(self, resource):
+        if not self.directory:
+            return None
+        try:
+            stream = open(self.__path(resource))
+        except IOError:
+            return None
+        try:
+            try:
+                data = json.load(stream)
+                return Catalog(data['records'], data['loaded_at'])
+            except (ValueError, KeyError):
+                return None
+        finally:
+            stream.close()
+
+    def __write(self, resource, catalog):
+        if not self.directory:
+            return
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory, 0700)
+            except OSError:
+                if not os.path.isdir(self.directory):
+                    raise
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, prefix='.' + resource)
+        try:
+            stream = os.fdopen(descriptor, 'w')
+            try:
+                json.dump({'loaded_at': catalog.loaded_at, 'records': catalog.records}, stream)
+            finally:
+                stream.close()
+            os.rename(temporary, self.__path(resource))
+        except:
+            os.unlink(temporary)
+            raise
+
+
+class _Invalidator(RequestHook):
+    """
+    Drops a catalog when one of its records is changed through the connection
+    """
+
+    __resources = dict((path, resource) for resource, path in CATALOGS.items())
+
+    def __init__(self, resolver):
+        self.resolver = resolver
+
+    def after_request(self, timings):
+        if timings.method not in ('POST', 'PUT', 'DELETE'):
+            return
+        segments = [segment for segment in timings.url.split('?', 1)[0].split('/') if segment]
+        if 'api' not in segments:
+            return
+        segments = segments[segments.index('api') + 1:]
+        resource = self.__resources.get(segments[0]) if segments else None
+        if resource is not None:
+            # also when the request failed, it may have been applied anyway
+            self.resolver.invalidate(resource)
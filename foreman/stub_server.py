@@ -0,0 +1,737 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+"""
+Stand-in for the Foreman api for load testing the client without a server.
+
+Serves the /api routes of hosts, reports, fact_values, audits, puppetclass_ids,
+host parameters and the small catalogs (architectures, domains, ...) from a
+synthetic inventory. Records are generated from their id on every request, so
+100k hosts take no memory, only changes made through the api are stored.
+
+In process:
+
+    server = StubServer(SyntheticInventory(hosts=100000), latency=0.01)
+    server.start()
+    connection = ServerConnection('127.0.0.1', server.port, 'http')
+    ...
+    server.stop()
+
+Standalone:
+
+    python -m foreman.stub_server --hosts 100000 --port 3000 --error-rate 0.01
+"""
+
+import BaseHTTPServer
+import gzip
+import hashlib
+import random
+import re
+import SocketServer
+import threading
+import time
+import urlparse
+from optparse import OptionParser
+from StringIO import StringIO
+
+try:
+    import json
+except ImportError:
+    import simplejson as json
+
+
+TIMESTAMP = '2013-01-01T00:00:00Z'
+
+CATALOGS = {
+    'architectures':    ['x86_64', 'i386', 'ppc64', 's390x'],
+    'domains':          ['example.com', 'lab.example.com', 'dmz.example.com'],
+    'environments':     ['production', 'development', 'testing'],
+    'hostgroups':       ['base', 'web', 'db', 'cache', 'batch'],
+    'media':            ['CentOS mirror', 'Fedora mirror', 'RHEL mirror'],
+    'operatingsystems': ['CentOS 6.4', 'Fedora 18', 'RHEL 6.4'],
+    'ptables':          ['Kickstart default', 'LVM', 'RAID1'],
+    'puppetclasses':    ['ntp', 'ssh', 'apache', 'postgresql', 'memcached', 'motd'],
+    'subnets':          ['10.0.0.0/16', '10.1.0.0/16', '10.2.0.0/16'],
+}
+
+FACT_NAMES = ['architecture', 'operatingsystem', 'kernelversion', 'processorcount',
+              'memorysize_mb', 'ipaddress', 'macaddress', 'virtual', 'uptime_days']
+
+
+class SyntheticInventory(object):
+    """
+    Deterministic fake Foreman data scaled to any number of hosts.
+
+    @ivar hosts: number of generated hosts
+    @ivar facts_per_host: number of facts of every host
+    @ivar reports_per_host: number of reports of every host
+    """
+
+    def __init__(self, hosts=1000, facts_per_host=20, reports_per_host=1):
+        self.hosts = hosts
+        self.facts_per_host = facts_per_host
+        self.reports_per_host = reports_per_host
+        self.lock = threading.RLock()
+        self.__changed = {}
+        self.__deleted = set()
+        self.__next_id = hosts + 1
+        self.__host_ids = None
+        self.__puppetclass_ids = {}
+        self.__parameters = {}
+        self.audits = []
+
+    # hosts -------------------------------------------------------------------
+
+    def host_ids(self):
+        with self.lock:
+            if not self.__changed and not self.__deleted:
+                return xrange(1, self.hosts + 1)
+            if self.__host_ids is None:
+                ids = set(xrange(1, self.hosts + 1)) | set(self.__changed)
+                self.__host_ids = sorted(ids - self.__deleted)
+            return self.__host_ids
+
+    def host(self, host_id):
+        with self.lock:
+            if host_id in self.__deleted:
+                return None
+            if host_id in self.__changed:
+                return dict(self.__changed[host_id])
+        if 1 <= host_id <= self.hosts:
+            return self._generate_host(host_id)
+        return None
+
+    def _generate_host(self, host_id):
+        def pick(catalog):
+            return host_id % len(CATALOGS[catalog]) + 1
+
+        domain = CATALOGS['domains'][pick('domains') - 1]
+        return {
+            'id': host_id,
+            'name': 'host%06d.%s' % (host_id, domain),
+            'ip': '10.%d.%d.%d' % (host_id >> 16 & 255, host_id >> 8 & 255, host_id & 255),
+            'mac': '52:54:00:%02x:%02x:%02x' % (host_id >> 16 & 255, host_id >> 8 & 255, host_id & 255),
+            'architecture_id': pick('architectures'),
+            'domain_id': pick('domains'),
+            'environment_id': pick('environments'),
+            'hostgroup_id': pick('hostgroups'),
+            'medium_id': pick('media'),
+            'operatingsystem_id': pick('operatingsystems'),
+            'ptable_id': pick('ptables'),
+            'subnet_id': pick('subnets'),
+            'build': False,
+            'enabled': True,
+            'created_at': TIMESTAMP,
+            'updated_at': TIMESTAMP,
+        }
+
+    def create_host(self, attributes):
+        with self.lock:
+            host_id = self.__next_id
+            self.__next_id += 1
+            host = dict(attributes, id=host_id, created_at=_now(), updated_at=_now())
+            self.__changed[host_id] = host
+            self.__host_ids = None
+            self.audit('Host', host_id, 'create', attributes)
+            return dict(host)
+
+    def update_host(self, host_id, attributes):
+        with self.lock:
+            host = self.host(host_id)
+            if host is None:
+                return None
+            host.update(attributes)
+            host['updated_at'] = _now()
+            self.__changed[host_id] = host
+            self.audit('Host', host_id, 'update', attributes)
+            return dict(host)
+
+    def destroy_host(self, host_id):
+        with self.lock:
+            host = self.host(host_id)
+            if host is None:
+                return None
+            self.__changed.pop(host_id, None)
+            self.__deleted.add(host_id)
+            self.__host_ids = None
+            self.audit('Host', host_id, 'destroy', {})
+            return host
+
+    # facts -------------------------------------------------------------------
+
+    def facts(self, host_id):
+        names = FACT_NAMES + ['custom_fact_%03d' % i for i in range(max(self.facts_per_host - len(FACT_NAMES), 0))]
+        values = {
+            'architecture': CATALOGS['architectures'][host_id % 4],
+            'operatingsystem': CATALOGS['operatingsystems'][host_id % 3].split()[0],
+            'kernelversion': '2.6.32-%d' % (358 + host_id % 5),
+            'processorcount': str(2 ** (host_id % 5)),
+            'memorysize_mb': str(1024 * (1 + host_id % 16)),
+            'ipaddress': '10.%d.%d.%d' % (host_id >> 16 & 255, host_id >> 8 & 255, host_id & 255),
+            'macaddress': '52:54:00:%02x:%02x:%02x' % (host_id >> 16 & 255, host_id >> 8 & 255, host_id & 255),
+            'virtual': ('kvm', 'physical', 'vmware')[host_id % 3],
+            'uptime_days': str(host_id % 365),
+        }
+        return [(name, values.get(name) or 'value_%d' % ((host_id + i) % 7))
+                for i, name in enumerate(names[:self.facts_per_host])]
+
+    # reports -----------------------------------------------------------------
+
+    def report(self, report_id):
+        host_ids = self.host_ids()
+        count = len(host_ids) * self.reports_per_host
+        if not 1 <= report_id <= count:
+            return None
+        host = self.host(host_ids[(report_id - 1) // self.reports_per_host])
+        return {
+            'id': report_id,
+            'host_id': host['id'],
+            'host_name': host['name'],
+            'reported_at': TIMESTAMP,
+            'status': {'applied': report_id % 3, 'restarted': 0, 'failed': int(report_id % 50 == 0),
+                       'failed_restarts': 0, 'skipped': 0, 'pending': 0},
+            'metrics': {'time': {'total': 1.5 + report_id % 10}},
+        }
+
+    # puppetclass ids and parameters ------------------------------------------
+
+    def puppetclass_ids(self, host_id):
+        with self.lock:
+            if host_id not in self.__puppetclass_ids:
+                count = len(CATALOGS['puppetclasses'])
+                return [host_id % count + 1, (host_id + 1) % count + 1]
+            return list(self.__puppetclass_ids[host_id])
+
+    def set_puppetclass_ids(self, host_id, ids):
+        with self.lock:
+            self.__puppetclass_ids[host_id] = list(ids)
+            self.audit('Host', host_id, 'update', {'puppetclass_ids': list(ids)})
+
+    def parameters(self, host_id):
+        with self.lock:
+            if host_id not in self.__parameters:
+                self.__parameters[host_id] = [
+                    {'id': 1, 'name': 'owner', 'value': 'team%d' % (host_id % 10)},
+                    {'id': 2, 'name': 'rack', 'value': 'r%03d' % (host_id // 40)},
+                ]
+            return self.__parameters[host_id]
+
+    # audits ------------------------------------------------------------------
+
+    def audit(self, auditable_type, auditable_id, action, changes, associated_type=None, associated_id=None):
+        with self.lock:
+            self.audits.append({
+                'id': len(self.audits) + 1,
+                'auditable_type': auditable_type,
+                'auditable_id': auditable_id,
+                'associated_type': associated_type,
+                'associated_id': associated_id,
+                'action': action,
+                'audited_changes': changes,
+                'created_at': _now(),
+            })
+
+
+def _now():
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+
+
+# search ----------------------------------------------------------------------
+
+_condition = re.compile(r'^\s*(\w+)\s*(=|!=|~|>=|<=|>|<)\s*"?([^"]*?)"?\s*$')
+
+
+def search_filter(search):
+    """
+    Compile the small subset of the scoped search syntax the stub understands:
+    `field op value` conditions joined by `and`, op being one of = != ~ > < >= <=
+    @rtype: callable
+    @return: predicate taking a record
+    """
+    conditions = []
+    for part in re.split(r'\s+and\s+', search or '', flags=re.I):
+        if not part.strip():
+            continue
+        match = _condition.match(part)
+        if match is None:
+            raise ValueError('unsupported search condition: %s' % part)
+        conditions.append(match.groups())
+
+    def compare(value, op, expected):
+        if op == '~':
+            return expected.lower() in unicode(value).lower()
+        if op in ('=', '!='):
+            return (unicode(value) == expected) == (op == '=')
+        try:
+            value, expected = float(value), float(expected)
+        except (TypeError, ValueError):
+            value = unicode(value)
+        return {'>': value > expected, '<': value < expected,
+                '>=': value >= expected, '<=': value <= expected}[op]
+
+    return lambda record: all(compare(record.get(field), op, expected)
+                              for field, op, expected in conditions)
+
+
+# http ------------------------------------------------------------------------
+
+class StubError(Exception):
+
+    def __init__(self, status, message):
+        Exception.__init__(self, message)
+        self.status = status
+
+
+class StubHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+    # buffer the response and send it in one go, header lines written one
+    # by one would otherwise hit nagle and delayed acks on every request
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    ROUTES = [
+        ('GET',    r'/api/hosts/?$',                                   'hosts_index'),
+        ('POST',   r'/api/hosts/?$',                                   'hosts_create'),
+        ('GET',    r'/api/hosts/(?P<id>\d+)/?$',                       'hosts_show'),
+        ('PUT',    r'/api/hosts/(?P<id>\d+)/?$',                       'hosts_update'),
+        ('DELETE', r'/api/hosts/(?P<id>\d+)/?$',                       'hosts_destroy'),
+        ('GET',    r'/api/hosts/(?P<id>\d+)/status/?$',                'hosts_status'),
+        ('GET',    r'/api/hosts/(?P<host_id>\d+)/facts/?$',            'fact_values_index'),
+        ('GET',    r'/api/hosts/(?P<host_id>\d+)/reports/last/?$',     'reports_last'),
+        ('GET',    r'/api/hosts/(?P<host_id>\d+)/audits/?$',           'audits_index'),
+        ('GET',    r'/api/hosts/(?P<host_id>\d+)/puppetclass_ids/?$',  'puppetclass_ids_index'),
+        ('POST',   r'/api/hosts/(?P<host_id>\d+)/puppetclass_ids/?$',  'puppetclass_ids_create'),
+        ('DELETE', r'/api/hosts/(?P<host_id>\d+)/puppetclass_ids/(?P<id>\d+)/?$', 'puppetclass_ids_destroy'),
+        ('GET',    r'/api/hosts?/(?P<host_id>\d+)/parameters/?$',      'parameters_index'),
+        ('POST',   r'/api/hosts?/(?P<host_id>\d+)/parameters/?$',      'parameters_create'),
+        ('GET',    r'/api/hosts?/(?P<host_id>\d+)/parameters/(?P<id>\d+)/?$', 'parameters_show'),
+        ('PUT',    r'/api/hosts?/(?P<host_id>\d+)/parameters/(?P<id>\d+)/?$', 'parameters_update'),
+        ('DELETE', r'/api/hosts?/(?P<host_id>\d+)/parameters/(?P<id>\d+)/?$', 'parameters_destroy'),
+        ('GET',    r'/api/reports/?$',                                 'reports_index'),
+        ('GET',    r'/api/reports/(?P<id>\d+)/?$',                     'reports_show'),
+        ('GET',    r'/api/fact_values/?$',                             'fact_values_index'),
+        ('GET',    r'/api/audits/?$',                                  'audits_index'),
+        ('GET',    r'/api/audits/(?P<id>\d+)/?$',                      'audits_show'),
+        ('GET',    r'/api/(?P<catalog>%s)/?$' % '|'.join(CATALOGS),    'catalog_index'),
+        ('GET',    r'/api/(?P<catalog>%s)/(?P<id>\d+)/?$' % '|'.join(CATALOGS), 'catalog_show'),
+    ]
+
+    def do_GET(self):
+        self.dispatch('GET')
+
+    def do_POST(self):
+        self.dispatch('POST')
+
+    def do_PUT(self):
+        self.dispatch('PUT')
+
+    def do_DELETE(self):
+        self.dispatch('DELETE')
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPServer.BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def dispatch(self, method):
+        url = urlparse.urlparse(self.path)
+        path = url.path[len(self.server.path_prefix):] if url.path.startswith(self.server.path_prefix) else url.path
+        path = re.sub('/+', '/', path)
+        self.query = dict(urlparse.parse_qsl(url.query))
+        self.inventory = self.server.inventory
+
+        length = int(self.headers.getheader('content-length') or 0)
+        raw_body = self.rfile.read(length) if length else ''
+
+        if self.server.latency:
+            time.sleep(self.server.latency + random.random() * self.server.jitter)
+
+        try:
+            if self.server.error_rate and random.random() < self.server.error_rate:
+                raise StubError(500, 'synthetic failure')
+            for route_method, pattern, handler in self._compiled_routes():
+                match = pattern.match(path)
+                if match and route_method == method:
+                    self.body = json.loads(raw_body) if raw_body.strip() else {}
+                    status, result = getattr(self, handler)(**match.groupdict())
+                    break
+            else:
+                raise StubError(404, 'route %s %s not found' % (method, path))
+        except StubError, e:
+            status, result = e.status, {'error': {'message': str(e)}}
+        except ValueError, e:
+            status, result = 422, {'error': {'message': str(e)}}
+        self.respond(status, result)
+
+    @classmethod
+    def _compiled_routes(cls):
+        if '_routes' not in cls.__dict__:
+            cls._routes = [(method, re.compile(pattern), handler) for method, pattern, handler in cls.ROUTES]
+        return cls._routes
+
+    def respond(self, status, result):
+        payload = json.dumps(result)
+        etag = None
+        if self.command == 'GET' and status == 200:
+            # like Rack::ETag in front of the real api, a digest of the body
+            etag = '"%s"' % hashlib.md5(payload).hexdigest()
+            if etag in (self.headers.getheader('if-none-match') or ''):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+        encoding = None
+        if len(payload) > 1024 and 'gzip' in (self.headers.getheader('accept-encoding') or ''):
+            buf = StringIO()
+            stream = gzip.GzipFile(fileobj=buf, mode='wb', compresslevel=1)
+            stream.write(payload)
+            stream.close()
+            payload, encoding = buf.getvalue(), 'gzip'
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        if etag:
+            self.send_header('ETag', etag)
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    # helpers -----------------------------------------------------------------
+
+    def paginate(self, total, fetch, natural=('id',)):
+        """
+        @type total: int
+        @param total: number of records before searching
+        @type fetch: callable
+        @param fetch: fetch(offset, limit) -> list of records
+        @type natural: tuple of str
+        @param natural: fields fetch already returns the records in ascending
+                        order of, other orders sort all the records
+        """
+        page = max(int(self.query.get('page') or 1), 1)
+        per_page = int(self.query.get('per_page') or self.server.default_per_page)
+        per_page = max(min(per_page, self.server.max_per_page), 1)
+        search = self.query.get('search')
+        order = self.query.get('order')
+        # "field" or "field ASC|DESC"
+        field, direction = (order.split() + ['ASC'])[:2] if order else (None, 'ASC')
+        offset = (page - 1) * per_page
+
+        if order and not (field in natural and direction.upper() == 'ASC'):
+            matches = []
+            for records in self.scan(total, fetch):
+                matches.extend(records)
+            if search:
+                matches = filter(search_filter(search), matches)
+            matches.sort(key=lambda record: record.get(field), reverse=direction.upper() == 'DESC')
+            subtotal = len(matches)
+            results = matches[offset:offset + per_page]
+        elif search:
+            # counting the matches needs all the records, only the page is kept
+            matches = search_filter(search)
+            subtotal, results = 0, []
+            for records in self.scan(total, fetch):
+                for record in records:
+                    if matches(record):
+                        if offset <= subtotal < offset + per_page:
+                            results.append(record)
+                        subtotal += 1
+        else:
+            subtotal = total
+            results = fetch(offset, per_page)
+        return 200, {'total': total, 'subtotal': subtotal, 'page': page, 'per_page': per_page,
+                     'search': search, 'sort': {'by': None, 'order': None}, 'results': results}
+
+    @staticmethod
+    def scan(total, fetch, chunk=1000):
+        """
+        @rtype: generator of list
+        @return: all the records, fetched chunk by chunk
+        """
+        for offset in xrange(0, total, chunk):
+            yield fetch(offset, min(chunk, total - offset))
+
+    def get_host(self, host_id):
+        host = self.inventory.host(int(host_id))
+        if host is None:
+            raise StubError(404, 'host %s not found' % host_id)
+        return host
+
+    def attributes(self, resource):
+        attributes = self.body.get(resource, self.body)
+        if not isinstance(attributes, dict):
+            raise StubError(422, 'missing %s attributes' % resource)
+        return attributes
+
+    # hosts -------------------------------------------------------------------
+
+    def hosts_index(self):
+        ids = self.inventory.host_ids()
+        return self.paginate(len(ids), lambda offset, limit:
+            filter(None, [self.inventory.host(ids[i]) for i in xrange(offset, min(offset + limit, len(ids)))]))
+
+    def hosts_show(self, id):
+        return 200, self.get_host(id)
+
+    def hosts_create(self):
+        attributes = self.attributes('host')
+        if not attributes.get('name'):
+            raise StubError(422, "name can't be blank")
+        return 201, self.inventory.create_host(attributes)
+
+    def hosts_update(self, id):
+        self.get_host(id)
+        return 200, self.inventory.update_host(int(id), self.attributes('host'))
+
+    def hosts_destroy(self, id):
+        self.get_host(id)
+        return 200, self.inventory.destroy_host(int(id))
+
+    def hosts_status(self, id):
+        host = self.get_host(id)
+        return 200, {'status': ('No changes', 'Active', 'Error')[host['id'] % 3]}
+
+    # facts -------------------------------------------------------------------
+
+    def fact_values_index(self, host_id=None):
+        # fact values are paged one value at a time and grouped by host name
+        per_host = self.inventory.facts_per_host
+        if host_id is not None:
+            ids = [self.get_host(host_id)['id']]
+        else:
+            ids = self.inventory.host_ids()
+        field = (self.query.get('order') or '').split()[:1]
+        interleaved = self.server.interleaved_facts and field != ['host']
+
+        def fetch(offset, limit):
+            values = []
+            host = facts = None
+            for index in xrange(offset, min(offset + limit, len(ids) * per_host)):
+                if interleaved:
+                    host_index, fact_index = index % len(ids), index // len(ids)
+                else:
+                    host_index, fact_index = index // per_host, index % per_host
+                if host is None or host['id'] != ids[host_index]:
+                    host = self.inventory.host(ids[host_index])
+                    facts = self.inventory.facts(host['id'])
+                name, value = facts[fact_index]
+                values.append({'host': host['name'], 'name': name, 'value': value})
+            return values
+
+        # the values come host by host in id order, for the generated hosts
+        # that is the order of their names too
+        status, result = self.paginate(len(ids) * per_host, fetch, natural=('host',))
+        grouped = {}
+        for value in result['results']:
+            grouped.setdefault(value['host'], {})[value['name']] = value['value']
+        result['results'] = grouped
+        return status, result
+
+    # reports -----------------------------------------------------------------
+
+    def reports_index(self):
+        total = len(self.inventory.host_ids()) * self.inventory.reports_per_host
+        return self.paginate(total, lambda offset, limit:
+            [self.inventory.report(report_id) for report_id in range(offset + 1, min(offset + limit, total) + 1)])
+
+    def reports_show(self, id):
+        report = self.inventory.report(int(id))
+        if report is None:
+            raise StubError(404, 'report %s not found' % id)
+        return 200, report
+
+    def reports_last(self, host_id):
+        host = self.get_host(host_id)
+        ids = self.inventory.host_ids()
+        position = list(ids).index(host['id']) if not isinstance(ids, xrange) else host['id'] - 1
+        return 200, self.inventory.report(position * self.inventory.reports_per_host + 1)
+
+    # audits ------------------------------------------------------------------
+
+    def audits_index(self, host_id=None):
+        audits = self.inventory.audits
+        if host_id is not None:
+            audits = [audit for audit in audits if audit['auditable_id'] == int(host_id)]
+        return self.paginate(len(audits), lambda offset, limit: audits[offset:offset + limit])
+
+    def audits_show(self, id):
+        audits = self.inventory.audits
+        if not 1 <= int(id) <= len(audits):
+            raise StubError(404, 'audit %s not found' % id)
+        return 200, audits[int(id) - 1]
+
+    # puppetclass ids and parameters ------------------------------------------
+
+    def puppetclass_ids_index(self, host_id):
+        self.get_host(host_id)
+        return 200, self.inventory.puppetclass_ids(int(host_id))
+
+    def puppetclass_ids_create(self, host_id):
+        self.get_host(host_id)
+        ids = self.inventory.puppetclass_ids(int(host_id))
+        puppetclass_id = int(self.body.get('puppetclass_id') or 0)
+        if puppetclass_id not in ids:
+            ids.append(puppetclass_id)
+        self.inventory.set_puppetclass_ids(int(host_id), ids)
+        return 201, ids
+
+    def puppetclass_ids_destroy(self, host_id, id):
+        self.get_host(host_id)
+        ids = [i for i in self.inventory.puppetclass_ids(int(host_id)) if i != int(id)]
+        self.inventory.set_puppetclass_ids(int(host_id), ids)
+        return 200, ids
+
+    def get_parameter(self, host_id, id):
+        self.get_host(host_id)
+        for parameter in self.inventory.parameters(int(host_id)):
+            if parameter['id'] == int(id):
+                return parameter
+        raise StubError(404, 'parameter %s not found' % id)
+
+    def parameters_index(self, host_id):
+        self.get_host(host_id)
+        parameters = self.inventory.parameters(int(host_id))
+        return self.paginate(len(parameters), lambda offset, limit: parameters[offset:offset + limit])
+
+    def parameters_show(self, host_id, id):
+        return 200, self.get_parameter(host_id, id)
+
+    def parameters_create(self, host_id):
+        self.get_host(host_id)
+        attributes = self.attributes('parameter')
+        with self.inventory.lock:
+            parameters = self.inventory.parameters(int(host_id))
+            parameter = dict(attributes, id=max([p['id'] for p in parameters] or [0]) + 1)
+            parameters.append(parameter)
+        self.inventory.audit('Parameter', parameter['id'], 'create', attributes, 'Host', int(host_id))
+        return 201, parameter
+
+    def parameters_update(self, host_id, id):
+        parameter = self.get_parameter(host_id, id)
+        attributes = self.attributes('parameter')
+        parameter.update(attributes)
+        self.inventory.audit('Parameter', parameter['id'], 'update', attributes, 'Host', int(host_id))
+        return 200, parameter
+
+    def parameters_destroy(self, host_id, id):
+        parameter = self.get_parameter(host_id, id)
+        with self.inventory.lock:
+            self.inventory.parameters(int(host_id)).remove(parameter)
+        self.inventory.audit('Parameter', parameter['id'], 'destroy', {}, 'Host', int(host_id))
+        return 200, parameter
+
+    # catalogs ----------------------------------------------------------------
+
+    def catalog_records(self, catalog):
+        return [{'id': i + 1, 'name': name, 'created_at': TIMESTAMP, 'updated_at': TIMESTAMP}
+                for i, name in enumerate(CATALOGS[catalog])]
+
+    def catalog_index(self, catalog):
+        records = self.catalog_records(catalog)
+        return self.paginate(len(records), lambda offset, limit: records[offset:offset + limit])
+
+    def catalog_show(self, catalog, id):
+        records = self.catalog_records(catalog)
+        if not 1 <= int(id) <= len(records):
+            raise StubError(404, '%s %s not found' % (catalog, id))
+        return 200, records[int(id) - 1]
+
+
+class StubServer(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    """
+    Threaded http server answering like a Foreman api.
+
+    @ivar inventory: SyntheticInventory the responses are built from
+    @ivar latency: seconds every response is delayed by
+    @ivar jitter: up to this many seconds are randomly added to the latency
+    @ivar error_rate: fraction of requests answered with a 500 error
+    @ivar default_per_page: page size when the request does not ask for one
+    @ivar max_per_page: largest page size served, bigger requests are capped
+    @ivar path_prefix: mount point of the api, stripped from request paths
+    @ivar interleaved_facts: list fact values fact by fact rather than host by
+                             host unless they are ordered by host, so the facts
+                             of a host are spread over many pages
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, inventory=None, host='127.0.0.1', port=0, latency=0.0, jitter=0.0,
+                 error_rate=0.0, default_per_page=20, max_per_page=1000, path_prefix='/foreman',
+                 verbose=False, interleaved_facts=False):
+        BaseHTTPServer.HTTPServer.__init__(self, (host, port), StubHandler)
+        self.inventory = inventory or SyntheticInventory()
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.default_per_page = default_per_page
+        self.max_per_page = max_per_page
+        self.path_prefix = path_prefix
+        self.verbose = verbose
+        self.interleaved_facts = interleaved_facts
+        self.__thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        """
+        Serve in a background thread
+        """
+        self.__thread = threading.Thread(target=self.serve_forever)
+        self.__thread.daemon = True
+        self.__thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self.__thread is not None:
+            self.__thread.join()
+
+
+def main():
+    parser = OptionParser()
+    parser.add_option('--host', dest='host', default='127.0.0.1')
+    parser.add_option('--port', dest='port', type='int', default=3000)
+    parser.add_option('--hosts', dest='hosts', type='int', default=1000)
+    parser.add_option('--facts-per-host', dest='facts_per_host', type='int', default=20)
+    parser.add_option('--reports-per-host', dest='reports_per_host', type='int', default=1)
+    parser.add_option('--latency', dest='latency', type='float', default=0.0)
+    parser.add_option('--jitter', dest='jitter', type='float', default=0.0)
+    parser.add_option('--error-rate', dest='error_rate', type='float', default=0.0)
+    parser.add_option('--default-per-page', dest='default_per_page', type='int', default=20)
+    parser.add_option('--max-per-page', dest='max_per_page', type='int', default=1000)
+    parser.add_option('--path-prefix', dest='path_prefix', default='/foreman')
+    parser.add_option('--interleaved-facts', dest='interleaved_facts', action='store_true', default=False)
+    parser.add_option('-v', '--verbose', dest='verbose', action='store_true', default=False)
+    options, args = parser.parse_args()
+
+    inventory = SyntheticInventory(options.hosts, options.facts_per_host, options.reports_per_host)
+    server = StubServer(inventory, options.host, options.port, options.latency, options.jitter,
+                        options.error_rate, options.default_per_page, options.max_per_page,
+                        options.path_prefix, options.verbose, options.interleaved_facts)
+    print 'serving %d hosts on http://%s:%d%s' % (options.hosts, options.host, server.port, options.path_prefix)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
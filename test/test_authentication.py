@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import sys
+import types
+import unittest
+
+from foreman.apipie import KerberosAuthentication
+
+
+class FakeKerberos(types.ModuleType):
+    """
+    Stand-in for the kerberos module handing out numbered tokens
+    """
+
+    GSS_C_DELEG_FLAG = GSS_C_MUTUAL_FLAG = GSS_C_SEQUENCE_FLAG = 0
+
+    def __init__(self):
+        types.ModuleType.__init__(self, 'kerberos')
+        self.contexts = 0
+        self.cleaned = 0
+
+    def authGSSClientInit(self, service, gssflags=0):
+        self.contexts += 1
+        return 1, self.contexts
+
+    def authGSSClientStep(self, ctx, challenge):
+        return 0
+
+    def authGSSClientResponse(self, ctx):
+        return 'token%d' % ctx
+
+    def authGSSClientClean(self, ctx):
+        self.cleaned += 1
+
+
+class FakeResponse(object):
+
+    def __init__(self, status, cookie=None):
+        self.status = status
+        self.cookie = cookie
+
+    def get_header(self, name):
+        return self.cookie if name == 'set-cookie' else None
+
+
+class KerberosAuthenticationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.kerberos = FakeKerberos()
+        self.saved = sys.modules.get('kerberos')
+        sys.modules['kerberos'] = self.kerberos
+        self.auth = KerberosAuthentication('foreman.example.com')
+
+    def tearDown(self):
+        if self.saved is None:
+            del sys.modules['kerberos']
+        else:
+            sys.modules['kerberos'] = self.saved
+
+    def test_fresh_token_per_request(self):
+        first = self.auth.set_headers({})['Authorization']
+        self.auth.process_response(FakeResponse(200))
+        second = self.auth.set_headers({})['Authorization']
+        self.assertNotEqual(first, second)
+        self.assertEqual(self.kerberos.cleaned, 1)
+
+    def test_cookie_replaces_token(self):
+        self.auth.set_headers({})
+        self.auth.process_response(FakeResponse(200, '_session_id=abc; path=/'))
+        headers = self.auth.set_headers({'Authorization': 'Negotiate old'})
+        self.assertEqual(headers, {'Cookie': '_session_id=abc'})
+        self.assertEqual(self.kerberos.contexts, 1)
+
+    def test_expired_cookie_negotiates_again(self):
+        self.auth.set_headers({})
+        self.auth.process_response(FakeResponse(200, '_session_id=abc'))
+        self.auth.set_headers({})
+        self.assertTrue(self.auth.process_response(FakeResponse(401)))
+        self.assertEqual(self.auth.set_headers({})['Authorization'], 'Negotiate token2')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import sys
+import time
+import unittest
+from StringIO import StringIO
+
+from foreman.batch import run_parallel
+
+
+class FakePrompt(object):
+    """
+    Writes like okaara's prompt, one line per call to its output
+    """
+
+    def __init__(self, output):
+        self.output = output
+
+    def write(self, content):
+        self.output.write(content + '\n')
+        self.output.flush()
+
+
+class RunParallelTest(unittest.TestCase):
+
+    def setUp(self):
+        self.output = StringIO()
+        self.prompt = FakePrompt(self.output)
+        self.stdout = sys.stdout
+
+    def tearDown(self):
+        sys.stdout = self.stdout
+
+    def run_command(self, line):
+        # every command writes in steps while the others are running too
+        for step in range(5):
+            self.prompt.write('%s step %d' % (line, step))
+            time.sleep(0.002)
+        sys.stdout.write('%s printed\n' % line)
+        return 0 if line != 'fail' else 1
+
+    def test_output_of_a_command_stays_together(self):
+        sys.stdout = self.output
+        commands = [(number, 'command%d' % number) for number in range(1, 21)] + [(21, 'fail')]
+        statuses = run_parallel(self.run_command, commands, 8, self.prompt)
+
+        self.assertEqual(statuses, dict([(number, 0) for number in range(1, 21)] + [(21, 1)]))
+        lines = self.output.getvalue().splitlines()
+        self.assertEqual(len(lines), 21 * 6)
+        for start in range(0, len(lines), 6):
+            line = lines[start].split()[0]
+            self.assertEqual(lines[start:start + 6],
+                             ['%s step %d' % (line, step) for step in range(5)] + ['%s printed' % line])
+
+    def test_streams_are_restored(self):
+        stdout = sys.stdout = StringIO()
+        run_parallel(self.run_command, [(1, 'command1')], 4, self.prompt)
+        self.assertTrue(self.prompt.output is self.output)
+        self.assertTrue(sys.stdout is stdout)
+        self.assertEqual(stdout.getvalue(), 'command1 printed\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import unittest
+
+from foreman.apipie import ApipieApi, ServerConnection
+from foreman.bindings import Bindings
+
+
+class BindingsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.bindings = Bindings(ServerConnection('localhost', 3000, 'http', 'foreman'))
+
+    def test_every_resource_loads(self):
+        for name, class_name in sorted(Bindings.RESOURCES.items()):
+            resource = getattr(self.bindings, name)
+            self.assertTrue(isinstance(resource, ApipieApi), name)
+            self.assertEqual(type(resource).__name__, class_name)
+
+    def test_resource_is_created_once(self):
+        self.assertTrue(self.bindings.host is self.bindings.host)
+
+    def test_unknown_resource(self):
+        self.assertRaises(AttributeError, getattr, self.bindings, 'no_such_resource')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import socket
+import unittest
+
+from foreman.bulk import BulkRunner
+
+
+class FakeResponse(object):
+
+    def __init__(self, status, body=None):
+        self.status = status
+        self.body = body or {}
+
+
+class FakeServer(object):
+    """
+    Creates hosts, answering with the queued outcomes first: a status, or an
+    exception raised before (sent=False) or after (sent=True) the host was created
+    """
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.hosts = {}
+        self.calls = 0
+
+    def create(self, item):
+        self.calls += 1
+        name = item['host']['name']
+        outcome = self.outcomes.pop(0) if self.outcomes else 201
+        if isinstance(outcome, tuple):
+            error, sent = outcome
+            if sent:
+                self.hosts[name] = item['host']
+                error.request_sent = True
+            raise error
+        if outcome in (429, 503):
+            return FakeResponse(outcome)
+        if name in self.hosts:
+            return FakeResponse(422, {'error': {'message': 'name has already been taken'}})
+        if outcome < 300 or outcome == 502:
+            # a gateway error can follow the creation
+            self.hosts[name] = item['host']
+        return FakeResponse(outcome, item['host'])
+
+    def find(self, item):
+        return self.hosts.get(item['host']['name'])
+
+
+class BulkRunnerTest(unittest.TestCase):
+
+    item = {'host': {'name': 'a.example.com'}}
+
+    def run_one(self, server, find=True):
+        runner = BulkRunner(server.create, retries=2, retry_delay=0, find=server.find if find else None)
+        return runner.run_one(0, self.item)
+
+    def test_created(self):
+        server = FakeServer()
+        result = self.run_one(server)
+        self.assertTrue(result.created)
+        self.assertEqual(server.calls, 1)
+
+    def test_retries_throttling_and_unavailable(self):
+        server = FakeServer(429, 503)
+        result = self.run_one(server)
+        self.assertTrue(result.created)
+        self.assertEqual((result.attempts, result.status), (3, 201))
+        self.assertEqual(len(server.hosts), 1)
+
+    def test_retries_an_unsent_request(self):
+        server = FakeServer((socket.error('connection refused'), False))
+        result = self.run_one(server)
+        self.assertTrue(result.created)
+        self.assertEqual(server.calls, 2)
+
+    def test_sent_request_is_looked_up_not_repeated(self):
+        server = FakeServer((socket.timeout('timed out'), True))
+        result = self.run_one(server)
+        self.assertTrue(result.created)
+        self.assertEqual(result.error, None)
+        self.assertEqual(server.calls, 1)
+
+    def test_gateway_error_after_creation(self):
+        server = FakeServer(502)
+        result = self.run_one(server)
+        self.assertTrue(result.created)
+        self.assertEqual(server.calls, 1)
+
+    def test_server_error_without_the_host_is_retried(self):
+        server = FakeServer(500)
+        result = self.run_one(server)
+        self.assertEqual(server.calls, 2)
+        self.assertEqual(result.status, 201)
+
+    def test_unknown_outcome_without_find_is_not_retried(self):
+        server = FakeServer((socket.timeout('timed out'), True))
+        result = self.run_one(server, find=False)
+        self.assertFalse(result.created)
+        self.assertEqual(server.calls, 1)
+
+    def test_client_error_is_not_retried(self):
+        server = FakeServer(422)
+        result = self.run_one(server)
+        self.assertFalse(result.created)
+        self.assertEqual(server.calls, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import httplib
+import socket
+import unittest
+
+from foreman.apipie import ServerConnection
+from foreman.stub_server import StubServer, SyntheticInventory
+
+
+class StaleConnection(object):
+    """
+    Kept-alive connection the server closed, it fails once the request was sent
+    """
+
+    def __init__(self, error):
+        self.error = error
+        self.requests = []
+
+    def request(self, method, url, body=None, headers=None):
+        self.requests.append(method)
+
+    def getresponse(self):
+        raise self.error
+
+    def close(self):
+        pass
+
+
+class UnsentConnection(StaleConnection):
+    """
+    Kept-alive connection that fails before the request goes out
+    """
+
+    def request(self, method, url, body=None, headers=None):
+        raise self.error
+
+
+class ResendTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(SyntheticInventory(hosts=5)).start()
+        self.connection = ServerConnection('127.0.0.1', self.server.port, 'http', 'foreman')
+        self.opened = []
+
+    def tearDown(self):
+        self.connection.close()
+        self.server.stop()
+
+    def use(self, stale):
+        connect = self.connection._connect
+
+        def _connect(timings=None, reuse=True):
+            if not self.opened:
+                self.opened.append(stale)
+                return stale, True
+            connection = connect(timings, reuse)
+            self.opened.append(connection[0])
+            return connection
+        self.connection._connect = _connect
+
+    def test_get_is_resent(self):
+        self.use(StaleConnection(httplib.BadStatusLine('')))
+        response = self.connection.GET('/api/hosts')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(len(self.opened), 2)
+
+    def test_post_is_not_resent_once_sent(self):
+        stale = StaleConnection(socket.error('connection reset'))
+        self.use(stale)
+        self.assertRaises(socket.error, self.connection.POST, '/api/hosts', {'host': {'name': 'new'}})
+        self.assertEqual(stale.requests, ['POST'])
+        self.assertEqual(len(self.opened), 1)
+
+    def test_post_is_resent_when_not_sent(self):
+        self.use(UnsentConnection(socket.error('broken pipe')))
+        response = self.connection.POST('/api/hosts', {'host': {'name': 'new'}})
+        self.assertEqual(response.status, 201)
+        self.assertEqual(len(self.opened), 2)
+
+    def test_failed_reconnect_is_discarded_once(self):
+        pool = self.connection.pool
+        stale = StaleConnection(httplib.BadStatusLine(''))
+        pool.acquire('other', object)
+
+        def _connect(timings=None, reuse=True):
+            if reuse:
+                return pool.acquire(self.connection._pool_key(), lambda: stale)[0], True
+            raise socket.error('connection refused')
+        self.connection._connect = _connect
+        self.assertRaises(socket.error, self.connection.GET, '/api/hosts')
+        self.assertEqual(pool.stats()['in_use'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import os
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from StringIO import StringIO
+
+from foreman import daemon
+from foreman.daemon import Daemon, forward, reads_stdin
+
+
+class ReadsStdinTest(unittest.TestCase):
+
+    def test_bulk_create(self):
+        self.assertTrue(reads_stdin(['host', 'bulk_create']))
+        self.assertTrue(reads_stdin(['host', 'bulk_create', '--file', '-']))
+        self.assertFalse(reads_stdin(['host', 'bulk_create', '--file', 'hosts.json']))
+        self.assertFalse(reads_stdin(['host', 'bulk_create', '--file=hosts.json', '--format', 'json']))
+
+    def test_shell(self):
+        self.assertTrue(reads_stdin(['shell']))
+
+    def test_other_commands(self):
+        self.assertFalse(reads_stdin(['user', 'list']))
+        self.assertFalse(reads_stdin([]))
+
+
+class ForwardTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'daemon.sock')
+        self.calls = []
+        self.accept_timeout = daemon.ACCEPT_TIMEOUT
+        daemon.ACCEPT_TIMEOUT = 0.2
+
+    def tearDown(self):
+        daemon.ACCEPT_TIMEOUT = self.accept_timeout
+        shutil.rmtree(self.directory)
+
+    def run_command(self, argv):
+        self.calls.append(argv)
+        sys.stdout.write('ran %s\n' % ' '.join(argv))
+        return 3
+
+    def listen(self):
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.path)
+        server.listen(1)
+        return server
+
+    def test_forward(self):
+        server = self.listen()
+        thread = threading.Thread(target=lambda: Daemon(self.run_command, self.path).handle(server.accept()[0]))
+        thread.start()
+        stdout = StringIO()
+        self.assertEqual(forward(['user', 'list'], self.path, stdout, StringIO()), 3)
+        thread.join()
+        server.close()
+        self.assertEqual(stdout.getvalue(), 'ran user list\n')
+
+    def test_no_daemon(self):
+        self.assertEqual(forward(['user', 'list'], self.path), None)
+
+    def test_busy_daemon_is_skipped(self):
+        # the daemon is still serving another command and does not accept
+        server = self.listen()
+        started = time.time()
+        self.assertEqual(forward(['user', 'list'], self.path), None)
+        self.assertTrue(time.time() - started < 2)
+
+        # once it gets to the request the client is gone, it must not run it again
+        connection = server.accept()[0]
+        Daemon(self.run_command, self.path).handle(connection)
+        connection.close()
+        server.close()
+        self.assertEqual(self.calls, [])
+
+    def test_hung_daemon(self):
+        server = self.listen()
+
+        def accept_and_hang():
+            connection = server.accept()[0]
+            connection.makefile('rb').readline()
+            connection.sendall('{"accepted": true}\n')
+            time.sleep(1)
+            connection.close()
+        thread = threading.Thread(target=accept_and_hang)
+        thread.start()
+        stderr = StringIO()
+        self.assertEqual(forward(['user', 'list'], self.path, StringIO(), stderr, timeout=0.2), os.EX_TEMPFAIL)
+        thread.join()
+        server.close()
+        self.assertTrue('no result' in stderr.getvalue())
+
+    def test_daemon_closing_without_a_result(self):
+        server = self.listen()
+
+        def accept_and_close():
+            connection = server.accept()[0]
+            connection.makefile('rb').readline()
+            connection.sendall('{"accepted": true}\n')
+            connection.close()
+        thread = threading.Thread(target=accept_and_close)
+        thread.start()
+        stderr = StringIO()
+        self.assertEqual(forward(['user', 'list'], self.path, StringIO(), stderr), os.EX_SOFTWARE)
+        thread.join()
+        server.close()
+        self.assertTrue('without a result' in stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from foreman import facts
+from foreman.apipie import ServerConnection
+from foreman.bindings import Bindings
+from foreman.fact_diff import FactSnapshot, HostChange, SnapshotError, diff_facts
+from foreman.stub_server import StubServer, SyntheticInventory
+
+
+class FactSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'facts.sqlite')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def diff(self, hosts, ignore=()):
+        snapshot = FactSnapshot(self.path, ignore)
+        try:
+            changes = list(snapshot.diff(hosts))
+            snapshot.commit()
+        finally:
+            snapshot.close()
+        return dict((change.name, change) for change in changes)
+
+    def test_changes(self):
+        self.diff([('a', {'os': 'RHEL', 'kernel': '2.6'}), ('b', {'os': 'RHEL'}), ('c', {'os': 'RHEL'})])
+        changes = self.diff([('a', {'os': 'RHEL', 'kernel': '3.10', 'virtual': 'kvm'}),
+                             ('b', {'os': 'RHEL'}), ('d', {'os': 'Fedora'})])
+        self.assertEqual(sorted(changes), ['a', 'c', 'd'])
+        self.assertEqual(changes['a'].status, HostChange.CHANGED)
+        self.assertEqual(changes['a'].changed, {'kernel': ('2.6', '3.10')})
+        self.assertEqual(changes['a'].added, {'virtual': 'kvm'})
+        self.assertEqual(changes['c'].status, HostChange.REMOVED)
+        self.assertEqual(changes['d'].status, HostChange.ADDED)
+
+    def test_ignored_facts(self):
+        self.diff([('a', {'os': 'RHEL', 'uptime': '1 day'})], ['uptime'])
+        self.assertEqual(self.diff([('a', {'os': 'RHEL', 'uptime': '2 days'})], ['uptime']), {})
+
+    def test_repeated_host(self):
+        self.diff([('a', {'os': 'RHEL', 'kernel': '2.6'})])
+        snapshot = FactSnapshot(self.path)
+        try:
+            self.assertRaises(SnapshotError, list, snapshot.diff([('a', {'os': 'RHEL'}), ('a', {'kernel': '2.6'})]))
+            snapshot.rollback()
+        finally:
+            snapshot.close()
+        self.assertEqual(self.diff([('a', {'os': 'RHEL', 'kernel': '2.6'})]), {})
+
+
+class InterleavedFactDiffTest(unittest.TestCase):
+    """
+    Diffs against a server listing the fact values of a host over many pages
+    """
+
+    hosts = 30
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.server = StubServer(SyntheticInventory(hosts=self.hosts, facts_per_host=4),
+                                 interleaved_facts=True).start()
+        self.bindings = Bindings(ServerConnection('127.0.0.1', self.server.port, 'http', 'foreman'))
+        self.path = os.path.join(self.directory, 'facts.sqlite')
+
+    def tearDown(self):
+        self.bindings.connection.close()
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def diff(self):
+        snapshot = FactSnapshot(self.path)
+        try:
+            changes = list(diff_facts(self.bindings, snapshot, per_page=7))
+            snapshot.commit()
+        finally:
+            snapshot.close()
+        return changes
+
+    def test_unchanged_facts(self):
+        changes = self.diff()
+        self.assertEqual(len(changes), self.hosts)
+        self.assertEqual(set(len(change.added) for change in changes), set([4]))
+        self.assertEqual(self.diff(), [])
+
+    def test_added_and_removed_hosts(self):
+        self.diff()
+        self.bindings.host.destroy({'id': 3})
+        self.bindings.host.create({'host': {'name': 'new.example.com'}})
+        changes = self.diff()
+        self.assertEqual(sorted((change.name, change.status) for change in changes),
+                         [('host000003.example.com', HostChange.REMOVED), ('new.example.com', HostChange.ADDED)])
+
+    def test_server_ignoring_the_order(self):
+        self.diff()
+        order, facts.ORDER = facts.ORDER, 'unknown_field'
+        try:
+            snapshot = FactSnapshot(self.path)
+            try:
+                self.assertRaises(SnapshotError, list, diff_facts(self.bindings, snapshot, per_page=7))
+                snapshot.rollback()
+            finally:
+                snapshot.close()
+        finally:
+            facts.ORDER = order
+        self.assertEqual(self.diff(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
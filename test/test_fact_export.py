@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import ast
+import os
+import resource
+import shutil
+import struct
+import tempfile
+import unittest
+import zipfile
+
+from foreman.fact_export import FactExporter
+
+
+def load_npz(path):
+    """
+    Read the one dimensional arrays of an npz archive without numpy
+    """
+    arrays = {}
+    archive = zipfile.ZipFile(path)
+    try:
+        for name in archive.namelist():
+            data = archive.read(name)
+            assert data[:8] == '\x93NUMPY\x01\x00'
+            length = struct.unpack('<H', data[8:10])[0]
+            header = ast.literal_eval(data[10:10 + length])
+            data = data[10 + length:]
+            size = header['shape'][0]
+            if header['descr'] == '<i4':
+                values = list(struct.unpack('<%di' % size, data))
+            elif header['descr'] == '|b1':
+                values = [char == '\x01' for char in data]
+            else:
+                width = int(header['descr'][2:]) * 4
+                values = [data[i * width:(i + 1) * width].decode('utf-32-le').rstrip(u'\x00')
+                          for i in range(size)]
+            arrays[name[:-len('.npy')]] = values
+    finally:
+        archive.close()
+    return arrays
+
+
+class FactExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def load(self, name):
+        return load_npz(os.path.join(self.directory, name))
+
+    def test_columns(self):
+        manifest = FactExporter(self.directory, max_dictionary=2).export([
+            ('a', {'os': 'RHEL', 'ip': '10.0.0.1'}),
+            ('b', {'os': 'Fedora', 'ip': '10.0.0.2', 'name': u'\xe9t\xe9'}),
+            ('c', {'os': 'RHEL', 'ip': '10.0.0.3'}),
+        ])
+        self.assertEqual(manifest['rows'], 3)
+        self.assertEqual(self.load('hosts.npz')['values'], ['a', 'b', 'c'])
+
+        os_column = self.load(manifest['facts']['os']['file'])
+        self.assertEqual([os_column['dictionary'][code] for code in os_column['codes']], ['RHEL', 'Fedora', 'RHEL'])
+
+        # more distinct values than max_dictionary
+        self.assertEqual(manifest['facts']['ip']['encoding'], 'plain')
+        self.assertEqual(self.load(manifest['facts']['ip']['file'])['values'], ['10.0.0.1', '10.0.0.2', '10.0.0.3'])
+
+        # a fact first seen on the second host
+        name = self.load(manifest['facts']['name']['file'])
+        self.assertEqual(name['codes'], [-1, 0, -1])
+        self.assertEqual(name['dictionary'], [u'\xe9t\xe9'])
+
+    def test_many_facts_with_few_file_descriptors(self):
+        facts = dict(('interface_%04d' % i, 'eth%d' % i) for i in range(600))
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (min(256, hard), hard))
+        try:
+            manifest = FactExporter(self.directory).export([('a', facts), ('b', facts)])
+        finally:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+        self.assertEqual(len(manifest['facts']), 600)
+        column = self.load(manifest['facts']['interface_0599']['file'])
+        self.assertEqual(column['codes'], [0, 0])
+        self.assertEqual(column['dictionary'], ['eth599'])
+
+
+if __name__ == '__main__':
+    unittest.main()
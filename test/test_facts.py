@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from foreman import facts
+from foreman.apipie import ServerConnection
+from foreman.bindings import Bindings
+from foreman.facts import host_facts
+from foreman.mirror import Mirror
+from foreman.stub_server import StubServer, SyntheticInventory
+
+
+class InterleavedFactsTest(unittest.TestCase):
+    """
+    The stub lists the fact values fact by fact unless asked for an order,
+    so the facts of every host are spread over many pages
+    """
+
+    hosts = 30
+    facts_per_host = 4
+
+    def setUp(self):
+        self.inventory = SyntheticInventory(hosts=self.hosts, facts_per_host=self.facts_per_host)
+        self.server = StubServer(self.inventory, interleaved_facts=True).start()
+        self.bindings = Bindings(ServerConnection('127.0.0.1', self.server.port, 'http', 'foreman'))
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.bindings.connection.close()
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def expected(self):
+        return dict((self.inventory.host(host_id)['name'], dict(self.inventory.facts(host_id)))
+                    for host_id in self.inventory.host_ids())
+
+    def test_every_host_once_and_complete(self):
+        hosts = list(host_facts(self.bindings.fact_value, per_page=7))
+        self.assertEqual(len(hosts), self.hosts)
+        self.assertEqual(dict(hosts), self.expected())
+
+    def test_search_keeps_the_order(self):
+        hosts = list(host_facts(self.bindings.fact_value, {'search': 'host ~ dmz'}, per_page=7))
+        self.assertEqual(len(hosts), len(set(name for name, values in hosts)))
+        self.assertTrue(hosts)
+
+    def test_mirror_stores_all_facts(self):
+        mirror = Mirror(self.bindings, os.path.join(self.directory, 'mirror.sqlite'), per_page=7)
+        try:
+            counts = mirror.pull()
+            stored = mirror.query('SELECT COUNT(*) FROM facts')[1][0][0]
+        finally:
+            mirror.close()
+        self.assertEqual(counts['facts'], self.hosts * self.facts_per_host)
+        self.assertEqual(stored, self.hosts * self.facts_per_host)
+
+    def test_mirror_merges_repeated_hosts(self):
+        # a server ignoring the order lists the hosts again on later pages
+        order, facts.ORDER = facts.ORDER, 'unknown_field'
+        try:
+            self.assertTrue(len(list(host_facts(self.bindings.fact_value, per_page=7))) > self.hosts)
+            mirror = Mirror(self.bindings, os.path.join(self.directory, 'mirror.sqlite'), per_page=7)
+            try:
+                mirror.pull()
+                stored = mirror.query('SELECT COUNT(*) FROM facts')[1][0][0]
+            finally:
+                mirror.close()
+        finally:
+            facts.ORDER = order
+        self.assertEqual(stored, self.hosts * self.facts_per_host)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import os
+import shutil
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from foreman.apipie import Response, ServerConnection
+from foreman.bindings import Bindings
+from foreman.http_cache import HttpCache
+from foreman.stub_server import StubServer, SyntheticInventory
+
+
+class CountingCache(HttpCache):
+
+    def __init__(self, *args, **kwargs):
+        HttpCache.__init__(self, *args, **kwargs)
+        self.refreshed = 0
+
+    def refresh(self, key):
+        # called when the server answered 304
+        self.refreshed += 1
+        HttpCache.refresh(self, key)
+
+
+class FakeHttpResponse(object):
+
+    status = 200
+
+    def __init__(self, body, headers):
+        self.__body = StringIO(body)
+        self.msg = self
+        self.headers = headers
+
+    def getheaders(self):
+        return self.headers.items()
+
+    def getheader(self, name, default=None):
+        return self.headers.get(name.lower(), default)
+
+    def read(self, amt=None):
+        return self.__body.read() if amt is None else self.__body.read(amt)
+
+
+class RawBodyTest(unittest.TestCase):
+
+    body = '{"results": [%s]}' % ', '.join(['1'] * 100)
+
+    def response(self, max_raw, **headers):
+        return Response(FakeHttpResponse(self.body, headers), max_raw)
+
+    def test_kept_up_to_the_limit(self):
+        self.assertEqual(self.response(1000, **{'content-length': str(len(self.body))}).raw_body, self.body)
+        self.assertEqual(self.response(0, **{'content-length': str(len(self.body))}).raw_body, None)
+
+    def test_announced_big_body_is_not_kept(self):
+        self.assertEqual(self.response(100, **{'content-length': str(len(self.body))}).raw_body, None)
+
+    def test_chunked_body_is_not_kept(self):
+        self.assertEqual(self.response(1000, **{'transfer-encoding': 'chunked'}).raw_body, None)
+
+    def test_body_over_the_limit_is_not_kept(self):
+        # compressed bodies grow while they are read
+        self.assertEqual(self.response(100, **{'content-length': '50'}).raw_body, None)
+
+
+class HttpCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.server = StubServer(SyntheticInventory(hosts=2000)).start()
+        connection = ServerConnection('127.0.0.1', self.server.port, 'http', 'foreman')
+        connection.cache = self.cache = CountingCache(self.directory, max_entry_size=64 * 1024)
+        self.bindings = Bindings(connection)
+
+    def tearDown(self):
+        self.bindings.connection.close()
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def entries(self):
+        return [name for name in os.listdir(self.directory) if name.endswith('.entry')]
+
+    def test_revalidated_from_cache(self):
+        first = self.bindings.architecture.index()
+        second = self.bindings.architecture.index()
+        self.assertEqual(second.status, 200)
+        self.assertEqual(second.body, first.body)
+        self.assertEqual(self.cache.refreshed, 1)
+        self.assertEqual(len(self.entries()), 1)
+
+    def test_big_bodies_are_not_stored(self):
+        self.bindings.architecture.index()
+        hosts = self.bindings.host.index({'per_page': 1000})
+        self.assertEqual(len(hosts.body['results']), 1000)
+        self.assertEqual(len(self.entries()), 1)
+
+    def test_raw_body_is_released(self):
+        response = self.bindings.architecture.index()
+        self.assertEqual(response.raw_body, None)
+
+
+if __name__ == '__main__':
+    unittest.main()
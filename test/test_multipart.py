@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import cgi
+import os
+import tempfile
+import unittest
+from StringIO import StringIO
+
+from foreman.apipie import MultipartBody, ServerConnection
+
+
+class MultipartBodyTest(unittest.TestCase):
+
+    template = '#!ipxe\n' + 'kernel http://example.com/vmlinuz\n' * 5000
+
+    def setUp(self):
+        self.file = tempfile.NamedTemporaryFile(suffix='.txt')
+        self.file.write(self.template)
+        self.file.flush()
+        self.file.seek(0)
+
+    def tearDown(self):
+        self.file.close()
+
+    def parse(self, content_type, body):
+        data = body.read()
+        self.assertEqual(len(data), len(body))
+        environ = {'REQUEST_METHOD': 'POST', 'CONTENT_TYPE': content_type, 'CONTENT_LENGTH': str(len(data))}
+        return cgi.FieldStorage(fp=StringIO(data), environ=environ)
+
+    def test_parsed_by_cgi(self):
+        connection = ServerConnection('localhost', 80, 'http')
+        content_type, body = connection._encode_multipart_formdata(
+            {'config_template': {'name': u'pxe h\xe9st', 'template': self.file, 'snippet': False}})
+        form = self.parse(content_type, body)
+        self.assertEqual(form.getvalue('config_template[name]'), u'pxe h\xe9st'.encode('utf-8'))
+        self.assertEqual(form.getvalue('config_template[snippet]'), 'false')
+        upload = form['config_template[template]']
+        self.assertEqual(upload.filename, os.path.basename(self.file.name))
+        self.assertEqual(upload.type, 'text/plain')
+        self.assertEqual(upload.value, self.template)
+
+    def test_sent_from_the_current_position(self):
+        self.file.seek(7)
+        body = MultipartBody([('template', self.file), ('name', 'pxe')])
+        form = self.parse(body.content_type, body)
+        self.assertEqual(form['template'].value, self.template[7:])
+
+        # a resent request reads the same body again
+        body.seek(0)
+        self.assertEqual(self.parse(body.content_type, body)['template'].value, self.template[7:])
+
+    def test_file_like_objects(self):
+        body = MultipartBody([('template', StringIO('#!ipxe\n'))])
+        self.assertEqual(self.parse(body.content_type, body)['template'].value, '#!ipxe\n')
+
+    def test_pipe_is_refused(self):
+        read, write = os.pipe()
+        os.write(write, '#!ipxe\n')
+        os.close(write)
+        stream = os.fdopen(read)
+        try:
+            try:
+                MultipartBody([('template', stream)])
+            except IOError, e:
+                self.assertTrue('not seekable' in str(e), str(e))
+            else:
+                self.fail('a pipe was accepted')
+        finally:
+            stream.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import unittest
+
+from foreman.apipie import ServerConnection
+from foreman.bindings import Bindings
+from foreman.stub_server import StubServer, SyntheticInventory
+
+
+class PaginationTest(unittest.TestCase):
+
+    def setUp(self):
+        # the server serves at most 1000 records per page
+        self.server = StubServer(SyntheticInventory(hosts=2500), max_per_page=1000).start()
+        self.bindings = Bindings(ServerConnection('127.0.0.1', self.server.port, 'http', 'foreman'))
+        self.host = self.bindings.host
+
+    def tearDown(self):
+        self.bindings.connection.close()
+        self.server.stop()
+
+    def ids(self, records):
+        return [self.host.record_id(record) for record in records]
+
+    def test_paginate(self):
+        ids = self.ids(self.host.paginate(self.host.index, per_page=300))
+        self.assertEqual(ids, range(1, 2501))
+
+    def test_paginate_capped_page_size(self):
+        ids = self.ids(self.host.paginate(self.host.index, per_page=2000))
+        self.assertEqual(ids, range(1, 2501))
+
+    def test_paginate_capped_page_size_without_prefetch(self):
+        ids = self.ids(self.host.paginate(self.host.index, per_page=2000, prefetch=False))
+        self.assertEqual(ids, range(1, 2501))
+
+    def test_paginate_search(self):
+        ids = self.ids(self.host.paginate(self.host.index, {'search': 'name ~ dmz'}, per_page=2000))
+        self.assertEqual(ids, range(2, 2501, 3))
+
+    def test_paginate_concurrently(self):
+        ids = self.ids(self.host.paginate_concurrently(self.host.index, per_page=300))
+        self.assertEqual(ids, range(1, 2501))
+
+    def test_paginate_concurrently_capped_page_size(self):
+        ids = self.ids(self.host.paginate_concurrently(self.host.index, per_page=2000))
+        self.assertEqual(ids, range(1, 2501))
+
+    def test_paginate_concurrently_without_total(self):
+        pages = []
+
+        def index(params):
+            # a server that does not report the total
+            pages.append(params['page'])
+            response = self.host.index(params)
+            del response.body['total'], response.body['subtotal']
+            return response
+        ids = self.ids(self.host.paginate_concurrently(index, per_page=1000))
+        self.assertEqual(ids, range(1, 2501))
+        self.assertEqual(pages, [1, 2, 3])
+
+    def test_paginate_concurrently_keeps_its_connections(self):
+        for i in range(2):
+            ids = self.ids(self.host.paginate_concurrently(self.host.index, per_page=100, concurrency=12))
+            self.assertEqual(ids, range(1, 2501))
+        # no connection was closed, the second run reused those of the first
+        stats = self.bindings.connection.pool.stats()
+        self.assertTrue(stats['opened'] <= 12, stats)
+        self.assertEqual(stats['idle'], stats['opened'], stats)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from foreman.apipie import BasicAuthentication, RequestHook, ServerConnection
+from foreman.bindings import Bindings
+from foreman.resolver import ResolveError, Resolver
+from foreman.stub_server import StubServer, SyntheticInventory
+
+
+class CatalogRequests(RequestHook):
+
+    def __init__(self):
+        self.fetched = 0
+
+    def after_request(self, timings):
+        if timings.method == 'GET' and '/api/domains' in timings.url:
+            self.fetched += 1
+
+
+class ResolverTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.server = StubServer(SyntheticInventory(hosts=10)).start()
+        self.bindings = self.connect()
+        self.requests = CatalogRequests()
+        self.bindings.connection.add_hook(self.requests)
+        self.resolver = Resolver(self.bindings, directory=self.directory)
+
+    def tearDown(self):
+        self.bindings.connection.close()
+        self.server.stop()
+        shutil.rmtree(self.directory)
+
+    def connect(self, username=None):
+        connection = ServerConnection('127.0.0.1', self.server.port, 'http', 'foreman')
+        if username:
+            connection.set_auth_method(BasicAuthentication(username, 'secret'))
+        return Bindings(connection)
+
+    def test_names_and_ids(self):
+        self.assertEqual(self.resolver.id('domain', 'lab.example.com'), 2)
+        self.assertEqual(self.resolver.id('domain', 3), 3)
+        self.assertEqual(self.resolver.id('domain', '3'), 3)
+        self.assertEqual(self.resolver.name('domain', 2), 'lab.example.com')
+        self.assertEqual(self.resolver.resolve({'name': 'web01', 'domain_name': 'dmz.example.com',
+                                                'architecture_id': 'i386'}),
+                         {'name': 'web01', 'domain_id': 3, 'architecture_id': 2})
+        self.assertRaises(ResolveError, self.resolver.id, 'domain', 'missing.example.com')
+        self.assertRaises(ResolveError, self.resolver.name, 'domain', 42)
+
+    def test_catalog_is_kept_for_the_ttl(self):
+        self.resolver.id('domain', 'example.com')
+        self.resolver.id('domain', 'lab.example.com')
+        # another process reads it from the shared file
+        Resolver(self.bindings, directory=self.directory).id('domain', 'example.com')
+        self.assertEqual(self.requests.fetched, 1)
+
+        self.resolver.ttl = -1
+        self.resolver.id('domain', 'example.com')
+        self.assertEqual(self.requests.fetched, 2)
+
+    def test_changes_drop_the_catalog(self):
+        for method, path in (('POST', '/api/domains'), ('PUT', '/api/domains/1'), ('DELETE', '/api/domains/1')):
+            self.resolver.id('domain', 'example.com')
+            fetched = self.requests.fetched
+            if method == 'POST':
+                self.bindings.connection.POST(path, {'domain': {'name': 'new.example.com'}})
+            elif method == 'PUT':
+                self.bindings.connection.PUT(path, {'domain': {'name': 'new.example.com'}})
+            else:
+                self.bindings.connection.DELETE(path)
+            self.assertFalse(os.listdir(self.resolver.directory), method)
+            self.resolver.id('domain', 'example.com')
+            self.assertEqual(self.requests.fetched, fetched + 1, method)
+
+    def test_reads_do_not_drop_the_catalog(self):
+        self.resolver.id('domain', 'example.com')
+        self.bindings.host.index()
+        self.resolver.id('domain', 'example.com')
+        self.assertEqual(self.requests.fetched, 1)
+
+    def test_catalogs_are_shared_per_user(self):
+        directories = [Resolver(self.connect(username), directory=self.directory).directory
+                       for username in ('alice', 'bob', 'alice', None)]
+        self.assertEqual(directories[0], directories[2])
+        self.assertEqual(len(set(directories)), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import unittest
+
+from foreman.apipie import ApipieApi, RouteTemplate
+
+
+class RouteTest(unittest.TestCase):
+
+    nested = '/api/hosts/:host_id/puppetclass_ids/:id'
+
+    def test_expand(self):
+        params = {'host_id': 5, 'id': 7, 'search': 'name ~ web'}
+        url, rest = ApipieApi.expand_route(self.nested, params)
+        self.assertEqual(url, '/api/hosts/5/puppetclass_ids/7/')
+        self.assertEqual(rest, {'search': 'name ~ web'})
+
+    def test_caller_params_are_untouched(self):
+        params = {'host_id': 5, 'id': 7, 'parameter': {'name': 'rack'}}
+        ApipieApi.expand_route(self.nested, params)
+        self.assertEqual(params, {'host_id': 5, 'id': 7, 'parameter': {'name': 'rack'}})
+
+    def test_missing_param(self):
+        params = {'host_id': 5}
+        self.assertRaises(Exception, ApipieApi.expand_route, self.nested, params)
+        self.assertRaises(Exception, ApipieApi.fill_params_in_url, self.nested, params)
+        self.assertEqual(params, {'host_id': 5})
+
+    def test_same_url_as_fill_params_in_url(self):
+        routes = [
+            ('/api/architectures', {}),
+            ('/api/architectures', None),
+            ('/api/hosts/:id', {'id': 'web01.example.com'}),
+            ('/api/host/:host_id/parameters/:id', {'host_id': 5, 'id': 7, 'parameter': {}}),
+            (self.nested, {'host_id': 5, 'id': 7}),
+            ('/api/hosts/:host_id/puppetclass_ids', {'host_id': 5, 'puppetclass_id': 3}),
+        ]
+        for route, params in routes:
+            url, rest = ApipieApi.expand_route(route, params)
+            filled = dict(params) if params is not None else None
+            self.assertEqual(url, ApipieApi.fill_params_in_url(route, filled), route)
+            self.assertEqual(rest, filled or {}, route)
+
+    def test_compiled_once(self):
+        self.assertTrue(ApipieApi.route(self.nested) is ApipieApi.route(self.nested))
+        self.assertEqual(RouteTemplate(self.nested).params, ('host_id', 'id'))
+
+    def test_percent_in_route(self):
+        url, rest = ApipieApi.expand_route('/api/100%/:id', {'id': 1})
+        self.assertEqual(url, '/api/100%/1/')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import unittest
+
+from foreman.apipie import ServerConnection
+from foreman.bindings import Bindings
+from foreman.stub_server import StubServer, SyntheticInventory
+
+
+class StreamingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = StubServer(SyntheticInventory(hosts=30, facts_per_host=4)).start()
+        self.bindings = Bindings(ServerConnection('127.0.0.1', self.server.port, 'http', 'foreman'))
+
+    def tearDown(self):
+        self.bindings.connection.close()
+        self.server.stop()
+
+    def test_results_array(self):
+        response = self.bindings.host.index({'per_page': 25}, stream=True)
+        hosts = list(response.body)
+        self.assertEqual(len(hosts), 25)
+        self.assertEqual(response.meta['total'], 30)
+        self.assertFalse('results' in response.meta)
+
+    def test_results_object(self):
+        response = self.bindings.fact_value.index({'per_page': 120}, stream=True)
+        members = list(response.body)
+        expected = self.bindings.fact_value.index({'per_page': 120}).body['results']
+        self.assertEqual(len(members), 30)
+        self.assertEqual(dict(members), expected)
+        self.assertEqual(response.meta['total'], 120)
+        self.assertFalse('results' in response.meta)
+
+    def test_empty_results_object(self):
+        response = self.bindings.fact_value.index({'search': 'host = none', 'page': 99}, stream=True)
+        self.assertEqual(list(response.body), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
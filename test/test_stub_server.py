@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright © 2013 Red Hat, Inc.
+#
+# This software is licensed to you under the GNU General Public
+# License as published by the Free Software Foundation; either version
+# 2 of the License (GPLv2) or (at your option) any later version.
+# There is NO WARRANTY for this software, express or implied,
+# including the implied warranties of MERCHANTABILITY,
+# NON-INFRINGEMENT, or FITNESS FOR A PARTICULAR PURPOSE. You should
+# have received a copy of GPLv2 along with this software; if not, see
+# http://www.gnu.org/licenses/old-licenses/gpl-2.0.txt.
+
+import unittest
+
+from foreman.apipie import ServerConnection
+from foreman.bindings import Bindings
+from foreman.stub_server import StubServer, SyntheticInventory
+
+
+class CountingInventory(SyntheticInventory):
+
+    def __init__(self, *args, **kwargs):
+        SyntheticInventory.__init__(self, *args, **kwargs)
+        self.generated = 0
+
+    def facts(self, host_id):
+        self.generated += 1
+        return SyntheticInventory.facts(self, host_id)
+
+
+class OrderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.inventory = CountingInventory(hosts=2000, facts_per_host=5)
+        self.server = StubServer(self.inventory, interleaved_facts=True).start()
+        self.bindings = Bindings(ServerConnection('127.0.0.1', self.server.port, 'http', 'foreman'))
+
+    def tearDown(self):
+        self.bindings.connection.close()
+        self.server.stop()
+
+    def test_ordered_by_host_without_generating_all_hosts(self):
+        body = self.bindings.fact_value.index({'order': 'host', 'page': 50, 'per_page': 100}).body
+        self.assertEqual(self.inventory.generated, 20)
+        names = [self.inventory.host(host_id)['name'] for host_id in range(981, 1001)]
+        self.assertEqual(sorted(body['results']), names)
+        for name in names:
+            self.assertEqual(len(body['results'][name]), 5)
+
+    def test_search_keeps_only_the_page(self):
+        body = self.bindings.host.index({'search': 'name ~ dmz', 'order': 'id', 'page': 2, 'per_page': 10}).body
+        self.assertEqual(body['subtotal'], 667)
+        self.assertEqual([host['id'] for host in body['results']], range(32, 62, 3))
+
+    def test_other_orders_sort_all_records(self):
+        body = self.bindings.host.index({'order': 'id DESC', 'per_page': 5}).body
+        self.assertEqual([host['id'] for host in body['results']], range(2000, 1995, -1))
+        body = self.bindings.host.index({'order': 'domain_id', 'search': 'id < 20', 'per_page': 3}).body
+        self.assertEqual([host['id'] for host in body['results']], [3, 6, 9])
+
+
+if __name__ == '__main__':
+    unittest.main()